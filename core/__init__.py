@@ -7,9 +7,37 @@ __all__ = [
     "Device",
     "ThingsboardConnector",
     "DataGenerator",
+    "FleetSimulator",
+    "FleetPool",
+    "TokenStore",
+    "TelemetryBatcher",
+    "SegmentCache",
+    "RateProfile",
+    "RateController",
+    "SendQueue",
+    "PayloadEncoder",
+    "FleetStore",
+    "FleetEngine",
+    "Metrics",
+    "Profiler",
+    "TraceWriter",
+    "TraceReplayer",
 ]
 
 from .config_handler import ConfigHandler
 from .abstractions import Device
 from .thingsboard_connector import ThingsboardConnector
 from .data_generator import DataGenerator
+from .fleet_simulator import FleetSimulator
+from .fleet_pool import FleetPool
+from .token_store import TokenStore
+from .telemetry_batcher import TelemetryBatcher
+from .segment_cache import SegmentCache
+from .rate_controller import RateProfile, RateController
+from .send_queue import SendQueue
+from .payload_encoder import PayloadEncoder
+from .fleet_store import FleetStore
+from .fleet_engine import FleetEngine
+from .metrics import Metrics
+from .profiler import Profiler
+from .trace import TraceWriter, TraceReplayer
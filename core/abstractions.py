@@ -11,6 +11,8 @@ logger = logging.getLogger(__name__)
 class Modem:
     """This class represents the modem of the device."""
 
+    __slots__ = ("imei", "fw_ver")
+
     def __init__(self, imei: str = "FFFFFFFFFFFFFFFF", fw_ver: str = "0"):
         self.imei = imei
         self.fw_ver = fw_ver
@@ -19,13 +21,25 @@ class Modem:
 class SimCard:
     """This class represents the SIM card of the device."""
 
+    __slots__ = ("iccid", "imsi")
+
     def __init__(self, iccid: str = "FFFFFFFFFFFFFFFFFFFF", imsi: str = "FFFFFFFFFFF"):
         self.iccid = iccid
         self.imsi = imsi
 
 
 class Device:
-    """This class represents the device to be simulated."""
+    """This class represents the device to be simulated. It has slots
+    instead of a per-instance dictionary, since a fleet holds many of them."""
+
+    __slots__ = (
+        "is_registered",
+        "mac_address",
+        "fw_version",
+        "_provision_key",
+        "_provision_secret",
+        "_token",
+    )
 
     def __init__(
         self,
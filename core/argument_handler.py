@@ -51,10 +51,119 @@ class ArgumentHandler:
         },
     }
 
+    PROFILE_ARGUMENTS = {
+        "--profile": {
+            "type": str,
+            "nargs": "?",
+            "const": "cprofile",
+            "choices": ["cprofile", "sampling"],
+            "help": "Profile the simulator loop for a bounded duration, with cProfile by default.",
+            "dest": "profile",
+        },
+        "--profile_duration": {
+            "type": float,
+            "default": 60.0,
+            "help": "The duration of the profiled run in seconds.",
+            "dest": "profile_duration",
+        },
+        "--profile_output": {
+            "type": str,
+            "default": "profile",
+            "help": "The path prefix of the profile files.",
+            "dest": "profile_output",
+        },
+    }
+
+    FLEET_ARGUMENTS = {
+        "--devices": {
+            "type": int,
+            "required": True,
+            "help": "The number of simulated devices in the fleet.",
+            "dest": "devices",
+        },
+        "--fleet_spec": {
+            "type": str,
+            "required": True,
+            "help": "The path of the JSON file describing the sensors and timing of the fleet.",
+            "dest": "fleet_spec",
+        },
+        "--concurrency": {
+            "type": int,
+            "default": 100,
+            "help": "The maximum number of requests waiting for a response at the same time.",
+            "dest": "concurrency",
+        },
+        "--workers": {
+            "type": int,
+            "nargs": "?",
+            "help": "The number of worker processes sharing the fleet. Uses all the CPUs if not passed.",
+            "dest": "workers",
+        },
+        "--token_store": {
+            "type": str,
+            "default": "tokens.jsonl",
+            "help": "The file to load the device tokens from and save new tokens to.",
+            "dest": "token_store",
+        },
+        "--rate": {
+            "type": float,
+            "nargs": "?",
+            "help": "The target aggregate rate of the fleet, replacing the rate of the fleet spec.",
+            "dest": "rate",
+        },
+        "--seed": {
+            "type": int,
+            "nargs": "?",
+            "help": "The seed of the fleet. The runs are not reproducible if not passed.",
+            "dest": "seed",
+        },
+        "--checkpoint": {
+            "type": str,
+            "nargs": "?",
+            "help": "The prefix of the checkpoint files to resume from and save to.",
+            "dest": "checkpoint",
+        },
+        "--checkpoint_interval": {
+            "type": float,
+            "default": 60.0,
+            "help": "The time between two checkpoints in seconds.",
+            "dest": "checkpoint_interval",
+        },
+        "--metrics_port": {
+            "type": int,
+            "nargs": "?",
+            "help": "The first port of the local HTTP metrics endpoints, one per worker.",
+            "dest": "metrics_port",
+        },
+        "--metrics_interval": {
+            "type": float,
+            "default": 60.0,
+            "help": "The time between two metrics summaries in the logs, 0 disables them.",
+            "dest": "metrics_interval",
+        },
+        "--record": {
+            "type": str,
+            "nargs": "?",
+            "help": "The prefix of the compressed traces of the sent requests, one per worker.",
+            "dest": "record",
+        },
+        "--duration": {
+            "type": float,
+            "nargs": "?",
+            "help": "The duration of the simulation in seconds. Runs forever if not passed.",
+            "dest": "duration",
+        },
+    }
+
     @staticmethod
-    def read() -> argparse.Namespace:
+    def read(fleet: bool = False) -> argparse.Namespace:
         """It reads the arguments passed to the program and return the variables needed.
 
+        Parameters
+        ----------
+        fleet : bool, optional
+            Also read the arguments of the fleet simulator, by default False.
+
         Returns
         -------
         argparse.Namespace
@@ -70,6 +179,13 @@ class ArgumentHandler:
         for argument, options in ArgumentHandler.ARGUMENTS.items():
             parser.add_argument(argument, **options)
 
+        if fleet:
+            for argument, options in ArgumentHandler.FLEET_ARGUMENTS.items():
+                parser.add_argument(argument, **options)
+        else:
+            for argument, options in ArgumentHandler.PROFILE_ARGUMENTS.items():
+                parser.add_argument(argument, **options)
+
         # Parse the arguments.
         args = parser.parse_args()
 
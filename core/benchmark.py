@@ -0,0 +1,373 @@
+"""
+This module is responsible for measuring the throughput of the simulator stages.
+"""
+import asyncio
+import json
+import logging
+import platform
+import time
+from typing import Any, Callable, Optional
+
+import numpy as np
+from aiocoap import Code, Message
+
+from .abstractions import Device
+from .data_generator import DataGenerator
+from .fleet_store import FleetStore
+from .functions import FunctionRegistry
+from .mock_server import MockThingsboardServer
+from .payload_encoder import PayloadEncoder
+from .thingsboard_connector import ThingsboardConnector
+
+# Create a logger interface.
+logger = logging.getLogger(__name__)
+
+
+class Benchmark:
+    """This class measures the throughput of data generation, serialization
+    and transport, and collects the results in a JSON compatible dictionary
+    so different runs can be compared."""
+
+    # The parameters used to benchmark every supported function.
+    FUNCTION_PARAMETERS: dict[str, dict[str, Any]] = {
+        "exponantial": {"base": 1.0001, "shift": 0.5, "offset": 25.0},
+        "linear": {"slope": 0.5, "offset": 25.0},
+        "sinusoidal": {"amplitude": 5.0, "frequency": 0.01, "offset": 25.0},
+        "polynomial": {"coefficients": [25.0, 0.1, -0.001, 0.00001]},
+        "logistic": {"maximum": 50.0, "rate": 0.01, "midpoint": 500.0},
+        "sawtooth": {"amplitude": 10.0, "period": 100.0, "offset": 20.0},
+        "random_walk": {"step": 0.1, "offset": 25.0, "seed": 0},
+        "composite": {
+            "expression": {
+                "sum": [
+                    {"function": "linear", "parameters": {"slope": 0.5, "offset": 25.0}},
+                    {"function": "sinusoidal", "parameters": {"amplitude": 5.0, "frequency": 0.01}},
+                ]
+            }
+        },
+    }
+
+    # The payload encodings compared by the serialization benchmark.
+    ENCODINGS: dict[str, dict[str, Any]] = {
+        "json": {"format": "json"},
+        "json_stdlib": {"format": "json", "backend": "json"},
+        "json_precision_2": {"format": "json", "precision": 2},
+        "cbor": {"format": "cbor"},
+        "packed": {"format": "packed"},
+        "packed_float64": {"format": "packed", "dtype": "float64"},
+    }
+
+    def __init__(self, min_time: float = 0.2) -> None:
+        """Initialize the class.
+
+        Parameters
+        ----------
+        min_time : float, optional
+            The minimum duration of every measurement in seconds, by default 0.2.
+        """
+        self._min_time = min_time
+        self.results: dict[str, Any] = {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+        }
+
+    def run_generation(
+        self, buffer_sizes: list[int], error_percentage: int = 10
+    ) -> list[dict[str, Any]]:
+        """It measures the samples per second of every registered function
+        with parameters in `FUNCTION_PARAMETERS`.
+
+        Parameters
+        ----------
+        buffer_sizes : list[int]
+            The buffer sizes to measure.
+        error_percentage : int, optional
+            The error percentage of the generated data, by default 10.
+
+        Returns
+        -------
+        list[dict[str, Any]]
+            A result for every function and buffer size.
+        """
+        results = []
+        for function in FunctionRegistry.names():
+            parameters = self.FUNCTION_PARAMETERS.get(function)
+            if parameters is None:
+                logger.warning("Skipping the %s function without benchmark parameters.", function)
+                continue
+            for buffer_size in buffer_sizes:
+                generator = DataGenerator(buffer_size, function, parameters, seed=0)
+                iterations, elapsed = self._measure(
+                    lambda generator=generator: generator.generate(
+                        error_percentage=error_percentage, as_array=True
+                    )
+                )
+                results.append(
+                    {
+                        "function": function,
+                        "buffer_size": buffer_size,
+                        "calls_per_sec": iterations / elapsed,
+                        "samples_per_sec": iterations * buffer_size / elapsed,
+                    }
+                )
+
+        self.results["generation"] = results
+        return results
+
+    def run_serialization(self, buffer_sizes: list[int]) -> list[dict[str, Any]]:
+        """It measures the formatting and encoding of telemetry packets,
+        for every payload encoding. The encodings receive the buffers as
+        arrays like in the fleet, and "legacy_json" is the `json.dumps` of
+        the lists as sent by `main.py`. The encodings whose optional
+        package is not installed are skipped.
+
+        Parameters
+        ----------
+        buffer_sizes : list[int]
+            The buffer sizes of the two sensors of every packet.
+
+        Returns
+        -------
+        list[dict[str, Any]]
+            A result for every buffer size and encoding.
+        """
+        results = []
+        for buffer_size in buffer_sizes:
+            generator = DataGenerator(
+                buffer_size, "exponantial", self.FUNCTION_PARAMETERS["exponantial"], seed=0
+            )
+            first, second = generator.generate(as_array=True), generator.generate(as_array=True)
+
+            encoders: dict[str, Callable[[Any], bytes]] = {
+                "legacy_json": lambda data: str.encode(
+                    json.dumps({name: values.tolist() for name, values in data.items()})
+                )
+            }
+            for name, spec in self.ENCODINGS.items():
+                try:
+                    encoders[name] = PayloadEncoder.create(spec).encode
+                except ImportError as error:
+                    logger.warning("Skipping the %s encoding: %s", name, error)
+
+            for name, encode in encoders.items():
+                size = len(encode(Device.get_formatted_data("e1", first, "e2", second)))
+                iterations, elapsed = self._measure(
+                    lambda first=first, second=second, encode=encode: encode(
+                        Device.get_formatted_data("e1", first, "e2", second)
+                    )
+                )
+                results.append(
+                    {
+                        "buffer_size": buffer_size,
+                        "encoding": name,
+                        "payload_bytes": size,
+                        "messages_per_sec": iterations / elapsed,
+                        "bytes_per_sec": iterations * size / elapsed,
+                        "encode_us_per_message": elapsed / iterations * 1e6,
+                    }
+                )
+
+        self.results["serialization"] = results
+        return results
+
+    def run_fleet_tick(
+        self, device_count: int = 100_000, buffer_size: int = 10, encoding: str = "packed"
+    ) -> dict[str, Any]:
+        """It measures a tick of a `FleetStore` with every device due, the
+        vectorized generation alone, and with a payload encoded from the
+        row of every device.
+
+        Parameters
+        ----------
+        device_count : int, optional
+            The number of devices of the store, by default 100000.
+        buffer_size : int, optional
+            The buffer size of the two sensors of every device, by default 10.
+        encoding : str, optional
+            The payload encoding, see `PayloadEncoder.create`, by default "packed".
+
+        Returns
+        -------
+        dict[str, Any]
+            The samples per second of the generation and of the encoded packets.
+        """
+        spec = {
+            "sensors": [
+                {
+                    "name": name,
+                    "function_type": function_type,
+                    "parameters": self.FUNCTION_PARAMETERS[function_type],
+                    "buffer_size": buffer_size,
+                    "error_percentage": 10,
+                }
+                for name, function_type in (("e1", "exponantial"), ("e2", "sinusoidal"))
+            ]
+        }
+        store = FleetStore(spec, device_count, seed=0)
+        rows = np.arange(device_count)
+        encoder = PayloadEncoder.create(encoding)
+
+        def encode_tick() -> None:
+            buffers = store.generate(rows)
+            for position in range(device_count):
+                encoder.encode({name: values[position] for name, values in buffers.items()})
+
+        samples = device_count * buffer_size * len(spec["sensors"])
+        generate_iterations, generate_elapsed = self._measure(lambda: store.generate(rows))
+        encode_iterations, encode_elapsed = self._measure(encode_tick)
+
+        result = {
+            "device_count": device_count,
+            "buffer_size": buffer_size,
+            "encoding": encoding,
+            "generate_samples_per_sec": samples * generate_iterations / generate_elapsed,
+            "encoded_samples_per_sec": samples * encode_iterations / encode_elapsed,
+            "encoded_messages_per_sec": device_count * encode_iterations / encode_elapsed,
+        }
+        self.results["fleet_tick"] = result
+        return result
+
+    def run_requests(self, hostname: str = "127.0.0.1", port: int = 5683) -> dict[str, Any]:
+        """It measures building the CoAP request of a telemetry message,
+        from the URI string and from the options of the parsed URI.
+
+        Returns
+        -------
+        dict[str, Any]
+            The cost of both in microseconds per message.
+        """
+        connector = ThingsboardConnector(hostname, port)
+        path = "/api/v1/%s/telemetry" % ("0" * 20)
+        uri = "coap://%s:%d%s" % (hostname, port, path)
+
+        def from_template() -> Message:
+            # pylint: disable-next=protected-access
+            remote, options = connector._request_template(path)
+            message = Message(code=Code.POST, payload=b"{}", **options)
+            message.remote = remote
+            return message
+
+        uri_iterations, uri_elapsed = self._measure(
+            lambda: Message(code=Code.POST, payload=b"{}", uri=uri)
+        )
+        template_iterations, template_elapsed = self._measure(from_template)
+
+        result = {
+            "uri_us_per_message": uri_elapsed / uri_iterations * 1e6,
+            "template_us_per_message": template_elapsed / template_iterations * 1e6,
+        }
+        self.results["requests"] = result
+        return result
+
+    def run_transport(
+        self,
+        messages: int = 1000,
+        concurrency: int = 50,
+        buffer_size: int = 10,
+        hostname: Optional[str] = None,
+        port: Optional[int] = None,
+    ) -> dict[str, Any]:
+        """It measures the end-to-end messages per second of the connector.
+
+        Parameters
+        ----------
+        messages : int, optional
+            The number of telemetry messages to send, by default 1000.
+        concurrency : int, optional
+            The number of messages in flight, by default 50.
+        buffer_size : int, optional
+            The buffer size of the telemetry packets, by default 10.
+        hostname : Optional[str], optional
+            The host of a running CoAP endpoint, by default a mock server is started.
+        port : Optional[int], optional
+            The port of a running CoAP endpoint.
+
+        Returns
+        -------
+        dict[str, Any]
+            The transport result.
+        """
+        result = asyncio.run(
+            self._run_transport_async(messages, concurrency, buffer_size, hostname, port)
+        )
+        self.results["transport"] = result
+        return result
+
+    def save(self, path: str) -> None:
+        """It writes the results to a JSON file."""
+        with open(path, "w", encoding="utf-8") as result_file:
+            json.dump(self.results, result_file, indent=4)
+
+    async def _run_transport_async(
+        self,
+        messages: int,
+        concurrency: int,
+        buffer_size: int,
+        hostname: Optional[str],
+        port: Optional[int],
+    ) -> dict[str, Any]:
+        """It sends the telemetry messages, starting a mock server if needed."""
+        server = None
+        if hostname is None:
+            hostname, port = "127.0.0.1", MockThingsboardServer.free_port()
+            server = MockThingsboardServer(hostname, port)
+            await server.start()
+
+        generator = DataGenerator(
+            buffer_size, "exponantial", self.FUNCTION_PARAMETERS["exponantial"], seed=0
+        )
+        packet = Device.get_formatted_data("e1", generator.generate())
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies: list[float] = []
+        failed = 0
+
+        async def send(connector: ThingsboardConnector) -> None:
+            nonlocal failed
+            async with semaphore:
+                sent_at = time.perf_counter()
+                try:
+                    await connector.send_telemetry_data_async("benchmark", packet)
+                except Exception:  # pylint: disable=broad-except
+                    failed += 1
+                else:
+                    latencies.append(time.perf_counter() - sent_at)
+
+        try:
+            async with ThingsboardConnector(hostname, port) as connector:
+                start = time.perf_counter()
+                await asyncio.gather(*(send(connector) for _ in range(messages)))
+                elapsed = time.perf_counter() - start
+        finally:
+            if server is not None:
+                await server.stop()
+
+        return {
+            "endpoint": "mock" if server is not None else f"{hostname}:{port}",
+            "messages": messages,
+            "failed": failed,
+            "concurrency": concurrency,
+            "messages_per_sec": (messages - failed) / elapsed,
+            "mean_latency_ms": float(np.mean(latencies)) * 1e3 if latencies else None,
+            "p99_latency_ms": float(np.percentile(latencies, 99)) * 1e3 if latencies else None,
+        }
+
+    def _measure(self, function: Callable[[], Any]) -> tuple[int, float]:
+        """It calls a function repeatedly for at least the minimum time.
+
+        Returns
+        -------
+        tuple[int, float]
+            The number of calls and the elapsed time in seconds.
+        """
+        iterations = 0
+        batch = 1
+        start = time.perf_counter()
+        while True:
+            for _ in range(batch):
+                function()
+            iterations += batch
+            elapsed = time.perf_counter() - start
+            if elapsed >= self._min_time:
+                return iterations, elapsed
+            batch *= 2
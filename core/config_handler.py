@@ -4,6 +4,7 @@ This module is responsible for reading the configuration files.
 
 import logging
 from os import getenv
+from typing import Any
 from dotenv import load_dotenv
 
 from .argument_handler import ArgumentHandler
@@ -16,12 +17,17 @@ class ConfigHandler:
     """This class is responsible for reading the configuration files."""
 
     @staticmethod
-    def read() -> dict[str, str]:
+    def read(fleet: bool = False) -> dict[str, Any]:
         """It reads the configuration file and return the variables needed.
 
+        Parameters
+        ----------
+        fleet : bool, optional
+            Also read the settings of the fleet simulator, by default False.
+
         Returns
         -------
-        dict[str, str]
+        dict[str, Any]
             A dictionary with the content of the configuration file.
             - host : str
                 The host of the platform.
@@ -31,15 +37,47 @@ class ConfigHandler:
                 The provision key of the device.
             - provision_secret : str
                 The provision secret of the device.
+            - profile : str
+                The profiling mode, None to not profile. Only if fleet is not set.
+            - profile_duration : float
+                The duration of the profiled run. Only if fleet is not set.
+            - profile_output : str
+                The path prefix of the profile files. Only if fleet is not set.
+            - devices : int
+                The number of devices in the fleet. Only if fleet is set.
+            - fleet_spec : str
+                The path of the fleet spec file. Only if fleet is set.
+            - concurrency : int
+                The concurrency cap of the fleet. Only if fleet is set.
+            - workers : int
+                The number of worker processes of the fleet. Only if fleet is set.
+            - token_store : str
+                The path of the token store of the fleet. Only if fleet is set.
+            - rate : float
+                The target aggregate rate of the fleet. Only if fleet is set.
+            - seed : int
+                The seed of the fleet. Only if fleet is set.
+            - checkpoint : str
+                The prefix of the checkpoint files. Only if fleet is set.
+            - checkpoint_interval : float
+                The time between two checkpoints. Only if fleet is set.
+            - metrics_port : int
+                The first port of the metrics endpoints. Only if fleet is set.
+            - metrics_interval : float
+                The time between two metrics summaries. Only if fleet is set.
+            - record : str
+                The prefix of the request traces. Only if fleet is set.
+            - duration : float
+                The duration of the fleet simulation. Only if fleet is set.
         """
         # Load the environment variables.
         load_dotenv()
 
         # Read the arguments passed to the program.
-        args = ArgumentHandler.read()
+        args = ArgumentHandler.read(fleet)
 
         # Create a dictionary to store the content of the config file.
-        config_content: dict[str, str] = {}
+        config_content: dict[str, Any] = {}
 
         # Read connection section.
         config_content["host"] = getenv("THINGSBOARD_HOST", args.host)
@@ -55,5 +93,27 @@ class ConfigHandler:
             "DEVICE_PROVISION_SECRET", args.provision_secret
         )
 
+        # Read profiling section.
+        if not fleet:
+            config_content["profile"] = args.profile
+            config_content["profile_duration"] = args.profile_duration
+            config_content["profile_output"] = args.profile_output
+
+        # Read fleet section.
+        if fleet:
+            config_content["devices"] = args.devices
+            config_content["fleet_spec"] = args.fleet_spec
+            config_content["concurrency"] = args.concurrency
+            config_content["workers"] = args.workers
+            config_content["token_store"] = args.token_store
+            config_content["rate"] = args.rate
+            config_content["seed"] = args.seed
+            config_content["checkpoint"] = args.checkpoint
+            config_content["checkpoint_interval"] = args.checkpoint_interval
+            config_content["metrics_port"] = args.metrics_port
+            config_content["metrics_interval"] = args.metrics_interval
+            config_content["record"] = args.record
+            config_content["duration"] = args.duration
+
         # Return the content of the config file.
         return config_content
@@ -1,11 +1,14 @@
 """
 This module is responsible for generating random data for the analysis.
 """
+import json
 import logging
-from typing import Any
-from random import randint
-from math import floor
-from .functions.exponantial_function import ExponantialFunction
+import zlib
+from typing import Any, Optional
+import numpy as np
+from .fault_models import FaultChain, PercentageError
+from .functions import FunctionRegistry
+from .segment_cache import SegmentCache
 
 # Create a logger interface.
 logger = logging.getLogger(__name__)
@@ -16,91 +19,282 @@ class DataGenerator:
     just like recieved from MCU.
     """
 
-    SUPPORTED_FUNCTIONS = [
-        {
-            "name": "exponantial",
-            "class": ExponantialFunction,
-            "parameters": ["base", "shift", "offset"],
-        },
-    ]
-
     def __init__(
         self,
         buffer_size: int,
         function_type: str,
         function_parameters: dict[str, float],
         data_index: int = 0,
+        seed: Optional[int] = None,
+        faults: Optional[list[dict[str, Any]]] = None,
+        cache: Optional[SegmentCache] = None,
     ) -> None:
-        # Check if the function type is valid.
-        if function_type not in [func["name"] for func in self.SUPPORTED_FUNCTIONS]:
-            raise ValueError(
-                f"Function type {function_type} is not supported. "
-                f"Supported functions are {self.SUPPORTED_FUNCTIONS}"
-            )
-
-        # Check if the function parameters are valid.
-        params_available: list
-        for func in self.SUPPORTED_FUNCTIONS:
-            if func["name"] == function_type:
-                params_available = func["parameters"]
-
-        for parameter in function_parameters:
-            if parameter not in params_available:
-                raise ValueError(
-                    f"Parameter {parameter} is not supported. "
-                    f"Supported parameters are {self.SUPPORTED_FUNCTIONS}"
-                )
-
-        # Create the function object.
+        # Create the function object, the registry validates the parameters.
+        self.function_type = function_type
+        self.function_parameters = dict(function_parameters)
         self.function = self._create_function(function_type, function_parameters)
 
         # Set the data index and buffer size.
         self._data_index = data_index
         self._buffer_size = buffer_size
 
-    def generate(self, step_size: float = 0.01, error_percentage: int = 0) -> list[float]:
+        # Create the random number generator used for the error injection,
+        # and seed the random functions from it.
+        self._rng = np.random.default_rng(seed)
+        if seed is not None:
+            self.function.reseed(self._rng)
+
+        # Create the fault models applied after the percentage error.
+        self.faults = FaultChain.create(faults or [])
+
+        # Share the clean values with the identical generators, unless
+        # the function depends on more than x.
+        self._cache = cache if self.function.deterministic else None
+        self._cache_key = (
+            function_type,
+            json.dumps(self.function_parameters, sort_keys=True),
+            buffer_size,
+        )
+
+    @property
+    def buffer_size(self) -> int:
+        """The number of samples in a buffer."""
+        return self._buffer_size
+
+    @property
+    def data_index(self) -> int:
+        """The x value where the next buffer starts."""
+        return self._data_index
+
+    @staticmethod
+    def derive_seed(fleet_seed: int, mac_address: str, sensor_name: str = "") -> int:
+        """Derive the seed of a sensor from the seed of the fleet, so every
+        sensor of every device has its own reproducible random stream.
+
+        Parameters
+        ----------
+        fleet_seed : int
+            The seed of the whole fleet.
+        mac_address : str
+            The MAC address of the device.
+        sensor_name : str, optional
+            The name of the sensor on the device, by default "".
+
+        Returns
+        -------
+        int
+            The seed of the sensor.
+        """
+        entropy = [
+            fleet_seed,
+            zlib.crc32(mac_address.encode("utf-8")),
+            zlib.crc32(sensor_name.encode("utf-8")),
+        ]
+        return int(np.random.SeedSequence(entropy).generate_state(1, np.uint64)[0])
+
+    def checkpoint(self) -> dict[str, Any]:
+        """Return the state needed to continue generating exactly where
+        this generator is. The state can be serialized as JSON.
+
+        Returns
+        -------
+        dict[str, Any]
+            The data index, and the states of the random number generator,
+            the function and the fault models.
+        """
+        return {
+            "data_index": self._data_index,
+            "rng": self._rng.bit_generator.state,
+            "function": self.function.get_state(),
+            "faults": self.faults.get_state(),
+        }
+
+    def restore(self, state: dict[str, Any]) -> None:
+        """Continue from a state returned by `checkpoint`.
+
+        Parameters
+        ----------
+        state : dict[str, Any]
+            The checkpoint of a generator with the same function and fault models.
+        """
+        self._data_index = state["data_index"]
+        self._rng.bit_generator.state = state["rng"]
+        self.function.set_state(state["function"])
+        self.faults.set_state(state["faults"])
+
+    def generate(
+        self,
+        step_size: float = 0.01,
+        error_percentage: int = 0,
+        as_array: bool = False,
+        with_mask: bool = False,
+    ) -> list[float] | np.ndarray | tuple:
         """Generate the data.
 
+        Parameters
+        ----------
+        step_size : float, optional
+            The distance between two consecutive x values, by default 0.01.
+        error_percentage : int, optional
+            The maximum error percentage to be added, by default 0.
+        as_array : bool, optional
+            Return a numpy array instead of a list, by default False.
+        with_mask : bool, optional
+            Also return the fault mask, by default False.
+
         Returns
         -------
-        list[float]
-            The generated data.
+        list[float] | np.ndarray | tuple
+            The generated data. The missing samples are NaN in an array and
+            None in a list. With `with_mask`, a tuple of the data and the uint8
+            mask of the fault model flags of every sample, see `FaultChain`.
         """
-        x_values = [self._data_index + (step_size * i) for i in range(self._buffer_size)]
-        y_values = [round(self.function.calculate(x), 3) for x in x_values]
+        y_values = self._clean_values(1, step_size)[0]
         self._data_index += self._buffer_size
 
         # Add error to the data.
-        if error_percentage > 0:
-            y_values = self._add_error(y_values, error_percentage)
+        y_values, fault_mask = self._inject_faults(y_values, error_percentage)
 
+        if as_array:
+            y_values = self._own_copy(y_values)
+        else:
+            if fault_mask is not None and np.isnan(y_values).any():
+                # JSON has no NaN, so the missing samples become null.
+                y_values = np.where(np.isnan(y_values), None, y_values)
+            y_values = y_values.tolist()
+
+        if with_mask:
+            return y_values, self._full_mask(fault_mask, (self._buffer_size,))
         return y_values
 
+    def generate_buffers(
+        self,
+        buffer_count: int,
+        step_size: float = 0.01,
+        error_percentage: int = 0,
+        with_mask: bool = False,
+    ) -> np.ndarray | tuple[np.ndarray, np.ndarray]:
+        """Generate several consecutive buffers at once.
+
+        The clean values are the same as calling `generate` `buffer_count`
+        times, but they are calculated with a single numpy call.
+
+        Parameters
+        ----------
+        buffer_count : int
+            The number of buffers to generate.
+        step_size : float, optional
+            The distance between two consecutive x values, by default 0.01.
+        error_percentage : int, optional
+            The maximum error percentage to be added, by default 0.
+        with_mask : bool, optional
+            Also return the fault mask, by default False.
+
+        Returns
+        -------
+        np.ndarray | tuple[np.ndarray, np.ndarray]
+            The generated data with one buffer per row, and the fault mask
+            of the same shape with `with_mask`.
+        """
+        y_values = self._clean_values(buffer_count, step_size)
+        self._data_index += self._buffer_size * buffer_count
+
+        # Add error to the data.
+        y_values, fault_mask = self._inject_faults(y_values, error_percentage)
+        y_values = self._own_copy(y_values)
+
+        if with_mask:
+            return y_values, self._full_mask(fault_mask, y_values.shape)
+        return y_values
+
+    def _clean_values(self, buffer_count: int, step_size: float) -> np.ndarray:
+        """Calculate the rounded values of the next buffers, one buffer per
+        row, or take them from the cache. The data index is not advanced.
+
+        A segment is identified by the function, its parameters, the step
+        size and the range of buffers, so the cached arrays are read-only.
+        """
+        if self._cache is None:
+            return self._calculate_buffers(buffer_count, step_size)
+
+        key = self._cache_key + (step_size, self._data_index, buffer_count)
+        return self._cache.get_or_compute(
+            key, lambda: self._calculate_buffers(buffer_count, step_size)
+        )
+
+    def _calculate_buffers(self, buffer_count: int, step_size: float) -> np.ndarray:
+        """Calculate the rounded values of the next buffers, one buffer per row."""
+        buffer_starts = self._data_index + self._buffer_size * np.arange(
+            buffer_count, dtype=np.float64
+        )
+        x_values = buffer_starts[:, np.newaxis] + step_size * np.arange(
+            self._buffer_size, dtype=np.float64
+        )
+        return np.round(self.function.calculate_array(x_values), 3)
+
+    def _inject_faults(
+        self, y_values: np.ndarray, error_percentage: float
+    ) -> tuple[np.ndarray, Optional[np.ndarray]]:
+        """Apply the percentage error and the fault models.
+
+        Returns
+        -------
+        tuple[np.ndarray, Optional[np.ndarray]]
+            The y values with faults, and the fault mask, None if no fault was applied.
+        """
+        fault_mask = None
+        if error_percentage > 0:
+            y_values, mask = PercentageError(error_percentage).apply(y_values, self._rng)
+            fault_mask = np.where(mask, np.uint8(PercentageError.FLAG), np.uint8(0))
+
+        if self.faults.models:
+            y_values, chain_mask = self.faults.apply(y_values, self._rng)
+            fault_mask = chain_mask if fault_mask is None else fault_mask | chain_mask
+
+        return y_values, fault_mask
+
+    @staticmethod
+    def _own_copy(y_values: np.ndarray) -> np.ndarray:
+        """Return a copy of the values if they are a read-only cached segment,
+        so the callers can modify the arrays with or without a cache."""
+        if y_values.flags.writeable:
+            return y_values
+        return y_values.copy()
+
     @staticmethod
-    def _add_error(y_values: list[float], error_percentage: float) -> list[float]:
+    def _full_mask(fault_mask: Optional[np.ndarray], shape: tuple) -> np.ndarray:
+        """Return the fault mask, or an empty mask if no fault was applied."""
+        if fault_mask is None:
+            return np.zeros(shape, dtype=np.uint8)
+        return fault_mask
+
+    @staticmethod
+    def _add_error(
+        y_values: np.ndarray,
+        error_percentage: float,
+        rng: Optional[np.random.Generator] = None,
+    ) -> np.ndarray:
         """Add error to the data.
 
         Parameters
         ----------
-        y_values : list[float]
+        y_values : np.ndarray
             The y values.
         error_percentage : float
             The error percentage.
+        rng : np.random.Generator, optional
+            The random number generator, a fresh one is created if not given.
 
         Returns
         -------
-        list[float]
+        np.ndarray
             The y values with error.
         """
-        # @TODO: Implement with numpy for better performance.
-        errored_y_values: list[float] = []
-        for y_value in y_values:
-            random_error_multiplier = randint(0, floor(error_percentage))
-            random_sign = randint(0, 1)
-            sign_multiplier = 1 if random_sign == 0 else -1
-            errored_y = y_value + sign_multiplier * (y_value * (random_error_multiplier / 100))
-            errored_y_values.append(errored_y)
-        return errored_y_values
+        if rng is None:
+            rng = np.random.default_rng()
+
+        y_values = np.asarray(y_values, dtype=np.float64)
+        return PercentageError(error_percentage).apply(y_values, rng)[0]
 
     @staticmethod
     def _create_function(f_type: str, f_params: dict[str, Any]):
@@ -118,6 +312,4 @@ class DataGenerator:
         BaseFunction
             The function object.
         """
-        for func in DataGenerator.SUPPORTED_FUNCTIONS:
-            if func["name"] == f_type:
-                return func["class"](**f_params)
+        return FunctionRegistry.create(f_type, f_params)
@@ -0,0 +1,209 @@
+"""
+This module is responsible for writing generated datasets to disk in chunks.
+"""
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+import numpy as np
+
+from .data_generator import DataGenerator
+
+# Create a logger interface.
+logger = logging.getLogger(__name__)
+
+
+class DatasetWriter(ABC):
+    """Follow this interface to implement a file format for the offline
+    data generator. The data is written chunk by chunk, so the memory
+    use does not depend on the size of the dataset.
+    """
+
+    def __init__(self, path: str, column: str = "sensor_data", dtype: Any = np.float64) -> None:
+        self.path = path
+        self.column = column
+        self.dtype = np.dtype(dtype)
+        self.samples_written = 0
+
+    def __enter__(self) -> "DatasetWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @staticmethod
+    def create(file_format: str, path: str, total_samples: int, **kwargs) -> "DatasetWriter":
+        """It creates the writer of a file format.
+
+        Parameters
+        ----------
+        file_format : str
+            "csv", "npy" or "parquet".
+        path : str
+            The path of the output file.
+        total_samples : int
+            The number of samples that will be written.
+
+        Returns
+        -------
+        DatasetWriter
+            The writer.
+        """
+        if file_format == "csv":
+            return CsvDatasetWriter(path, **kwargs)
+        if file_format == "npy":
+            return NpyDatasetWriter(path, total_samples, **kwargs)
+        if file_format == "parquet":
+            return ParquetDatasetWriter(path, **kwargs)
+        raise ValueError(
+            f"File format {file_format} is not supported. "
+            "Supported formats are csv, npy and parquet."
+        )
+
+    @abstractmethod
+    def write(self, chunk: np.ndarray) -> None:
+        """The interface function to append a chunk of samples to the file."""
+
+    @abstractmethod
+    def close(self) -> None:
+        """The interface function to finish and close the file."""
+
+    def stream(
+        self,
+        generator: DataGenerator,
+        total_samples: int,
+        chunk_size: int = 1_000_000,
+        step_size: float = 0.01,
+        error_percentage: int = 0,
+    ) -> dict[str, float]:
+        """It generates the dataset chunk by chunk and writes each chunk
+        as soon as it is generated.
+
+        Parameters
+        ----------
+        generator : DataGenerator
+            The generator of the samples.
+        total_samples : int
+            The number of samples to write.
+        chunk_size : int, optional
+            The approximate number of samples of every chunk, by default 1_000_000.
+        step_size : float, optional
+            The step size of the generator, by default 0.01.
+        error_percentage : int, optional
+            The error percentage of the generator, by default 0.
+
+        Returns
+        -------
+        dict[str, float]
+            The number of samples, the elapsed seconds and the samples per second.
+        """
+        buffers_per_chunk = max(1, chunk_size // generator.buffer_size)
+
+        start = time.perf_counter()
+        while self.samples_written < total_samples:
+            chunk = generator.generate_buffers(
+                buffers_per_chunk, step_size, error_percentage
+            ).ravel()
+            self.write(chunk[: total_samples - self.samples_written])
+            logger.debug("Written %d of %d samples.", self.samples_written, total_samples)
+        elapsed = time.perf_counter() - start
+
+        return {
+            "samples": self.samples_written,
+            "seconds": elapsed,
+            "samples_per_sec": self.samples_written / elapsed if elapsed > 0 else float("inf"),
+        }
+
+
+class CsvDatasetWriter(DatasetWriter):
+    """This class writes the samples as a single column CSV file. The
+    values are written with enough digits to be read back exactly, 17 for
+    float64 and 9 for float32."""
+
+    def __init__(self, path: str, column: str = "sensor_data", dtype: Any = np.float64) -> None:
+        super().__init__(path, column, dtype)
+        # The significant digits that round trip a binary float.
+        digits = int(np.ceil((np.finfo(self.dtype).nmant + 1) * np.log10(2))) + 1
+        self._fmt = "%." + str(digits) + "g"
+        self._file = open(path, "w", encoding="utf-8")
+        self._file.write(column + "\n")
+
+    def write(self, chunk: np.ndarray) -> None:
+        np.savetxt(self._file, chunk.astype(self.dtype, copy=False), fmt=self._fmt)
+        self.samples_written += len(chunk)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class NpyDatasetWriter(DatasetWriter):
+    """This class writes the samples as a one dimensional NPY file. The
+    header is written first with the total length, then the chunks are
+    appended as raw bytes."""
+
+    def __init__(
+        self,
+        path: str,
+        total_samples: int,
+        column: str = "sensor_data",
+        dtype: Any = np.float64,
+    ) -> None:
+        super().__init__(path, column, dtype)
+        self._total_samples = total_samples
+        self._file = open(path, "wb")
+        np.lib.format.write_array_header_1_0(
+            self._file,
+            {
+                "descr": np.lib.format.dtype_to_descr(self.dtype),
+                "fortran_order": False,
+                "shape": (total_samples,),
+            },
+        )
+
+    def write(self, chunk: np.ndarray) -> None:
+        if self.samples_written + len(chunk) > self._total_samples:
+            raise ValueError("More samples are written than declared in the NPY header.")
+        self._file.write(np.ascontiguousarray(chunk, dtype=self.dtype).tobytes())
+        self.samples_written += len(chunk)
+
+    def close(self) -> None:
+        self._file.close()
+        if self.samples_written != self._total_samples:
+            logger.warning(
+                "%s declares %d samples but %d were written.",
+                self.path,
+                self._total_samples,
+                self.samples_written,
+            )
+
+
+class ParquetDatasetWriter(DatasetWriter):
+    """This class writes the samples to a Parquet file, one row group
+    per chunk. It requires the optional pyarrow package."""
+
+    def __init__(self, path: str, column: str = "sensor_data", dtype: Any = np.float64) -> None:
+        super().__init__(path, column, dtype)
+        try:
+            import pyarrow  # pylint: disable=import-outside-toplevel
+            import pyarrow.parquet  # pylint: disable=import-outside-toplevel
+        except ImportError as error:
+            raise ImportError(
+                "The parquet format requires pyarrow, install it with 'pip install pyarrow'."
+            ) from error
+
+        self._pyarrow = pyarrow
+        self._schema = pyarrow.schema([(column, pyarrow.from_numpy_dtype(self.dtype))])
+        self._writer: Optional[Any] = pyarrow.parquet.ParquetWriter(path, self._schema)
+
+    def write(self, chunk: np.ndarray) -> None:
+        table = self._pyarrow.Table.from_arrays(
+            [self._pyarrow.array(chunk.astype(self.dtype, copy=False))], schema=self._schema
+        )
+        self._writer.write_table(table)
+        self.samples_written += len(chunk)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
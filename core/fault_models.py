@@ -0,0 +1,268 @@
+"""
+This module is responsible for injecting sensor faults into the generated data.
+"""
+import logging
+from abc import ABC, abstractmethod
+from math import floor
+from typing import Any, Optional
+
+import numpy as np
+
+# Create a logger interface.
+logger = logging.getLogger(__name__)
+
+
+class FaultModel(ABC):
+    """Follow this interface to implement a fault model for DataGenerator.
+
+    A fault model is applied to a whole array at once and returns the
+    faulty array together with the mask of the samples it changed. Every
+    model has its own bit in the mask, so chained models can be told apart:
+
+        mask & GaussianNoise.FLAG
+    """
+
+    # The bit of the model in the fault mask.
+    FLAG: int = 0
+
+    @abstractmethod
+    def apply(self, y_values: np.ndarray, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+        """The interface function to inject the fault.
+
+        Parameters
+        ----------
+        y_values : np.ndarray
+            The y values, they are not modified.
+        rng : np.random.Generator
+            The random number generator.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            The faulty y values and the boolean mask of the faulty samples.
+        """
+
+    def get_state(self) -> Any:
+        """Return the internal state of a stateful model, so it can be
+        checkpointed. Stateless models return None."""
+        return None
+
+    def set_state(self, state: Any) -> None:
+        """Restore the internal state returned by `get_state`."""
+
+    @staticmethod
+    def create(spec: dict[str, Any]) -> "FaultModel":
+        """It creates a fault model from its description.
+
+        Parameters
+        ----------
+        spec : dict[str, Any]
+            The name of the model under "model", and its parameters,
+            e.g. {"model": "spikes", "rate": 0.01, "magnitude": 5.0}.
+
+        Returns
+        -------
+        FaultModel
+            The fault model.
+        """
+        parameters = dict(spec)
+        name = parameters.pop("model", None)
+        if name not in FAULT_MODELS:
+            raise ValueError(
+                f"Fault model {name} is not supported. "
+                f"Supported fault models are {list(FAULT_MODELS)}"
+            )
+        return FAULT_MODELS[name](**parameters)
+
+
+class PercentageError(FaultModel):
+    """This class multiplies every sample by a random integer percentage
+    with a random sign. It is the error of `error_percentage`."""
+
+    FLAG = 1 << 0
+
+    def __init__(self, percentage: float) -> None:
+        self._percentage = percentage
+
+    def apply(self, y_values: np.ndarray, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+        error_multipliers = rng.integers(
+            0, floor(self._percentage), size=y_values.shape, endpoint=True
+        )
+        sign_multipliers = 1 - 2 * rng.integers(0, 2, size=y_values.shape)
+        faulty = y_values + sign_multipliers * (y_values * (error_multipliers / 100))
+        return faulty, error_multipliers != 0
+
+
+class GaussianNoise(FaultModel):
+    """This class adds zero mean normally distributed noise to every sample."""
+
+    FLAG = 1 << 1
+
+    def __init__(self, std: float) -> None:
+        self._std = std
+
+    def apply(self, y_values: np.ndarray, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+        faulty = y_values + rng.normal(0.0, self._std, size=y_values.shape)
+        return faulty, np.full(y_values.shape, self._std > 0)
+
+
+class Spikes(FaultModel):
+    """This class adds outliers of a given magnitude with a random sign
+    to a ratio of the samples."""
+
+    FLAG = 1 << 2
+
+    def __init__(self, rate: float, magnitude: float) -> None:
+        self._rate = rate
+        self._magnitude = magnitude
+
+    def apply(self, y_values: np.ndarray, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+        mask = rng.random(y_values.shape) < self._rate
+        signs = 1 - 2 * rng.integers(0, 2, size=y_values.shape)
+        return np.where(mask, y_values + signs * self._magnitude, y_values), mask
+
+
+class StuckAt(FaultModel):
+    """This class freezes the sensor for a number of samples. A fault
+    starts at a ratio of the samples and keeps the last good value, or
+    the given value, until it ends. A fault may continue in the next array.
+    """
+
+    FLAG = 1 << 3
+
+    def __init__(self, rate: float, duration: int, value: Optional[float] = None) -> None:
+        self._rate = rate
+        self._duration = duration
+        self._value = value
+
+        # The value and the remaining samples of a fault that started in a previous array.
+        self._stuck_value = 0.0
+        self._remaining = 0
+
+    def get_state(self) -> list[float]:
+        return [float(self._stuck_value), int(self._remaining)]
+
+    def set_state(self, state: list[float]) -> None:
+        self._stuck_value, self._remaining = state[0], int(state[1])
+
+    def apply(self, y_values: np.ndarray, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+        flat = y_values.ravel()
+        faulty = flat.copy()
+        mask = np.zeros(flat.shape, dtype=bool)
+
+        # Continue the fault of the previous array.
+        index = min(self._remaining, len(flat))
+        faulty[:index] = self._stuck_value
+        mask[:index] = True
+        self._remaining -= index
+
+        # The loop runs once per fault, not per sample.
+        for start in np.flatnonzero(rng.random(flat.shape) < self._rate):
+            if start < index:
+                # The sensor is already stuck.
+                continue
+            if self._value is not None:
+                value = self._value
+            else:
+                value = faulty[start - 1] if start > 0 else flat[0]
+            end = min(start + self._duration, len(flat))
+            faulty[start:end] = value
+            mask[start:end] = True
+            self._stuck_value = value
+            self._remaining = start + self._duration - end
+            index = end
+
+        return faulty.reshape(y_values.shape), mask.reshape(y_values.shape)
+
+
+class Dropout(FaultModel):
+    """This class replaces a ratio of the samples with NaN, as missing samples."""
+
+    FLAG = 1 << 4
+
+    def __init__(self, rate: float) -> None:
+        self._rate = rate
+
+    def apply(self, y_values: np.ndarray, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+        mask = rng.random(y_values.shape) < self._rate
+        return np.where(mask, np.nan, y_values), mask
+
+
+class BiasDrift(FaultModel):
+    """This class adds a bias that grows by `rate` every sample, starting
+    after `start` samples. The bias keeps growing across arrays."""
+
+    FLAG = 1 << 5
+
+    def __init__(self, rate: float, start: int = 0) -> None:
+        self._rate = rate
+        self._start = start
+        self._samples_seen = 0
+
+    def get_state(self) -> int:
+        return self._samples_seen
+
+    def set_state(self, state: int) -> None:
+        self._samples_seen = state
+
+    def apply(self, y_values: np.ndarray, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+        positions = self._samples_seen + np.arange(y_values.size) - self._start + 1
+        self._samples_seen += y_values.size
+
+        drifting = positions > 0
+        bias = np.where(drifting, positions * self._rate, 0.0).reshape(y_values.shape)
+        return y_values + bias, drifting.reshape(y_values.shape)
+
+
+class FaultChain:
+    """This class applies several fault models one after the other and
+    combines their masks into one integer mask of model flags."""
+
+    def __init__(self, models: list[FaultModel]) -> None:
+        self.models = models
+
+    @staticmethod
+    def create(specs: list[dict[str, Any]]) -> "FaultChain":
+        """It creates a fault chain from a list of model descriptions."""
+        return FaultChain([FaultModel.create(spec) for spec in specs])
+
+    def get_state(self) -> list[Any]:
+        """It returns the states of all the models."""
+        return [model.get_state() for model in self.models]
+
+    def set_state(self, state: list[Any]) -> None:
+        """It restores the states returned by `get_state`."""
+        for model, model_state in zip(self.models, state):
+            model.set_state(model_state)
+
+    def apply(self, y_values: np.ndarray, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+        """It applies all the models in order.
+
+        Parameters
+        ----------
+        y_values : np.ndarray
+            The y values.
+        rng : np.random.Generator
+            The random number generator.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            The faulty y values and the uint8 mask of the model flags of every sample.
+        """
+        fault_mask = np.zeros(y_values.shape, dtype=np.uint8)
+        for model in self.models:
+            y_values, mask = model.apply(y_values, rng)
+            fault_mask[mask] |= model.FLAG
+        return y_values, fault_mask
+
+
+# The fault models by name, used by FaultModel.create.
+FAULT_MODELS: dict[str, type] = {
+    "percentage": PercentageError,
+    "gaussian": GaussianNoise,
+    "spikes": Spikes,
+    "stuck_at": StuckAt,
+    "dropout": Dropout,
+    "bias_drift": BiasDrift,
+}
@@ -0,0 +1,306 @@
+"""
+This module is responsible for sharding a fleet of devices across worker processes.
+"""
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import Any, Optional
+
+from .fleet_engine import FleetEngine
+from .fleet_simulator import FleetSimulator, FleetStats
+from .fleet_store import FleetStore
+from .metrics import Metrics
+from .payload_encoder import PayloadEncoder
+from .rate_controller import RateController
+from .send_queue import SendQueue
+from .telemetry_batcher import TelemetryBatcher
+from .thingsboard_connector import ThingsboardConnector
+from .token_store import TokenStore
+from .trace import TraceWriter
+
+# Create a logger interface.
+logger = logging.getLogger(__name__)
+
+
+class FleetPool:
+    """This class is responsible for running a fleet on several worker processes.
+
+    The devices are split into contiguous slices of MAC addresses. Every worker
+    process builds only its own slice with the matching tokens, and runs it on
+    its own event loop and connector. The stats of the workers are aggregated
+    back in the parent process.
+
+    With "engine": "store" in the spec, every worker holds its slice in a
+    `FleetStore` and sends it with a `FleetEngine` instead of building a
+    `FleetMember` per device. It needs deterministic functions and does
+    not support rate pacing or checkpoints.
+    """
+
+    ENGINES = ("members", "store")
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        spec: dict[str, Any],
+        device_count: int,
+        workers: Optional[int] = None,
+        concurrency: int = 100,
+        seed: Optional[int] = None,
+        token_store_path: Optional[str] = None,
+        checkpoint_path: Optional[str] = None,
+        checkpoint_interval: float = 60.0,
+        metrics_port: Optional[int] = None,
+        metrics_interval: float = 60.0,
+        record_path: Optional[str] = None,
+    ) -> None:
+        """Initialize the class.
+
+        Parameters
+        ----------
+        hostname : str
+            The host of the platform.
+        port : int
+            The port of the platform.
+        spec : dict[str, Any]
+            The fleet spec, see `FleetSimulator.load_spec`.
+        device_count : int
+            The number of devices in the whole fleet.
+        workers : Optional[int], optional
+            The number of worker processes, by default the number of CPUs.
+        concurrency : int, optional
+            The concurrency cap of each worker, by default 100.
+        seed : Optional[int], optional
+            The seed of the fleet, the seeds of the sensors and schedulers
+            are derived from it, by default None.
+        token_store_path : Optional[str], optional
+            The path of the token store shared by the workers, by default None.
+        checkpoint_path : Optional[str], optional
+            The prefix of the checkpoint files, one per worker. The fleet resumes
+            from them if they exist, by default None.
+        checkpoint_interval : float, optional
+            The time between two checkpoints in seconds, by default 60.0.
+        metrics_port : Optional[int], optional
+            The first port of the local metrics endpoints, one per worker
+            on consecutive ports, by default None.
+        metrics_interval : float, optional
+            The time between two metrics summaries in the logs of every
+            worker in seconds, 0 disables them, by default 60.0.
+        record_path : Optional[str], optional
+            The prefix of the request traces, one per worker, appended to
+            if they exist, see `TraceReplayer`, by default None.
+        """
+        engine = spec.get("engine", "members")
+        if engine not in self.ENGINES:
+            raise ValueError(
+                f"Fleet engine {engine} is not supported. "
+                f"Supported engines are {list(self.ENGINES)}"
+            )
+        if engine == "store" and (spec.get("rate") or checkpoint_path is not None):
+            raise ValueError("The store engine does not support rate pacing or checkpoints.")
+        encoding = spec.get("encoding") or "json"
+        encoding = encoding if isinstance(encoding, str) else encoding.get("format")
+        if encoding == "packed" and spec.get("batch_size", 1) > 1:
+            raise ValueError("The packed encoding does not support batching.")
+
+        self._hostname = hostname
+        self._port = port
+        self._spec = spec
+        self._device_count = device_count
+        self._workers = max(1, min(workers or os.cpu_count() or 1, device_count))
+        self._concurrency = concurrency
+        self._seed = seed
+        self._token_store_path = token_store_path
+        self._checkpoint_path = checkpoint_path
+        self._checkpoint_interval = checkpoint_interval
+        self._metrics_port = metrics_port
+        self._metrics_interval = metrics_interval
+        self._record_path = record_path
+
+        self.worker_stats: list[FleetStats] = []
+
+    @staticmethod
+    def shard(device_count: int, workers: int) -> list[tuple[int, int]]:
+        """It splits the devices into contiguous slices of nearly equal size.
+
+        Parameters
+        ----------
+        device_count : int
+            The number of devices.
+        workers : int
+            The number of slices.
+
+        Returns
+        -------
+        list[tuple[int, int]]
+            The index of the first device and the device count of each slice.
+        """
+        size, remainder = divmod(device_count, workers)
+        slices = []
+        first_index = 0
+        for worker in range(workers):
+            count = size + (1 if worker < remainder else 0)
+            slices.append((first_index, count))
+            first_index += count
+        return slices
+
+    def run(self, duration: Optional[float] = None) -> FleetStats:
+        """It runs the fleet on the worker processes and aggregates their stats.
+
+        Parameters
+        ----------
+        duration : Optional[float], optional
+            The duration of the run in seconds, by default None.
+
+        Returns
+        -------
+        FleetStats
+            The aggregated counters of all the workers.
+        """
+        shards = [
+            (
+                self._hostname,
+                self._port,
+                self._shard_spec(first_index, count),
+                first_index,
+                count,
+                self._concurrency,
+                duration,
+                self._seed,
+                self._token_store_path,
+                None if self._checkpoint_path is None else f"{self._checkpoint_path}.{worker}",
+                self._checkpoint_interval,
+                None if self._metrics_port is None else self._metrics_port + worker,
+                self._metrics_interval,
+                None if self._record_path is None else f"{self._record_path}.{worker}",
+            )
+            for worker, (first_index, count) in enumerate(
+                self.shard(self._device_count, self._workers)
+            )
+        ]
+
+        if self._workers == 1:
+            results = [FleetPool._run_shard(*shards[0])]
+        else:
+            with ProcessPoolExecutor(max_workers=self._workers) as executor:
+                results = list(executor.map(FleetPool._run_shard, *zip(*shards)))
+
+        self.worker_stats = [FleetStats(**result) for result in results]
+        total = FleetStats()
+        for worker, stats in enumerate(self.worker_stats):
+            logger.info("Worker %d finished: %s", worker, stats.to_dict())
+            total.merge(stats)
+
+        if self._spec.get("rate"):
+            unit = self._spec["rate"].get("unit", "messages")
+            logger.info("Fleet rate in %s per second: %s", unit, total.rates(unit))
+        return total
+
+    def _shard_spec(self, first_index: int, count: int) -> dict[str, Any]:
+        """It returns a copy of the spec with only the tokens of a slice,
+        and the share of the slice in the target rate."""
+        tokens = self._spec.get("tokens", {})
+        prefix = self._spec.get("mac_prefix", "02:00:00")
+
+        spec = dict(self._spec)
+        spec["tokens"] = {}
+        for index in range(first_index, first_index + count):
+            mac_address = FleetSimulator.mac_address(prefix, index)
+            if mac_address in tokens:
+                spec["tokens"][mac_address] = tokens[mac_address]
+
+        if spec.get("rate"):
+            spec["rate"] = dict(spec["rate"], share=count / self._device_count)
+        return spec
+
+    @staticmethod
+    def _run_shard(
+        hostname: str,
+        port: int,
+        spec: dict[str, Any],
+        first_index: int,
+        count: int,
+        concurrency: int,
+        duration: Optional[float],
+        seed: Optional[int],
+        token_store_path: Optional[str],
+        checkpoint_path: Optional[str],
+        checkpoint_interval: float,
+        metrics_port: Optional[int],
+        metrics_interval: float,
+        record_path: Optional[str],
+    ) -> dict[str, int]:
+        """It runs a slice of the fleet on a new event loop. This is
+        the entry point of the worker processes."""
+
+        async def monitor() -> FleetStats:
+            metrics = Metrics.default()
+            server = await metrics.serve(port=metrics_port) if metrics_port else None
+            summary = None
+            if metrics_interval > 0:
+                summary = asyncio.get_running_loop().create_task(
+                    metrics.log_periodically(metrics_interval)
+                )
+            try:
+                return await simulate()
+            finally:
+                if summary is not None:
+                    summary.cancel()
+                if server is not None:
+                    server.close()
+                    await server.wait_closed()
+                logger.info("Metrics: %s", metrics.summary())
+
+        async def simulate() -> FleetStats:
+            token_store = TokenStore(token_store_path) if token_store_path else None
+            encoder = PayloadEncoder.create(spec["encoding"]) if spec.get("encoding") else None
+            recorder = TraceWriter(record_path) if record_path is not None else None
+            with recorder or nullcontext():
+                async with ThingsboardConnector(
+                    hostname,
+                    port,
+                    max_in_flight=concurrency,
+                    retries=spec.get("retries", 0),
+                    encoder=encoder,
+                    recorder=recorder,
+                ) as connector:
+                    queue = None
+                    if spec.get("queue"):
+                        queue = SendQueue(
+                            connector,
+                            spec["queue"].get("size", 1000),
+                            spec["queue"].get("policy", "block"),
+                        )
+                    batcher = None
+                    if spec.get("batch_size", 1) > 1:
+                        batcher = TelemetryBatcher(
+                            queue or connector, spec["batch_size"], spec.get("batch_delay", 5.0)
+                        )
+                    if spec.get("engine") == "store":
+                        store = FleetStore(spec, count, first_index, seed)
+                        await store.register(connector, concurrency, token_store)
+                        engine = FleetEngine(
+                            connector, store, concurrency, batcher=batcher, queue=queue
+                        )
+                        return await engine.run(duration)
+
+                    members = FleetSimulator.build_members(spec, count, first_index, seed)
+                    rate = RateController.create(spec["rate"]) if spec.get("rate") else None
+                    simulator = FleetSimulator(
+                        connector,
+                        members,
+                        concurrency,
+                        None if seed is None else seed + first_index,
+                        batcher,
+                        rate,
+                        queue,
+                    )
+                    if checkpoint_path is not None:
+                        # The workers may have owned other slices in the previous run.
+                        simulator.load_checkpoint(checkpoint_path.rsplit(".", 1)[0] + ".*")
+                    await simulator.register(token_store)
+                    return await simulator.run(duration, checkpoint_path, checkpoint_interval)
+
+        return asyncio.run(monitor()).to_dict()
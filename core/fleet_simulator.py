@@ -0,0 +1,565 @@
+"""
+This module is responsible for simulating a fleet of devices on a single event loop.
+"""
+import asyncio
+import glob
+import heapq
+import json
+import logging
+import os
+import random
+import time
+from typing import Any, Optional
+
+import numpy as np
+
+from .abstractions import Device
+from .data_generator import DataGenerator
+from .metrics import Metrics
+from .rate_controller import RateController
+from .segment_cache import SegmentCache
+from .send_queue import SendQueue
+from .telemetry_batcher import TelemetryBatcher
+from .thingsboard_connector import ThingsboardConnector
+from .token_store import TokenStore
+
+# Create a logger interface.
+logger = logging.getLogger(__name__)
+
+
+class FleetStats:
+    """This class holds the counters of a fleet run. The target is the
+    count the rate controller aimed for, in its unit, 0 without one. The
+    packets are counted as sent once the connector delivered them: with
+    a batcher or a send queue, when their batch or message is sent, at the
+    latest when the batcher and queue are closed. The packets the queue
+    drops are counted in dropped, not in failed."""
+
+    def __init__(
+        self,
+        sent: int = 0,
+        failed: int = 0,
+        samples: int = 0,
+        elapsed: float = 0.0,
+        target: float = 0.0,
+        dropped: int = 0,
+    ) -> None:
+        self.sent = sent
+        self.failed = failed
+        self.samples = samples
+        self.elapsed = elapsed
+        self.target = target
+        self.dropped = dropped
+
+    def merge(self, other: "FleetStats") -> None:
+        """It adds the counters of another stats object to this one. The
+        runs are concurrent, so the elapsed time is the longest one."""
+        self.sent += other.sent
+        self.failed += other.failed
+        self.samples += other.samples
+        self.elapsed = max(self.elapsed, other.elapsed)
+        self.target += other.target
+        self.dropped += other.dropped
+
+    def rates(self, unit: str = "messages") -> dict[str, float]:
+        """It returns the achieved and target rates per second in a unit of `RateController`."""
+        achieved = self.sent if unit == "messages" else self.samples
+        if self.elapsed <= 0:
+            return {"achieved_per_sec": 0.0, "target_per_sec": 0.0}
+        return {
+            "achieved_per_sec": achieved / self.elapsed,
+            "target_per_sec": self.target / self.elapsed,
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        """It returns a dictionary with the counters."""
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "samples": self.samples,
+            "elapsed": self.elapsed,
+            "target": self.target,
+            "dropped": self.dropped,
+        }
+
+
+class FleetMember:
+    """This class represents a simulated device with its sensors and timing."""
+
+    def __init__(
+        self,
+        device: Device,
+        sensors: list[dict[str, Any]],
+        interval: float,
+        jitter: float = 0.0,
+    ) -> None:
+        """Initialize the class.
+
+        Parameters
+        ----------
+        device : Device
+            The simulated device.
+        sensors : list[dict[str, Any]]
+            The sensors of the device. Each item has the keys "name",
+            "generator", "step_size" and "error_percentage".
+        interval : float
+            The mean time between two packets in seconds.
+        jitter : float, optional
+            The maximum deviation from the interval in seconds, by default 0.0.
+        """
+        self.device = device
+        self.sensors = sensors
+        self.interval = interval
+        self.jitter = jitter
+
+    @property
+    def samples_per_packet(self) -> int:
+        """The number of samples in every packet of the device."""
+        return sum(sensor["generator"].buffer_size for sensor in self.sensors)
+
+    def next_delay(self, rng: random.Random) -> float:
+        """It returns the time to wait until the next packet."""
+        return max(0.0, self.interval + rng.uniform(-self.jitter, self.jitter))
+
+    def next_packet(self, as_array: bool = False) -> dict[str, list[float] | np.ndarray]:
+        """It generates the next telemetry packet of the device. The
+        payload encoders accept the arrays, and skip the list conversion."""
+        args: list = []
+        for sensor in self.sensors:
+            args.append(sensor["name"])
+            args.append(
+                sensor["generator"].generate(
+                    sensor["step_size"], sensor["error_percentage"], as_array=as_array
+                )
+            )
+        return self.device.get_formatted_data(*args)
+
+
+class FleetSimulator:
+    """This class is responsible for simulating many devices sharing
+    a single connector on one event loop.
+
+    The send times of all the devices are kept in a heap, so the scheduler
+    only wakes up when the earliest device is due. With a rate controller,
+    the devices send in a shuffled round robin instead, as fast as the
+    controller allows, so the aggregate rate follows its profile. The number
+    of requests waiting for a response is bounded by the concurrency cap.
+    When a batcher is given, the packets are coalesced by it instead of being
+    sent one by one. When a send queue is given, the packets or batches are
+    queued in front of the connector. The generation time of every packet
+    is recorded in `metrics`.
+    """
+
+    def __init__(
+        self,
+        connector: ThingsboardConnector,
+        members: list[FleetMember],
+        concurrency: int = 100,
+        seed: Optional[int] = None,
+        batcher: Optional[TelemetryBatcher] = None,
+        rate: Optional[RateController] = None,
+        queue: Optional[SendQueue] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError("The concurrency must be at least 1.")
+
+        self._connector = connector
+        self.members = members
+        self._concurrency = concurrency
+        self._rng = random.Random(seed)
+        self._batcher = batcher
+        self._rate = rate
+        self._queue = queue
+        self._metrics = metrics or Metrics.default()
+        self.stats = FleetStats()
+
+    @staticmethod
+    def load_spec(path: str) -> dict[str, Any]:
+        """It reads a fleet spec file.
+
+        Parameters
+        ----------
+        path : str
+            The path of the JSON fleet spec file.
+
+        Returns
+        -------
+        dict[str, Any]
+            The fleet spec.
+            - mac_prefix : str
+                The first three bytes of the generated MAC addresses.
+            - firmware : str
+                The firmware version of the devices.
+            - interval : float
+                The mean time between two packets in seconds.
+            - jitter : float
+                The maximum deviation from the interval in seconds.
+            - sensors : list[dict]
+                The sensors of each device with the keys "name", "function_type",
+                "parameters", "buffer_size", "step_size", "error_percentage" and
+                "faults", see `FaultModel.create`.
+            - batch_size : int
+                The number of packets sent in a single request, 1 disables batching.
+            - batch_delay : float
+                The maximum time a packet waits for its batch in seconds.
+            - tokens : dict[str, str]
+                The tokens of the already registered devices by MAC address.
+            - rate : dict
+                The target aggregate rate of the fleet, see `RateController.create`.
+                The devices ignore their interval when it is given.
+            - encoding : str | dict
+                The encoding of the telemetry, see `PayloadEncoder.create`.
+            - retries : int
+                The number of retries of a request that timed out.
+            - queue : dict
+                The "size" and "policy" of the send queue, see `SendQueue`.
+            - cache_mb : float
+                The memory cap of the segments shared by the identical sensors
+                of a worker in MiB, 0 disables the cache.
+            - engine : str
+                "members" for a `FleetMember` per device, or "store" for the
+                vectorized `FleetEngine`, see `FleetPool`.
+        """
+        with open(path, "r", encoding="utf-8") as spec_file:
+            spec = json.load(spec_file)
+
+        if not spec.get("sensors"):
+            raise ValueError(f"The fleet spec {path} does not define any sensor.")
+
+        return spec
+
+    @staticmethod
+    def mac_address(prefix: str, index: int) -> str:
+        """It returns the MAC address of the device with the given index."""
+        return "%s:%02X:%02X:%02X" % (
+            prefix,
+            (index >> 16) & 0xFF,
+            (index >> 8) & 0xFF,
+            index & 0xFF,
+        )
+
+    @staticmethod
+    def build_members(
+        spec: dict[str, Any],
+        device_count: int,
+        first_index: int = 0,
+        seed: Optional[int] = None,
+    ) -> list[FleetMember]:
+        """It creates the fleet members described by a fleet spec.
+
+        Parameters
+        ----------
+        spec : dict[str, Any]
+            The fleet spec, see `load_spec`.
+        device_count : int
+            The number of devices to create.
+        first_index : int, optional
+            The index of the first device, by default 0.
+        seed : Optional[int], optional
+            The seed of the fleet. The seed of every sensor is derived from it
+            and the MAC address of its device, by default None.
+
+        Returns
+        -------
+        list[FleetMember]
+            The fleet members.
+        """
+        prefix = spec.get("mac_prefix", "02:00:00")
+        tokens = spec.get("tokens", {})
+        cache = None
+        if spec.get("cache_mb", 0) > 0:
+            cache = SegmentCache(int(spec["cache_mb"] * 1024 * 1024))
+
+        members = []
+        for index in range(first_index, first_index + device_count):
+            device = Device(
+                FleetSimulator.mac_address(prefix, index), spec.get("firmware", "0.0.1")
+            )
+            if device.mac_address in tokens:
+                device.set_token(tokens[device.mac_address])
+            elif spec.get("provision_key") and spec.get("provision_secret"):
+                device.set_provision_key(spec["provision_key"])
+                device.set_provision_secret(spec["provision_secret"])
+
+            sensors = [
+                {
+                    "name": sensor["name"],
+                    "generator": DataGenerator(
+                        sensor.get("buffer_size", 5),
+                        sensor["function_type"],
+                        sensor.get("parameters", {}),
+                        seed=None
+                        if seed is None
+                        else DataGenerator.derive_seed(seed, device.mac_address, sensor["name"]),
+                        faults=sensor.get("faults"),
+                        cache=cache,
+                    ),
+                    "step_size": sensor.get("step_size", 0.01),
+                    "error_percentage": sensor.get("error_percentage", 0),
+                }
+                for sensor in spec["sensors"]
+            ]
+            members.append(
+                FleetMember(
+                    device, sensors, spec.get("interval", 30.0), spec.get("jitter", 0.0)
+                )
+            )
+        return members
+
+    async def register(self, token_store: Optional[TokenStore] = None) -> int:
+        """It registers the fleet members without a token, at most
+        `concurrency` of them at the same time.
+
+        Parameters
+        ----------
+        token_store : Optional[TokenStore], optional
+            The store to read known tokens from and save new tokens to, by default None.
+
+        Returns
+        -------
+        int
+            The number of members newly registered.
+        """
+        return await self._connector.provision_devices_async(
+            [member.device for member in self.members], self._concurrency, token_store
+        )
+
+    def checkpoint(self) -> dict[str, Any]:
+        """It returns the state of the generators of all the members.
+
+        Returns
+        -------
+        dict[str, Any]
+            The checkpoints of the generators by MAC address and sensor name.
+        """
+        return {
+            "version": 1,
+            "members": {
+                member.device.mac_address: {
+                    sensor["name"]: sensor["generator"].checkpoint() for sensor in member.sensors
+                }
+                for member in self.members
+            },
+        }
+
+    def restore(self, state: dict[str, Any]) -> int:
+        """It continues the generators of the members found in a checkpoint.
+
+        Parameters
+        ----------
+        state : dict[str, Any]
+            A state returned by `checkpoint`.
+
+        Returns
+        -------
+        int
+            The number of members restored.
+        """
+        restored = 0
+        for member in self.members:
+            member_state = state["members"].get(member.device.mac_address)
+            if member_state is None:
+                continue
+            for sensor in member.sensors:
+                if sensor["name"] in member_state:
+                    sensor["generator"].restore(member_state[sensor["name"]])
+            restored += 1
+        return restored
+
+    def save_checkpoint(self, path: str) -> None:
+        """It writes the checkpoint of the fleet to a file. The file is
+        replaced atomically, so a crash never leaves a partial checkpoint."""
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as checkpoint_file:
+            json.dump(self.checkpoint(), checkpoint_file, separators=(",", ":"))
+        os.replace(temporary_path, path)
+
+    def load_checkpoint(self, pattern: str) -> int:
+        """It restores the members from the checkpoint files matching a pattern.
+
+        Parameters
+        ----------
+        pattern : str
+            The path or glob pattern of the checkpoint files.
+
+        Returns
+        -------
+        int
+            The number of members restored.
+        """
+        restored = 0
+        for path in sorted(glob.glob(pattern)):
+            if path.endswith(".tmp"):
+                continue
+            with open(path, "r", encoding="utf-8") as checkpoint_file:
+                restored += self.restore(json.load(checkpoint_file))
+        logger.info("Restored %d of %d members from %s.", restored, len(self.members), pattern)
+        return restored
+
+    async def run(
+        self,
+        duration: Optional[float] = None,
+        checkpoint_path: Optional[str] = None,
+        checkpoint_interval: float = 60.0,
+    ) -> FleetStats:
+        """It sends the telemetry of all the registered members until
+        the duration elapses or the rate profile ends, or forever if
+        neither has an end.
+
+        Parameters
+        ----------
+        duration : Optional[float], optional
+            The duration of the run in seconds, by default None.
+        checkpoint_path : Optional[str], optional
+            The file the fleet is checkpointed to periodically and on exit, by default None.
+        checkpoint_interval : float, optional
+            The time between two checkpoints in seconds, by default 60.0.
+
+        Returns
+        -------
+        FleetStats
+            The counters of the run.
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        end = None if duration is None else start + duration
+
+        semaphore = asyncio.Semaphore(self._concurrency)
+        pending: set[asyncio.Task] = set()
+        checkpointer = None
+        if checkpoint_path is not None:
+            checkpointer = loop.create_task(
+                self._checkpoint_periodically(checkpoint_path, checkpoint_interval)
+            )
+        try:
+            if self._rate is None:
+                await self._run_scheduled(start, end, semaphore, pending)
+                if end is not None and end > loop.time():
+                    await asyncio.sleep(end - loop.time())
+            else:
+                await self._run_paced(end, semaphore, pending)
+        finally:
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            if self._batcher is not None:
+                await self._batcher.close()
+                self.stats.failed += self._batcher.failed
+                # Behind a queue, the batches are only delivered by the queue.
+                if self._queue is None:
+                    self.stats.sent += self._batcher.sent
+                    self.stats.samples += self._batcher.values
+            if self._queue is not None:
+                await self._queue.close()
+                self.stats.sent += self._queue.sent_packets
+                self.stats.samples += self._queue.sent_values
+                self.stats.failed += self._queue.failed_packets
+                self.stats.dropped += self._queue.dropped_packets
+            if checkpointer is not None:
+                checkpointer.cancel()
+                self.save_checkpoint(checkpoint_path)
+
+            self.stats.elapsed = loop.time() - start
+            if self._rate is not None:
+                self.stats.target = self._rate.target()
+                report = self.stats.rates(self._rate.unit)
+                logger.info(
+                    "Achieved %.1f of the target %.1f %s per second.",
+                    report["achieved_per_sec"],
+                    report["target_per_sec"],
+                    self._rate.unit,
+                )
+
+        return self.stats
+
+    async def _run_scheduled(
+        self,
+        start: float,
+        end: Optional[float],
+        semaphore: asyncio.Semaphore,
+        pending: set[asyncio.Task],
+    ) -> None:
+        """It sends the packets of every member at its own interval."""
+        loop = asyncio.get_running_loop()
+
+        # Spread the first packets of the devices over one interval.
+        schedule = [
+            (start + self._rng.uniform(0, member.interval), index)
+            for index, member in enumerate(self.members)
+            if member.device.is_registered
+        ]
+        heapq.heapify(schedule)
+
+        while schedule:
+            due, index = schedule[0]
+            if end is not None and due > end:
+                break
+
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            member = self.members[index]
+            heapq.heapreplace(schedule, (due + member.next_delay(self._rng), index))
+            await self._start_send(member, semaphore, pending)
+
+    async def _run_paced(
+        self,
+        end: Optional[float],
+        semaphore: asyncio.Semaphore,
+        pending: set[asyncio.Task],
+    ) -> None:
+        """It sends the packets of the members in a round robin, shuffled
+        every round, at the rate allowed by the rate controller."""
+        loop = asyncio.get_running_loop()
+        order = [member for member in self.members if member.device.is_registered]
+
+        while order:
+            self._rng.shuffle(order)
+            for member in order:
+                cost = 1 if self._rate.unit == "messages" else member.samples_per_packet
+                if not await self._rate.acquire(cost):
+                    return
+                if end is not None and loop.time() > end:
+                    return
+                await self._start_send(member, semaphore, pending)
+
+    async def _start_send(
+        self, member: FleetMember, semaphore: asyncio.Semaphore, pending: set[asyncio.Task]
+    ) -> None:
+        """It waits for a free slot and starts sending the next packet of a member."""
+        await semaphore.acquire()
+        task = asyncio.get_running_loop().create_task(self._send(member, semaphore))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    async def _checkpoint_periodically(self, path: str, interval: float) -> None:
+        """It saves the checkpoint of the fleet every interval."""
+        while True:
+            await asyncio.sleep(interval)
+            self.save_checkpoint(path)
+
+    async def _send(self, member: FleetMember, semaphore: asyncio.Semaphore) -> None:
+        """It sends the next packet of a member and releases the slot."""
+        try:
+            started = time.perf_counter()
+            packet = member.next_packet(as_array=True)
+            self._metrics.observe(
+                "generate_seconds", time.perf_counter() - started, engine="members"
+            )
+            if self._batcher is not None:
+                # The batcher counts the packets once their batch is sent.
+                await self._batcher.add(member.device.get_token(), packet)
+                return
+            if self._queue is not None:
+                # The queue counts the packets once they are sent.
+                await self._queue.send_telemetry_data_async(member.device.get_token(), packet)
+                return
+            await self._connector.send_telemetry_data_async(member.device.get_token(), packet)
+            self.stats.sent += 1
+            self.stats.samples += sum(len(values) for values in packet.values())
+        except Exception as error:  # pylint: disable=broad-except
+            self.stats.failed += 1
+            logger.debug("Failed to send telemetry of %s: %s", member.device.mac_address, error)
+        finally:
+            semaphore.release()
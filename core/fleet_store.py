@@ -0,0 +1,326 @@
+"""
+This module is responsible for holding the state of a large fleet in compact arrays.
+"""
+import logging
+import sys
+import zlib
+from typing import Any, Optional
+
+import numpy as np
+
+from .abstractions import Device
+from .fault_models import FaultChain, PercentageError
+from .fleet_simulator import FleetSimulator
+from .functions import FunctionRegistry
+from .thingsboard_connector import ThingsboardConnector
+from .token_store import TokenStore
+
+# Create a logger interface.
+logger = logging.getLogger(__name__)
+
+
+class SensorColumns:
+    """This class holds one sensor of every device of a fleet store: the
+    shared function type and settings, and the per-device data indices
+    and spread parameters as arrays."""
+
+    __slots__ = (
+        "name",
+        "function_type",
+        "buffer_size",
+        "step_size",
+        "error_percentage",
+        "data_index",
+        "parameters",
+        "faults",
+        "_function",
+    )
+
+    def __init__(self, sensor: dict[str, Any], indices: np.ndarray, seed: int) -> None:
+        """Initialize the class.
+
+        Parameters
+        ----------
+        sensor : dict[str, Any]
+            The sensor of the fleet spec, see `FleetSimulator.load_spec`.
+        indices : np.ndarray
+            The indices of the devices in the fleet.
+        seed : int
+            The seed of the fleet, the parameter spread of every device is
+            derived from it and the device index, see `FleetStore.device_uniforms`.
+        """
+        device_count = len(indices)
+        self.name = sensor["name"]
+        self.function_type = sensor["function_type"]
+        self.buffer_size = sensor.get("buffer_size", 5)
+        self.step_size = sensor.get("step_size", 0.01)
+        self.error_percentage = sensor.get("error_percentage", 0)
+        self.data_index = np.zeros(device_count, dtype=np.float64)
+
+        # The parameters with a spread get one value per device, the
+        # others are shared scalars.
+        self.parameters: dict[str, Any] = dict(sensor.get("parameters", {}))
+        for name, spread in sensor.get("parameter_spread", {}).items():
+            if not isinstance(self.parameters.get(name), (int, float)):
+                raise ValueError(f"Only numeric parameters can spread, {name} is not one.")
+            uniforms = FleetStore.device_uniforms(seed, indices, self.name, name)
+            self.parameters[name] = self.parameters[name] * (1 + spread * (2 * uniforms - 1))
+
+        # The function of the shared parameters is created only once.
+        self._function = FunctionRegistry.create(self.function_type, self._row_parameters(None))
+        if not self._function.deterministic:
+            raise ValueError(
+                f"Sensor {self.name} depends on more than x, a fleet store needs "
+                "deterministic functions. Use FleetSimulator members instead."
+            )
+        if self.spreads:
+            self._function = None
+
+        self.faults = FaultChain.create(sensor.get("faults", []))
+        if any(model.get_state() is not None for model in self.faults.models):
+            raise ValueError(
+                f"Sensor {self.name} has a stateful fault model, a fleet store only "
+                "supports the stateless ones."
+            )
+
+    @property
+    def spreads(self) -> bool:
+        """Whether any parameter has one value per device."""
+        return any(isinstance(value, np.ndarray) for value in self.parameters.values())
+
+    @property
+    def nbytes(self) -> int:
+        """The bytes of the per-device arrays."""
+        return self.data_index.nbytes + sum(
+            value.nbytes for value in self.parameters.values() if isinstance(value, np.ndarray)
+        )
+
+    def generate(self, rows: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """It generates the next buffer of the given devices in one pass,
+        and advances their data indices.
+
+        Parameters
+        ----------
+        rows : np.ndarray
+            The rows of the devices in the store.
+        rng : np.random.Generator
+            The random number generator of the error injection.
+
+        Returns
+        -------
+        np.ndarray
+            The buffers, one row per device.
+        """
+        function = self._function
+        if function is None:
+            function = FunctionRegistry.create(self.function_type, self._row_parameters(rows))
+
+        x_values = self.data_index[rows, np.newaxis] + self.step_size * np.arange(
+            self.buffer_size, dtype=np.float64
+        )
+        y_values = np.round(function.calculate_array(x_values), 3)
+        self.data_index[rows] += self.buffer_size
+
+        if self.error_percentage > 0:
+            y_values = PercentageError(self.error_percentage).apply(y_values, rng)[0]
+        if self.faults.models:
+            y_values = self.faults.apply(y_values, rng)[0]
+        return y_values
+
+    def _row_parameters(self, rows: Optional[np.ndarray]) -> dict[str, Any]:
+        """It returns the parameters of some devices, shaped to broadcast
+        over their buffers. Without rows, the first device stands for all."""
+        parameters = {}
+        for name, value in self.parameters.items():
+            if isinstance(value, np.ndarray):
+                value = value[:1] if rows is None else value[rows]
+                value = value[:, np.newaxis]
+            parameters[name] = value
+        return parameters
+
+
+class FleetStore:
+    """This class holds a fleet as a structure of arrays instead of one
+    object per device. A device is a row: its MAC address is derived from
+    its index, and its token, next send time, and the data index and
+    spread parameters of every sensor are stored in arrays. The devices
+    are materialized as `Device` objects only when needed, e.g. for the
+    registration.
+
+    Advancing any set of devices is one vectorized pass per sensor. With
+    two sensors and tokens of 20 characters, a device takes about 100
+    bytes, see `bytes_per_device`, instead of a few kilobytes for the
+    objects of a `FleetMember`.
+    """
+
+    def __init__(
+        self,
+        spec: dict[str, Any],
+        device_count: int,
+        first_index: int = 0,
+        seed: Optional[int] = None,
+    ) -> None:
+        """Initialize the class.
+
+        Parameters
+        ----------
+        spec : dict[str, Any]
+            The fleet spec, see `FleetSimulator.load_spec`. A sensor may also
+            have a "parameter_spread" of relative spreads by parameter name,
+            e.g. {"base": 0.01}, to give every device its own parameters.
+        device_count : int
+            The number of devices.
+        first_index : int, optional
+            The index of the first device, by default 0.
+        seed : Optional[int], optional
+            The seed of the fleet, by default None. The spread parameters and
+            the first send time of a device are derived from it and the device
+            index, so they do not depend on the shard holding the device. The
+            jitter and the errors depend on the order of the ticks, they come
+            from a random stream of the shard.
+        """
+        self.count = device_count
+        self.first_index = first_index
+        self.prefix = spec.get("mac_prefix", "02:00:00")
+        self.firmware = spec.get("firmware", "0.0.1")
+        self.interval = spec.get("interval", 30.0)
+        self.jitter = spec.get("jitter", 0.0)
+        self._provision_key = spec.get("provision_key")
+        self._provision_secret = spec.get("provision_secret")
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        self._rng = np.random.default_rng([seed, first_index])
+
+        indices = np.arange(first_index, first_index + device_count)
+        self.sensors = [SensorColumns(sensor, indices, seed) for sensor in spec["sensors"]]
+
+        # The time of the next packet of every device since the start of the run.
+        self.next_send = self.interval * self.device_uniforms(seed, indices, "next_send")
+
+        tokens = spec.get("tokens", {})
+        self.tokens: list[Optional[str]] = [
+            tokens.get(self.mac_address(row)) for row in range(device_count)
+        ]
+
+    def __len__(self) -> int:
+        return self.count
+
+    @staticmethod
+    def device_uniforms(seed: int, indices: np.ndarray, *names: str) -> np.ndarray:
+        """It returns a uniform value in [0, 1) for every device index,
+        derived from the fleet seed, the index and the names of the value
+        only. The indices are hashed with the SplitMix64 finalizer in one
+        vectorized pass, instead of seeding a generator per device.
+
+        Parameters
+        ----------
+        seed : int
+            The seed of the fleet.
+        indices : np.ndarray
+            The indices of the devices in the fleet.
+        *names : str
+            The names of the value, e.g. the sensor and parameter names.
+
+        Returns
+        -------
+        np.ndarray
+            The values, one per device.
+        """
+        entropy = [seed] + [zlib.crc32(name.encode("utf-8")) for name in names]
+        key = np.random.SeedSequence(entropy).generate_state(1, np.uint64)[0]
+        mixed = np.asarray(indices, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15) + key
+        mixed = (mixed ^ (mixed >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        mixed = (mixed ^ (mixed >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        mixed ^= mixed >> np.uint64(31)
+        return (mixed >> np.uint64(11)) * 2.0**-53
+
+    def mac_address(self, row: int) -> str:
+        """It returns the MAC address of the device in a row."""
+        return FleetSimulator.mac_address(self.prefix, self.first_index + row)
+
+    def device(self, row: int) -> Device:
+        """It creates the `Device` of a row."""
+        device = Device(self.mac_address(row), self.firmware)
+        if self.tokens[row] is not None:
+            device.set_token(self.tokens[row])
+        elif self._provision_key and self._provision_secret:
+            device.set_provision_key(self._provision_key)
+            device.set_provision_secret(self._provision_secret)
+        return device
+
+    @property
+    def registered(self) -> np.ndarray:
+        """The rows of the devices with a token."""
+        return np.flatnonzero([token is not None for token in self.tokens])
+
+    async def register(
+        self,
+        connector: ThingsboardConnector,
+        concurrency: int = 100,
+        token_store: Optional[TokenStore] = None,
+    ) -> int:
+        """It registers the devices without a token and stores their tokens.
+
+        Parameters
+        ----------
+        connector : ThingsboardConnector
+            The connector used to register the devices.
+        concurrency : int, optional
+            The maximum number of devices registered at the same time, by default 100.
+        token_store : Optional[TokenStore], optional
+            The store to read known tokens from and save new tokens to, by default None.
+
+        Returns
+        -------
+        int
+            The number of devices newly registered.
+        """
+        rows = [row for row, token in enumerate(self.tokens) if token is None]
+        devices = [self.device(row) for row in rows]
+        registered = await connector.provision_devices_async(devices, concurrency, token_store)
+        for row, device in zip(rows, devices):
+            if device.is_registered:
+                self.tokens[row] = device.get_token()
+        return registered
+
+    def due(self, elapsed: float) -> np.ndarray:
+        """It returns the rows of the devices whose next packet is due at a
+        time since the start of the run. A device that must not send, e.g.
+        one without a token, has an infinite next send time."""
+        return np.flatnonzero(self.next_send <= elapsed)
+
+    def reschedule(self, rows: np.ndarray) -> None:
+        """It moves the next send time of the given devices one interval,
+        with jitter, later."""
+        delays = np.full(len(rows), self.interval, dtype=np.float64)
+        if self.jitter > 0:
+            delays += self._rng.uniform(-self.jitter, self.jitter, len(rows))
+        self.next_send[rows] += np.maximum(delays, 0.0)
+
+    def generate(self, rows: np.ndarray) -> dict[str, np.ndarray]:
+        """It generates the next packet of the given devices.
+
+        Parameters
+        ----------
+        rows : np.ndarray
+            The rows of the devices.
+
+        Returns
+        -------
+        dict[str, np.ndarray]
+            The buffers of every sensor by name, one row per device.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        return {sensor.name: sensor.generate(rows, self._rng) for sensor in self.sensors}
+
+    @property
+    def nbytes(self) -> int:
+        """The bytes held by the store for its devices."""
+        tokens = sys.getsizeof(self.tokens) + sum(
+            sys.getsizeof(token) for token in self.tokens if token is not None
+        )
+        return self.next_send.nbytes + tokens + sum(sensor.nbytes for sensor in self.sensors)
+
+    def bytes_per_device(self) -> float:
+        """It returns the bytes held by the store per device."""
+        return self.nbytes / self.count if self.count else 0.0
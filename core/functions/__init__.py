@@ -0,0 +1,28 @@
+"""
+The function implementations of the data generator. Importing this
+package registers all of them to the FunctionRegistry.
+"""
+
+__all__ = [
+    "BaseFunction",
+    "FunctionRegistry",
+    "ExponantialFunction",
+    "LinearFunction",
+    "SinusoidalFunction",
+    "PolynomialFunction",
+    "LogisticFunction",
+    "SawtoothFunction",
+    "RandomWalkFunction",
+    "CompositeFunction",
+]
+
+from .interface import BaseFunction
+from .registry import FunctionRegistry
+from .exponantial_function import ExponantialFunction
+from .linear_function import LinearFunction
+from .sinusoidal_function import SinusoidalFunction
+from .polynomial_function import PolynomialFunction
+from .logistic_function import LogisticFunction
+from .sawtooth_function import SawtoothFunction
+from .random_walk_function import RandomWalkFunction
+from .composite_function import CompositeFunction
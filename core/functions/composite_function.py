@@ -0,0 +1,213 @@
+"""
+This module combines the registered functions into composite functions.
+"""
+from typing import Any, Callable
+
+import numpy as np
+
+from .interface import BaseFunction
+from .registry import FunctionRegistry
+
+# A compiled node takes the x values and returns the y values.
+CompiledNode = Callable[[np.ndarray], np.ndarray]
+
+
+@FunctionRegistry.register("composite")
+class CompositeFunction(BaseFunction):
+    """This class combines registered functions to model sensors that
+    drift, saturate or switch between regimes.
+
+    The expression is a tree of dictionaries:
+        - {"function": "linear", "parameters": {...}}
+            A registered function.
+        - {"constant": 2.5}
+            A constant value.
+        - {"sum": [expression, ...]}
+            The sum of the expressions.
+        - {"product": [expression, ...]}
+            The product of the expressions.
+        - {"shift": 10.0, "expression": expression}
+            The expression evaluated at x - shift.
+        - {"piecewise": [{"until": 10.0, "expression": expression}, ..., {"expression": expression}]}
+            The first expression whose "until" is above x. The last piece has no "until".
+
+    The tree is compiled once when the function is created. Nested sums and
+    products are flattened, constants are folded and shifts are pushed down
+    to the leaves, so evaluating a buffer takes a few array operations per
+    node instead of Python calls per sample.
+    """
+
+    def __init__(self, expression: dict[str, Any]) -> None:
+        """Initialize the class.
+
+        Parameters
+        ----------
+        expression : dict[str, Any]
+            The expression tree of the composite function.
+        """
+        super().__init__()
+        self._expression = expression
+        tree = self._simplify(expression, 0.0)
+        self._functions = self._leaves(tree)
+        self.deterministic = all(function.deterministic for function in self._functions)
+        self._evaluate = self._compile(tree)
+
+    def calculate(self, x_value: float) -> float:
+        """Calculate the composite function for a given x.
+
+        Parameters
+        ----------
+        x_value : float
+            The x value.
+
+        Returns
+        -------
+        float
+            The y value.
+        """
+        return float(self.calculate_array(np.array([x_value]))[0])
+
+    def calculate_array(self, x_values: np.ndarray) -> np.ndarray:
+        """Calculate the composite function for an array of x values.
+
+        Parameters
+        ----------
+        x_values : np.ndarray
+            The x values.
+
+        Returns
+        -------
+        np.ndarray
+            The y values.
+        """
+        return self._evaluate(np.asarray(x_values, dtype=np.float64))
+
+    def inverse(self, y_value: float) -> float:
+        """A composite function has no general inverse."""
+        raise ValueError("The composite function is not invertible.")
+
+    def get_state(self) -> list[Any]:
+        """Return the states of the combined functions."""
+        return [function.get_state() for function in self._functions]
+
+    def set_state(self, state: list[Any]) -> None:
+        """Restore the states returned by `get_state`."""
+        for function, function_state in zip(self._functions, state):
+            function.set_state(function_state)
+
+    def reseed(self, rng: np.random.Generator) -> None:
+        """Seed the randomness of the combined functions."""
+        for function in self._functions:
+            function.reseed(rng)
+
+    @staticmethod
+    def _leaves(node: tuple) -> list[BaseFunction]:
+        """It returns the function objects of a simplified tree in order."""
+        if node[0] == "function":
+            return [node[1]]
+        if node[0] in ("sum", "product"):
+            return [leaf for term in node[1] for leaf in CompositeFunction._leaves(term)]
+        if node[0] == "piecewise":
+            return [leaf for piece in node[2] for leaf in CompositeFunction._leaves(piece)]
+        return []
+
+    @staticmethod
+    def _simplify(node: dict[str, Any], shift: float) -> tuple:
+        """It turns an expression into a normalized tuple tree with the
+        shifts moved to the leaves, nested sums and products flattened and
+        constants folded."""
+        if "function" in node:
+            function = FunctionRegistry.create(node["function"], node.get("parameters", {}))
+            return ("function", function, shift)
+
+        if "constant" in node:
+            return ("constant", float(node["constant"]))
+
+        if "shift" in node:
+            return CompositeFunction._simplify(node["expression"], shift + node["shift"])
+
+        for operator in ("sum", "product"):
+            if operator in node:
+                if not node[operator]:
+                    raise ValueError(f"The {operator} needs at least one expression.")
+
+                identity = 0.0 if operator == "sum" else 1.0
+                constant = identity
+                terms = []
+                for child in node[operator]:
+                    child = CompositeFunction._simplify(child, shift)
+                    children = child[1] if child[0] == operator else [child]
+                    for term in children:
+                        if term[0] == "constant":
+                            constant = (
+                                constant + term[1] if operator == "sum" else constant * term[1]
+                            )
+                        else:
+                            terms.append(term)
+
+                if not terms or (operator == "product" and constant == 0.0):
+                    return ("constant", constant)
+                if constant != identity:
+                    terms.append(("constant", constant))
+                return terms[0] if len(terms) == 1 else (operator, terms)
+
+        if "piecewise" in node:
+            pieces = node["piecewise"]
+            if not pieces or "until" in pieces[-1]:
+                raise ValueError("The last piece of a piecewise expression must not have 'until'.")
+            bounds = [piece["until"] for piece in pieces[:-1]]
+            if bounds != sorted(bounds):
+                raise ValueError("The pieces of a piecewise expression must be in order.")
+
+            # The bounds are in the shifted x axis.
+            return (
+                "piecewise",
+                np.array(bounds, dtype=np.float64) + shift,
+                [CompositeFunction._simplify(piece["expression"], shift) for piece in pieces],
+            )
+
+        raise ValueError(f"Unknown expression {node}.")
+
+    @staticmethod
+    def _compile(node: tuple) -> CompiledNode:
+        """It turns a simplified tuple tree into nested array functions."""
+        kind = node[0]
+
+        if kind == "constant":
+            value = node[1]
+            return lambda x_values: np.full_like(x_values, value)
+
+        if kind == "function":
+            function, shift = node[1], node[2]
+            if shift == 0.0:
+                return function.calculate_array
+            return lambda x_values: function.calculate_array(x_values - shift)
+
+        if kind in ("sum", "product"):
+            compiled = [CompositeFunction._compile(term) for term in node[1]]
+            operation = np.add if kind == "sum" else np.multiply
+
+            def combine(x_values: np.ndarray) -> np.ndarray:
+                result = compiled[0](x_values).copy()
+                for term in compiled[1:]:
+                    operation(result, term(x_values), out=result)
+                return result
+
+            return combine
+
+        if kind == "piecewise":
+            bounds = node[1]
+            compiled = [CompositeFunction._compile(piece) for piece in node[2]]
+
+            def select(x_values: np.ndarray) -> np.ndarray:
+                pieces = np.searchsorted(bounds, x_values, side="right")
+                result = np.empty_like(x_values)
+                for index, piece in enumerate(compiled):
+                    mask = pieces == index
+                    if mask.any():
+                        result[mask] = piece(x_values[mask])
+                return result
+
+            return select
+
+        raise ValueError(f"Unknown node {kind}.")
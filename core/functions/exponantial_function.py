@@ -4,8 +4,10 @@ This module calculates the exponantial function of a number.
 import numpy as np
 
 from .interface import BaseFunction
+from .registry import FunctionRegistry
 
 
+@FunctionRegistry.register("exponantial")
 class ExponantialFunction(BaseFunction):
     """This class calculates the exponantial function of a number."""
 
@@ -43,6 +45,22 @@ class ExponantialFunction(BaseFunction):
         """
         return self._offset + self._base ** (x_value + self._shift)
 
+    def calculate_array(self, x_values: np.ndarray) -> np.ndarray:
+        """Calculate the exponantial function for an array of x values.
+
+        Parameters
+        ----------
+        x_values : np.ndarray
+            The x values.
+
+        Returns
+        -------
+        np.ndarray
+            The y values.
+        """
+        x_values = np.asarray(x_values, dtype=np.float64)
+        return self._offset + np.power(self._base, x_values + self._shift)
+
     def inverse(self, y_value: float) -> float:
         """Calculate the inverse of the exponantial function for a given y.
 
@@ -5,13 +5,18 @@ subclasses must implement.
 """
 
 from abc import ABC, abstractmethod
-from matplotlib import pyplot as plt
+from typing import Any
+import numpy as np
 
 class BaseFunction(ABC):
     """Follow this interface to implement a function for
     DataGenerator.
     """
 
+    # A deterministic function returns the same y for the same x, so its
+    # evaluated segments can be shared through a SegmentCache.
+    deterministic: bool = True
+
     @abstractmethod
     def calculate(self, x_value: float) -> float:
         """The interface function to calculate the function."""
@@ -20,12 +25,49 @@ class BaseFunction(ABC):
     def inverse(self, y_value: float) -> float:
         """The interface function to calculate the inverse of the function."""
 
+    def calculate_array(self, x_values: np.ndarray) -> np.ndarray:
+        """Calculate the function for an array of x values at once.
+
+        Subclasses should override this with a vectorized NumPy
+        expression. The default implementation falls back to calling
+        `calculate` for every element.
+
+        Parameters
+        ----------
+        x_values : np.ndarray
+            The x values.
+
+        Returns
+        -------
+        np.ndarray
+            The y values as a float64 array.
+        """
+        x_values = np.asarray(x_values, dtype=np.float64)
+        return np.fromiter(
+            (self.calculate(x) for x in x_values.flat),
+            dtype=np.float64,
+            count=x_values.size,
+        ).reshape(x_values.shape)
+
+    def get_state(self) -> Any:
+        """Return the internal state of a stateful function, so it can
+        be checkpointed. Stateless functions return None."""
+        return None
+
+    def set_state(self, state: Any) -> None:
+        """Restore the internal state returned by `get_state`."""
+
+    def reseed(self, rng: np.random.Generator) -> None:
+        """Seed the randomness of a random function from the generator
+        that owns it. Deterministic functions ignore it."""
+
     @staticmethod
     def plot(x_values: list, y_values: list, plot_type="linear") -> None:
         """This function is used to plot the function. Do not
         implement this function in the subclass. This function
         is implemented in the base class to provide a common
-        interface for all the subclasses.
+        interface for all the subclasses. It loads matplotlib
+        lazily through the visualization module.
 
         Parameters
         ----------
@@ -36,13 +78,7 @@ class BaseFunction(ABC):
         plot_type : str, optional
             "linear", "exponantial", "dbscale", by default "linear"
         """
+        # pylint: disable=import-outside-toplevel
+        from ..visualization import Visualizer
 
-        if plot_type == "linear":
-            # Plot the function in linear scale.
-            plt.plot(x_values, y_values)
-            plt.x_label("x_values")
-            plt.y_label("y_values")
-            plt.title("Linear Scale Plot of The Function")
-            plt.show()
-        else:
-            raise NotImplementedError
+        Visualizer.plot(x_values, y_values, plot_type)
@@ -0,0 +1,73 @@
+"""
+This module calculates the linear function of a number.
+"""
+import numpy as np
+
+from .interface import BaseFunction
+from .registry import FunctionRegistry
+
+
+@FunctionRegistry.register("linear")
+class LinearFunction(BaseFunction):
+    """This class calculates the linear function of a number."""
+
+    def __init__(self, slope: float = 1.0, offset: float = 0.0) -> None:
+        """Initialize the class.
+        The function is defined as:
+            y = offset + slope * x
+
+        Parameters
+        ----------
+        slope : float, optional
+            The slope of the linear function, by default 1.0.
+        offset : float, optional
+            The offset of the linear function, by default 0.0.
+        """
+        super().__init__()
+        self._slope = slope
+        self._offset = offset
+
+    def calculate(self, x_value: float) -> float:
+        """Calculate the linear function for a given x.
+
+        Parameters
+        ----------
+        x_value : float
+            The x value.
+
+        Returns
+        -------
+        float
+            The y value.
+        """
+        return self._offset + self._slope * x_value
+
+    def calculate_array(self, x_values: np.ndarray) -> np.ndarray:
+        """Calculate the linear function for an array of x values.
+
+        Parameters
+        ----------
+        x_values : np.ndarray
+            The x values.
+
+        Returns
+        -------
+        np.ndarray
+            The y values.
+        """
+        return self._offset + self._slope * np.asarray(x_values, dtype=np.float64)
+
+    def inverse(self, y_value: float) -> float:
+        """Calculate the inverse of the linear function for a given y.
+
+        Parameters
+        ----------
+        y_value : float
+            The y value.
+
+        Returns
+        -------
+        float
+            The x value.
+        """
+        return (y_value - self._offset) / self._slope
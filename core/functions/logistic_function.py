@@ -0,0 +1,90 @@
+"""
+This module calculates the logistic function of a number.
+"""
+import numpy as np
+
+from .interface import BaseFunction
+from .registry import FunctionRegistry
+
+
+@FunctionRegistry.register("logistic")
+class LogisticFunction(BaseFunction):
+    """This class calculates the logistic function of a number."""
+
+    def __init__(
+        self,
+        maximum: float = 1.0,
+        rate: float = 1.0,
+        midpoint: float = 0.0,
+        offset: float = 0.0,
+    ) -> None:
+        """Initialize the class.
+        The function is defined as:
+            y = offset + maximum / (1 + e^(-rate * (x - midpoint)))
+
+        Parameters
+        ----------
+        maximum : float, optional
+            The height of the logistic curve, by default 1.0.
+        rate : float, optional
+            The steepness of the logistic curve, by default 1.0.
+        midpoint : float, optional
+            The x value of the middle of the curve, by default 0.0.
+        offset : float, optional
+            The offset of the logistic function, by default 0.0.
+        """
+        super().__init__()
+        self._maximum = maximum
+        self._rate = rate
+        self._midpoint = midpoint
+        self._offset = offset
+
+    def calculate(self, x_value: float) -> float:
+        """Calculate the logistic function for a given x.
+
+        Parameters
+        ----------
+        x_value : float
+            The x value.
+
+        Returns
+        -------
+        float
+            The y value.
+        """
+        return float(self.calculate_array(np.float64(x_value)))
+
+    def calculate_array(self, x_values: np.ndarray) -> np.ndarray:
+        """Calculate the logistic function for an array of x values.
+
+        Parameters
+        ----------
+        x_values : np.ndarray
+            The x values.
+
+        Returns
+        -------
+        np.ndarray
+            The y values.
+        """
+        x_values = np.asarray(x_values, dtype=np.float64)
+        # The exponent saturates to inf for very small x, which gives 0 as expected.
+        with np.errstate(over="ignore"):
+            return self._offset + self._maximum / (
+                1 + np.exp(-self._rate * (x_values - self._midpoint))
+            )
+
+    def inverse(self, y_value: float) -> float:
+        """Calculate the inverse of the logistic function for a given y.
+
+        Parameters
+        ----------
+        y_value : float
+            The y value.
+
+        Returns
+        -------
+        float
+            The x value.
+        """
+        return self._midpoint - np.log(self._maximum / (y_value - self._offset) - 1) / self._rate
@@ -0,0 +1,80 @@
+"""
+This module calculates the polynomial function of a number.
+"""
+import numpy as np
+
+from .interface import BaseFunction
+from .registry import FunctionRegistry
+
+
+@FunctionRegistry.register("polynomial")
+class PolynomialFunction(BaseFunction):
+    """This class calculates the polynomial function of a number."""
+
+    def __init__(self, coefficients: list[float]) -> None:
+        """Initialize the class.
+        The function is defined as:
+            y = c0 + c1 * x + c2 * x^2 + ...
+
+        Parameters
+        ----------
+        coefficients : list[float]
+            The coefficients of the polynomial, from the constant term up.
+        """
+        super().__init__()
+        if len(coefficients) == 0:
+            raise ValueError("The polynomial needs at least one coefficient.")
+        self._coefficients = np.asarray(coefficients, dtype=np.float64)
+
+    def calculate(self, x_value: float) -> float:
+        """Calculate the polynomial function for a given x.
+
+        Parameters
+        ----------
+        x_value : float
+            The x value.
+
+        Returns
+        -------
+        float
+            The y value.
+        """
+        return float(np.polynomial.polynomial.polyval(x_value, self._coefficients))
+
+    def calculate_array(self, x_values: np.ndarray) -> np.ndarray:
+        """Calculate the polynomial function for an array of x values.
+
+        Parameters
+        ----------
+        x_values : np.ndarray
+            The x values.
+
+        Returns
+        -------
+        np.ndarray
+            The y values.
+        """
+        x_values = np.asarray(x_values, dtype=np.float64)
+        return np.polynomial.polynomial.polyval(x_values, self._coefficients)
+
+    def inverse(self, y_value: float) -> float:
+        """Calculate the inverse of the polynomial function for a given y.
+        The smallest real solution is returned.
+
+        Parameters
+        ----------
+        y_value : float
+            The y value.
+
+        Returns
+        -------
+        float
+            The x value.
+        """
+        coefficients = self._coefficients.copy()
+        coefficients[0] -= y_value
+        roots = np.polynomial.polynomial.polyroots(coefficients)
+        real_roots = roots[np.isclose(roots.imag, 0)].real
+        if len(real_roots) == 0:
+            raise ValueError(f"The polynomial never reaches {y_value}.")
+        return float(real_roots.min())
@@ -0,0 +1,94 @@
+"""
+This module generates a random walk.
+"""
+from typing import Any, Optional
+
+import numpy as np
+
+from .interface import BaseFunction
+from .registry import FunctionRegistry
+
+
+@FunctionRegistry.register("random_walk")
+class RandomWalkFunction(BaseFunction):
+    """This class generates a random walk. Unlike the other functions,
+    the value does not depend on x: every calculated sample takes one
+    normally distributed step from the previous sample."""
+
+    deterministic = False
+
+    def __init__(
+        self, step: float = 1.0, offset: float = 0.0, seed: Optional[int] = None
+    ) -> None:
+        """Initialize the class.
+        The function is defined as:
+            y[n] = y[n - 1] + N(0, step^2), y[-1] = offset
+
+        Parameters
+        ----------
+        step : float, optional
+            The standard deviation of every step, by default 1.0.
+        offset : float, optional
+            The starting value of the walk, by default 0.0.
+        seed : Optional[int], optional
+            The seed of the steps, by default None.
+        """
+        super().__init__()
+        self._step = step
+        self._value = offset
+        self._seed = seed
+        self._rng = np.random.default_rng(seed)
+
+    def calculate(self, x_value: float) -> float:
+        """Take one step of the random walk. The x value is ignored.
+
+        Parameters
+        ----------
+        x_value : float
+            The x value.
+
+        Returns
+        -------
+        float
+            The y value.
+        """
+        self._value += self._rng.normal(0.0, self._step)
+        return self._value
+
+    def calculate_array(self, x_values: np.ndarray) -> np.ndarray:
+        """Take one step of the random walk for every x value, in order.
+
+        Parameters
+        ----------
+        x_values : np.ndarray
+            The x values.
+
+        Returns
+        -------
+        np.ndarray
+            The y values.
+        """
+        x_values = np.asarray(x_values)
+        steps = self._rng.normal(0.0, self._step, size=x_values.size)
+        y_values = self._value + np.cumsum(steps)
+        if y_values.size:
+            self._value = float(y_values[-1])
+        return y_values.reshape(x_values.shape)
+
+    def get_state(self) -> dict[str, Any]:
+        """Return the last value and the state of the random number generator."""
+        return {"value": self._value, "rng": self._rng.bit_generator.state}
+
+    def set_state(self, state: dict[str, Any]) -> None:
+        """Restore the state returned by `get_state`."""
+        self._value = state["value"]
+        self._rng.bit_generator.state = state["rng"]
+
+    def reseed(self, rng: np.random.Generator) -> None:
+        """Derive the steps from the given generator, unless a seed was given."""
+        if self._seed is None:
+            self._rng = np.random.default_rng(rng.integers(2**63))
+
+    def inverse(self, y_value: float) -> float:
+        """A random walk has no inverse."""
+        raise ValueError("The random walk function is not invertible.")
@@ -0,0 +1,136 @@
+"""
+This module keeps the function implementations that DataGenerator can use.
+"""
+import inspect
+from typing import Any, Callable
+
+from .interface import BaseFunction
+
+
+class FunctionRegistry:
+    """This class maps the function names to their implementations.
+
+    Register a BaseFunction subclass with the decorator:
+
+        @FunctionRegistry.register("linear")
+        class LinearFunction(BaseFunction):
+            ...
+
+    The accepted and required parameters of a function are read once from
+    the signature of its constructor, so creating a function only needs a
+    dictionary lookup and two set operations.
+    """
+
+    _functions: dict[str, dict[str, Any]] = {}
+
+    @classmethod
+    def register(cls, name: str) -> Callable[[type], type]:
+        """It returns a decorator that registers a function class under a name.
+
+        Parameters
+        ----------
+        name : str
+            The name of the function, used as the function type of DataGenerator.
+
+        Returns
+        -------
+        Callable[[type], type]
+            The class decorator.
+        """
+
+        def decorator(function_class: type) -> type:
+            if not issubclass(function_class, BaseFunction):
+                raise TypeError(f"{function_class.__name__} must follow BaseFunction.")
+            if name in cls._functions and cls._functions[name]["class"] is not function_class:
+                raise ValueError(f"Function type {name} is already registered.")
+
+            signature = inspect.signature(function_class.__init__)
+            parameters = [
+                parameter
+                for parameter in signature.parameters.values()
+                if parameter.name != "self"
+                and parameter.kind in (parameter.POSITIONAL_OR_KEYWORD, parameter.KEYWORD_ONLY)
+            ]
+            cls._functions[name] = {
+                "name": name,
+                "class": function_class,
+                "parameters": frozenset(parameter.name for parameter in parameters),
+                "required": frozenset(
+                    parameter.name
+                    for parameter in parameters
+                    if parameter.default is parameter.empty
+                ),
+            }
+            return function_class
+
+        return decorator
+
+    @classmethod
+    def names(cls) -> list[str]:
+        """It returns the names of the registered functions."""
+        return list(cls._functions)
+
+    @classmethod
+    def get(cls, name: str) -> dict[str, Any]:
+        """It returns the registration of a function.
+
+        Parameters
+        ----------
+        name : str
+            The name of the function.
+
+        Returns
+        -------
+        dict[str, Any]
+            The registration with the keys "name", "class", "parameters" and "required".
+        """
+        try:
+            return cls._functions[name]
+        except KeyError:
+            raise ValueError(
+                f"Function type {name} is not supported. "
+                f"Supported functions are {cls.names()}"
+            ) from None
+
+    @classmethod
+    def validate(cls, name: str, parameters: dict[str, Any]) -> None:
+        """It checks that the parameters are accepted by a function.
+
+        Parameters
+        ----------
+        name : str
+            The name of the function.
+        parameters : dict[str, Any]
+            The parameters of the function.
+        """
+        function = cls.get(name)
+
+        unknown = parameters.keys() - function["parameters"]
+        if unknown:
+            raise ValueError(
+                f"Parameter {sorted(unknown)[0]} is not supported. "
+                f"Supported parameters of {name} are {sorted(function['parameters'])}"
+            )
+
+        missing = function["required"] - parameters.keys()
+        if missing:
+            raise ValueError(f"Parameter {sorted(missing)[0]} of {name} is required.")
+
+    @classmethod
+    def create(cls, name: str, parameters: dict[str, Any]) -> BaseFunction:
+        """It validates the parameters and creates a function object.
+
+        Parameters
+        ----------
+        name : str
+            The name of the function.
+        parameters : dict[str, Any]
+            The parameters of the function.
+
+        Returns
+        -------
+        BaseFunction
+            The function object.
+        """
+        cls.validate(name, parameters)
+        return cls._functions[name]["class"](**parameters)
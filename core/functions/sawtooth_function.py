@@ -0,0 +1,89 @@
+"""
+This module calculates the sawtooth function of a number.
+"""
+import numpy as np
+
+from .interface import BaseFunction
+from .registry import FunctionRegistry
+
+
+@FunctionRegistry.register("sawtooth")
+class SawtoothFunction(BaseFunction):
+    """This class calculates the sawtooth function of a number."""
+
+    def __init__(
+        self,
+        amplitude: float = 1.0,
+        period: float = 1.0,
+        phase: float = 0.0,
+        offset: float = 0.0,
+    ) -> None:
+        """Initialize the class.
+        The function rises linearly from offset to offset + amplitude
+        over every period, and then drops back:
+            y = offset + amplitude * ((x / period + phase) mod 1)
+
+        Parameters
+        ----------
+        amplitude : float, optional
+            The height of the teeth, by default 1.0.
+        period : float, optional
+            The width of the teeth, by default 1.0.
+        phase : float, optional
+            The phase as a fraction of the period, by default 0.0.
+        offset : float, optional
+            The offset of the sawtooth function, by default 0.0.
+        """
+        super().__init__()
+        self._amplitude = amplitude
+        self._period = period
+        self._phase = phase
+        self._offset = offset
+
+    def calculate(self, x_value: float) -> float:
+        """Calculate the sawtooth function for a given x.
+
+        Parameters
+        ----------
+        x_value : float
+            The x value.
+
+        Returns
+        -------
+        float
+            The y value.
+        """
+        return self._offset + self._amplitude * ((x_value / self._period + self._phase) % 1)
+
+    def calculate_array(self, x_values: np.ndarray) -> np.ndarray:
+        """Calculate the sawtooth function for an array of x values.
+
+        Parameters
+        ----------
+        x_values : np.ndarray
+            The x values.
+
+        Returns
+        -------
+        np.ndarray
+            The y values.
+        """
+        x_values = np.asarray(x_values, dtype=np.float64)
+        return self._offset + self._amplitude * np.mod(x_values / self._period + self._phase, 1)
+
+    def inverse(self, y_value: float) -> float:
+        """Calculate the inverse of the sawtooth function for a given y.
+        The x value of the first tooth is returned.
+
+        Parameters
+        ----------
+        y_value : float
+            The y value.
+
+        Returns
+        -------
+        float
+            The x value.
+        """
+        fraction = (y_value - self._offset) / self._amplitude
+        return ((fraction - self._phase) % 1) * self._period
@@ -0,0 +1,93 @@
+"""
+This module calculates the sinusoidal function of a number.
+"""
+import numpy as np
+
+from .interface import BaseFunction
+from .registry import FunctionRegistry
+
+
+@FunctionRegistry.register("sinusoidal")
+class SinusoidalFunction(BaseFunction):
+    """This class calculates the sinusoidal function of a number."""
+
+    def __init__(
+        self,
+        amplitude: float = 1.0,
+        frequency: float = 1.0,
+        phase: float = 0.0,
+        offset: float = 0.0,
+    ) -> None:
+        """Initialize the class.
+        The function is defined as:
+            y = offset + amplitude * sin(2 * pi * frequency * x + phase)
+
+        Parameters
+        ----------
+        amplitude : float, optional
+            The amplitude of the sinusoidal function, by default 1.0.
+        frequency : float, optional
+            The number of periods per unit of x, by default 1.0.
+        phase : float, optional
+            The phase of the sinusoidal function in radians, by default 0.0.
+        offset : float, optional
+            The offset of the sinusoidal function, by default 0.0.
+        """
+        super().__init__()
+        self._amplitude = amplitude
+        self._angular_frequency = 2 * np.pi * frequency
+        self._phase = phase
+        self._offset = offset
+
+    def calculate(self, x_value: float) -> float:
+        """Calculate the sinusoidal function for a given x.
+
+        Parameters
+        ----------
+        x_value : float
+            The x value.
+
+        Returns
+        -------
+        float
+            The y value.
+        """
+        return self._offset + self._amplitude * np.sin(
+            self._angular_frequency * x_value + self._phase
+        )
+
+    def calculate_array(self, x_values: np.ndarray) -> np.ndarray:
+        """Calculate the sinusoidal function for an array of x values.
+
+        Parameters
+        ----------
+        x_values : np.ndarray
+            The x values.
+
+        Returns
+        -------
+        np.ndarray
+            The y values.
+        """
+        x_values = np.asarray(x_values, dtype=np.float64)
+        return self._offset + self._amplitude * np.sin(
+            self._angular_frequency * x_values + self._phase
+        )
+
+    def inverse(self, y_value: float) -> float:
+        """Calculate the inverse of the sinusoidal function for a given y.
+        The x value of the first quarter period is returned.
+
+        Parameters
+        ----------
+        y_value : float
+            The y value.
+
+        Returns
+        -------
+        float
+            The x value.
+        """
+        return (
+            np.arcsin((y_value - self._offset) / self._amplitude) - self._phase
+        ) / self._angular_frequency
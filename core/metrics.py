@@ -0,0 +1,244 @@
+"""
+This module is responsible for collecting and exposing the metrics of the simulator.
+"""
+import asyncio
+import logging
+from bisect import bisect_left
+from typing import Optional
+
+# Create a logger interface.
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    """This class counts the observed values, e.g. durations in seconds,
+    in cumulative buckets like a Prometheus histogram."""
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds = bounds
+        # The last count is of the values above every bound.
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """It adds a value to its bucket."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, quantile: float) -> float:
+        """It returns the upper bound of the bucket holding a quantile, the
+        last bound if the quantile is above every bound, 0 if empty."""
+        if self.count == 0:
+            return 0.0
+        rank = quantile * self.count
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return self.bounds[-1]
+
+
+class Metrics:
+    """This class holds the counters, gauges and histograms of the
+    simulator, by name and labels, e.g. the round-trip time of the
+    requests by message type:
+
+        metrics.observe("round_trip_seconds", 0.002, type="telemetry")
+
+    The metrics are rendered in the Prometheus text format, served on a
+    local HTTP endpoint by `serve`, and summarized on one line for the
+    periodic logs. The components of the simulator record into the
+    process-wide registry of `Metrics.default` unless given their own.
+    """
+
+    # The bucket bounds of the histograms in seconds.
+    BUCKETS = (
+        0.00001,
+        0.00005,
+        0.0001,
+        0.0005,
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1.0,
+        2.5,
+        5.0,
+        10.0,
+        30.0,
+        60.0,
+    )
+
+    _default: Optional["Metrics"] = None
+
+    def __init__(self, prefix: str = "simulator") -> None:
+        """Initialize the class.
+
+        Parameters
+        ----------
+        prefix : str, optional
+            The prefix of the rendered metric names, by default "simulator".
+        """
+        self.prefix = prefix
+        self._counters: dict[tuple[str, tuple], float] = {}
+        self._gauges: dict[tuple[str, tuple], float] = {}
+        self._histograms: dict[tuple[str, tuple], Histogram] = {}
+
+    @staticmethod
+    def default() -> "Metrics":
+        """It returns the registry shared by the components of the process."""
+        if Metrics._default is None:
+            Metrics._default = Metrics()
+        return Metrics._default
+
+    def increment(self, name: str, value: float = 1.0, **labels: str) -> None:
+        """It adds a value to a counter."""
+        key = (name, tuple(sorted(labels.items())))
+        self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: str) -> None:
+        """It sets the current value of a gauge."""
+        self._gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """It adds a value to a histogram."""
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram(self.BUCKETS)
+        histogram.observe(value)
+
+    def counter(self, name: str, **labels: str) -> float:
+        """It returns the value of a counter, 0 if it was never incremented."""
+        return self._counters.get((name, tuple(sorted(labels.items()))), 0.0)
+
+    def gauge(self, name: str, **labels: str) -> Optional[float]:
+        """It returns the value of a gauge, None if it was never set."""
+        return self._gauges.get((name, tuple(sorted(labels.items()))))
+
+    def histogram(self, name: str, **labels: str) -> Optional[Histogram]:
+        """It returns a histogram, None if nothing was observed."""
+        return self._histograms.get((name, tuple(sorted(labels.items()))))
+
+    def clear(self) -> None:
+        """It removes all the metrics."""
+        self._counters.clear()
+        self._gauges.clear()
+        self._histograms.clear()
+
+    def render(self) -> str:
+        """It returns the metrics in the Prometheus text format."""
+        lines = []
+        for kind, metrics in (("counter", self._counters), ("gauge", self._gauges)):
+            for name in sorted({name for name, _ in metrics}):
+                lines.append(f"# TYPE {self.prefix}_{name} {kind}")
+                for (other, labels), value in sorted(metrics.items()):
+                    if other == name:
+                        lines.append(f"{self.prefix}_{name}{self._labels(labels)} {value:g}")
+
+        for name in sorted({name for name, _ in self._histograms}):
+            lines.append(f"# TYPE {self.prefix}_{name} histogram")
+            for (other, labels), histogram in sorted(
+                self._histograms.items(), key=lambda item: item[0]
+            ):
+                if other != name:
+                    continue
+                cumulative = 0
+                bounds = [f"{bound:g}" for bound in histogram.bounds] + ["+Inf"]
+                for bound, count in zip(bounds, histogram.counts):
+                    cumulative += count
+                    bucket_labels = self._labels(labels + (("le", bound),))
+                    lines.append(f"{self.prefix}_{name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{self.prefix}_{name}_sum{self._labels(labels)} {histogram.sum:g}")
+                lines.append(
+                    f"{self.prefix}_{name}_count{self._labels(labels)} {histogram.count}"
+                )
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """It returns the metrics on one line, the histograms as their
+        count and 50th and 99th percentiles in milliseconds."""
+        parts = [
+            f"{name}{self._labels(labels)}={value:g}"
+            for (name, labels), value in sorted({**self._counters, **self._gauges}.items())
+        ]
+        for (name, labels), histogram in sorted(
+            self._histograms.items(), key=lambda item: item[0]
+        ):
+            parts.append(
+                f"{name}{self._labels(labels)}=n:{histogram.count}"
+                f",p50:{histogram.quantile(0.5) * 1e3:g}ms"
+                f",p99:{histogram.quantile(0.99) * 1e3:g}ms"
+            )
+        return " ".join(parts)
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 9100) -> asyncio.AbstractServer:
+        """It serves the metrics on "/metrics" over HTTP until the returned
+        server is closed.
+
+        Parameters
+        ----------
+        host : str, optional
+            The address to listen on, by default "127.0.0.1".
+        port : int, optional
+            The port to listen on, by default 9100.
+
+        Returns
+        -------
+        asyncio.AbstractServer
+            The HTTP server.
+        """
+        server = await asyncio.start_server(self._handle, host, port)
+        logger.info("Serving the metrics on http://%s:%d/metrics", host, port)
+        return server
+
+    async def log_periodically(self, interval: float) -> None:
+        """It logs the summary of the metrics every interval until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            logger.info("Metrics: %s", self.summary())
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """It answers a single HTTP request."""
+        try:
+            request_line = await reader.readline()
+            # Skip the headers of the request.
+            while (await reader.readline()).strip():
+                pass
+
+            parts = request_line.split()
+            if len(parts) >= 2 and parts[1].split(b"?")[0] == b"/metrics":
+                status, body = "200 OK", self.render().encode("utf-8")
+            else:
+                status, body = "404 Not Found", b"Not found\n"
+            writer.write(
+                (
+                    f"HTTP/1.1 {status}\r\n"
+                    "Content-Type: text/plain; version=0.0.4\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    "Connection: close\r\n\r\n"
+                ).encode("ascii")
+                + body
+            )
+            await writer.drain()
+        except ConnectionError as error:
+            logger.debug("Failed to answer a metrics request: %s", error)
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _labels(labels: tuple) -> str:
+        """It formats the labels of a metric."""
+        if not labels:
+            return ""
+        return "{" + ",".join(f'{name}="{value}"' for name, value in labels) + "}"
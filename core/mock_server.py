@@ -0,0 +1,225 @@
+"""
+This module is responsible for simulating the CoAP API of Thingsboard on localhost.
+"""
+import asyncio
+import json
+import logging
+import random
+import socket
+import uuid
+from typing import Optional
+
+from aiocoap import Context, Message, Code, resource
+
+from .payload_encoder import PayloadEncoder
+
+# Create a logger interface.
+logger = logging.getLogger(__name__)
+
+
+class _DeviceApiResource(resource.Resource, resource.PathCapable):
+    """This class dispatches the requests under /api/v1 to the mock server."""
+
+    def __init__(self, server: "MockThingsboardServer") -> None:
+        super().__init__()
+        self._server = server
+
+    async def render_post(self, request: Message) -> Message:
+        return await self._server.handle(
+            request.opt.uri_path, request.payload, request.opt.content_format
+        )
+
+
+class MockThingsboardServer:
+    """This class is an in-process stand-in for the CoAP API of Thingsboard.
+
+    It implements the endpoints used by `ThingsboardConnector`:
+        - /api/v1/provision
+        - /api/v1/{token}/telemetry
+        - /api/v1/{token}/attributes
+
+    Every request can be delayed, answered with an error, or dropped without
+    a response, to test the connector against a slow or faulty platform. The
+    received messages and bytes are counted per message type. Use it as an
+    async context manager:
+
+        async with MockThingsboardServer(port=5683) as server:
+            ...
+    """
+
+    MESSAGE_TYPES = ("provision", "telemetry", "attributes")
+
+    def __init__(
+        self,
+        hostname: str = "127.0.0.1",
+        port: int = 5683,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        drop_rate: float = 0.0,
+        provision_key: Optional[str] = None,
+        provision_secret: Optional[str] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        """Initialize the class.
+
+        Parameters
+        ----------
+        hostname : str, optional
+            The address to listen on, by default "127.0.0.1".
+        port : int, optional
+            The UDP port to listen on, by default 5683.
+        latency : float, optional
+            The delay before every response in seconds, by default 0.0.
+        error_rate : float, optional
+            The ratio of requests answered with 5.00, by default 0.0.
+        drop_rate : float, optional
+            The ratio of requests never answered, by default 0.0.
+        provision_key : Optional[str], optional
+            The only provision key accepted, by default any key is accepted.
+        provision_secret : Optional[str], optional
+            The only provision secret accepted, by default any secret is accepted.
+        seed : Optional[int], optional
+            The seed of the error and drop injection, by default None.
+        """
+        if not 0.0 <= error_rate + drop_rate <= 1.0:
+            raise ValueError("The sum of the error and drop rates must be between 0 and 1.")
+
+        self.hostname = hostname
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self._provision_key = provision_key
+        self._provision_secret = provision_secret
+        self._rng = random.Random(seed)
+
+        self._context: Optional[Context] = None
+        self._stopped = asyncio.Event()
+
+        # The tokens of the provisioned devices by device name.
+        self.devices: dict[str, str] = {}
+
+        self.messages = dict.fromkeys(self.MESSAGE_TYPES, 0)
+        self.bytes = dict.fromkeys(self.MESSAGE_TYPES, 0)
+        self.errors = 0
+        self.dropped = 0
+
+    async def __aenter__(self) -> "MockThingsboardServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    async def start(self) -> None:
+        """It starts listening for requests."""
+        site = resource.Site()
+        site.add_resource(["api", "v1"], _DeviceApiResource(self))
+
+        self._stopped = asyncio.Event()
+        self._context = await Context.create_server_context(
+            site, bind=(self.hostname, self.port)
+        )
+        logger.info("Mock Thingsboard server listening on %s:%s.", self.hostname, self.port)
+
+    async def stop(self) -> None:
+        """It stops listening and releases the dropped requests."""
+        self._stopped.set()
+        if self._context is not None:
+            await self._context.shutdown()
+            self._context = None
+
+    @staticmethod
+    def free_port(kind: int = socket.SOCK_DGRAM) -> int:
+        """It returns a port that is free on localhost, UDP by default."""
+        with socket.socket(socket.AF_INET, kind) as probe:
+            probe.bind(("127.0.0.1", 0))
+            return probe.getsockname()[1]
+
+    def reset_counters(self) -> None:
+        """It sets all the counters back to zero."""
+        self.messages = dict.fromkeys(self.MESSAGE_TYPES, 0)
+        self.bytes = dict.fromkeys(self.MESSAGE_TYPES, 0)
+        self.errors = 0
+        self.dropped = 0
+
+    async def handle(
+        self, path: tuple, payload: bytes, content_format: Optional[int] = None
+    ) -> Message:
+        """It answers a request under /api/v1.
+
+        Parameters
+        ----------
+        path : tuple
+            The path of the request after /api/v1.
+        payload : bytes
+            The payload of the request.
+        content_format : Optional[int], optional
+            The CoAP content format of the payload, by default JSON.
+
+        Returns
+        -------
+        Message
+            The response.
+        """
+        if path == ("provision",):
+            message_type = "provision"
+        elif len(path) == 2 and path[1] in ("telemetry", "attributes"):
+            message_type = path[1]
+        else:
+            return Message(code=Code.NOT_FOUND)
+
+        self.messages[message_type] += 1
+        self.bytes[message_type] += len(payload)
+
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+
+        fault = self._rng.random()
+        if fault < self.drop_rate:
+            # Never answer, the client times out.
+            self.dropped += 1
+            await self._stopped.wait()
+            return Message(code=Code.SERVICE_UNAVAILABLE)
+        if fault < self.drop_rate + self.error_rate:
+            self.errors += 1
+            return Message(code=Code.INTERNAL_SERVER_ERROR)
+
+        if message_type == "provision":
+            return self._provision(payload)
+
+        try:
+            decoder = PayloadEncoder.for_content_format(content_format)
+        except (ValueError, ImportError):
+            return Message(code=Code.UNSUPPORTED_CONTENT_FORMAT)
+        try:
+            decoder.decode(payload)
+        except Exception:  # pylint: disable=broad-except
+            return Message(code=Code.BAD_REQUEST)
+        return Message(code=Code.CREATED if message_type == "telemetry" else Code.CHANGED)
+
+    def _provision(self, payload: bytes) -> Message:
+        """It issues a token for a provision request."""
+        try:
+            request = json.loads(payload)
+        except ValueError:
+            return Message(code=Code.BAD_REQUEST)
+
+        if (
+            self._provision_key is not None
+            and request.get("provisionDeviceKey") != self._provision_key
+        ) or (
+            self._provision_secret is not None
+            and request.get("provisionDeviceSecret") != self._provision_secret
+        ):
+            response = {"status": "NOT_FOUND", "errorMsg": "Provision data was not found!"}
+        else:
+            device_name = request.get("deviceName") or uuid.uuid4().hex
+            token = self.devices.setdefault(device_name, uuid.uuid4().hex[:20])
+            response = {
+                "status": "SUCCESS",
+                "credentialsType": "ACCESS_TOKEN",
+                "credentialsValue": token,
+            }
+
+        return Message(code=Code.CONTENT, payload=str.encode(json.dumps(response)))
@@ -0,0 +1,286 @@
+"""
+This module is responsible for encoding the telemetry payloads sent over CoAP.
+"""
+import json
+import logging
+import struct
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+import numpy as np
+
+# Create a logger interface.
+logger = logging.getLogger(__name__)
+
+
+class PayloadEncoder(ABC):
+    """Follow this interface to implement a payload encoding for
+    ThingsboardConnector. Every encoding has its CoAP content format,
+    so the receiver can tell them apart, and can decode its own payloads
+    for testing and measurement.
+    """
+
+    # The CoAP content format of the payloads.
+    CONTENT_FORMAT: int = 0
+
+    @abstractmethod
+    def encode(self, data: Any) -> bytes:
+        """The interface function to encode a payload.
+
+        Parameters
+        ----------
+        data : Any
+            The telemetry, e.g. {"e1": [...], "e2": [...]}.
+
+        Returns
+        -------
+        bytes
+            The encoded payload.
+        """
+
+    @abstractmethod
+    def decode(self, payload: bytes) -> Any:
+        """The interface function to decode a payload."""
+
+    @staticmethod
+    def create(spec: str | dict[str, Any]) -> "PayloadEncoder":
+        """It creates an encoder from its name, or from its description.
+
+        Parameters
+        ----------
+        spec : str | dict[str, Any]
+            The name of the encoding, or the name under "format" and its
+            options, e.g. {"format": "json", "precision": 2}.
+
+        Returns
+        -------
+        PayloadEncoder
+            The encoder.
+        """
+        options = {"format": spec} if isinstance(spec, str) else dict(spec)
+        name = options.pop("format", None)
+        if name not in ENCODERS:
+            raise ValueError(
+                f"Payload format {name} is not supported. "
+                f"Supported formats are {list(ENCODERS)}"
+            )
+        return ENCODERS[name](**options)
+
+    @staticmethod
+    def for_content_format(content_format: Optional[int]) -> "PayloadEncoder":
+        """It returns an encoder of a CoAP content format, JSON if none is given."""
+        for encoder in ENCODERS.values():
+            if encoder.CONTENT_FORMAT == (content_format or JsonEncoder.CONTENT_FORMAT):
+                return encoder()
+        raise ValueError(f"Content format {content_format} is not supported.")
+
+
+class JsonEncoder(PayloadEncoder):
+    """This class encodes the payloads as compact JSON. With a precision,
+    the floats are rounded to that many decimals first, which shortens
+    the payload of noisy sensors a lot.
+
+    The sensor buffers may be numpy arrays, the missing samples (NaN) are
+    encoded as null. With the "orjson" backend, used by "auto" when the
+    optional orjson package is installed, the arrays are serialized
+    directly without converting them to lists first.
+    """
+
+    CONTENT_FORMAT = 50
+    BACKENDS = ("auto", "json", "orjson")
+
+    def __init__(self, precision: Optional[int] = None, backend: str = "auto") -> None:
+        if backend not in self.BACKENDS:
+            raise ValueError(
+                f"JSON backend {backend} is not supported. "
+                f"Supported backends are {list(self.BACKENDS)}"
+            )
+
+        self._precision = precision
+        self._orjson = None
+        if backend != "json":
+            try:
+                import orjson  # pylint: disable=import-outside-toplevel
+            except ImportError as error:
+                if backend == "orjson":
+                    raise ImportError(
+                        "The orjson backend requires orjson, install it with 'pip install orjson'."
+                    ) from error
+            else:
+                self._orjson = orjson
+        self.backend = "json" if self._orjson is None else "orjson"
+        # Reuse the encoder, json.dumps creates one per call with these options.
+        self._json_encoder = json.JSONEncoder(separators=(",", ":"), default=self._to_list)
+
+    def encode(self, data: Any) -> bytes:
+        if self._precision is not None:
+            data = self._round(data)
+        if self._orjson is not None:
+            return self._orjson.dumps(
+                data, default=self._to_list, option=self._orjson.OPT_SERIALIZE_NUMPY
+            )
+        if isinstance(data, dict):
+            # Convert the buffers here, the default hook is slower.
+            data = {
+                key: self._to_list(value) if isinstance(value, np.ndarray) else value
+                for key, value in data.items()
+            }
+        return self._json_encoder.encode(data).encode("utf-8")
+
+    def decode(self, payload: bytes) -> Any:
+        return json.loads(payload)
+
+    def _round(self, value: Any) -> Any:
+        """It rounds the floats of a payload recursively."""
+        if isinstance(value, float):
+            return round(value, self._precision)
+        if isinstance(value, np.ndarray):
+            return np.round(value, self._precision)
+        if isinstance(value, dict):
+            return {key: self._round(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._round(item) for item in value]
+        return value
+
+    @staticmethod
+    def _to_list(value: Any) -> Any:
+        """It converts the arrays the backend cannot serialize to lists."""
+        if isinstance(value, np.ndarray):
+            if value.dtype.kind == "f" and np.isnan(value).any():
+                return np.where(np.isnan(value), None, value).tolist()
+            return value.tolist()
+        if isinstance(value, np.generic):
+            return value.item()
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class CborEncoder(PayloadEncoder):
+    """This class encodes the payloads as CBOR. With `canonical`, every
+    float is stored in the shortest of half, single or double precision
+    that keeps its value. It requires the optional cbor2 package."""
+
+    CONTENT_FORMAT = 60
+
+    def __init__(self, canonical: bool = True) -> None:
+        try:
+            import cbor2  # pylint: disable=import-outside-toplevel
+        except ImportError as error:
+            raise ImportError(
+                "The cbor format requires cbor2, install it with 'pip install cbor2'."
+            ) from error
+
+        self._cbor2 = cbor2
+        self._canonical = canonical
+
+    def encode(self, data: Any) -> bytes:
+        return self._cbor2.dumps(data, canonical=self._canonical, default=self._encode_array)
+
+    @staticmethod
+    def _encode_array(encoder: Any, value: Any) -> None:
+        """It encodes the sensor buffers given as numpy arrays as lists."""
+        if not isinstance(value, np.ndarray):
+            raise TypeError(f"Object of type {type(value).__name__} is not CBOR serializable")
+        encoder.encode(value.tolist())
+
+    def decode(self, payload: bytes) -> Any:
+        return self._cbor2.loads(payload)
+
+
+class PackedEncoder(PayloadEncoder):
+    """This class encodes the sensor buffers as packed little endian
+    float arrays, the format of the MCU firmware:
+        - 1 byte version, 1 for float32 samples and 2 for float64 samples
+        - 1 byte sensor count
+        - for every sensor:
+            - 1 byte length of the name, and the UTF-8 name
+            - 2 bytes sample count
+            - the samples, missing samples are NaN
+
+    A packet has at most 255 sensors, and a name at most 255 bytes. A
+    packet with a buffer of more than 65535 samples is encoded with the
+    version 3 (float32) or 4 (float64), whose sample counts take 4 bytes.
+
+    Only a dictionary of float arrays can be packed, so it does not
+    support the batched payloads of `TelemetryBatcher`.
+    """
+
+    CONTENT_FORMAT = 42
+
+    # The dtype of the samples by version.
+    DTYPES = {1: np.dtype("<f4"), 2: np.dtype("<f8"), 3: np.dtype("<f4"), 4: np.dtype("<f8")}
+
+    # The versions with 4 bytes sample counts, by the version of the dtype.
+    WIDE_VERSIONS = {1: 3, 2: 4}
+
+    # The largest sensor count, name length and sample count of a version 1 or 2 packet.
+    MAX_SENSORS = 0xFF
+    MAX_NAME_BYTES = 0xFF
+    MAX_SAMPLES = 0xFFFF
+
+    def __init__(self, dtype: str = "float32") -> None:
+        versions = {self.DTYPES[version].name: version for version in self.WIDE_VERSIONS}
+        if dtype not in versions:
+            raise ValueError("The packed dtype must be float32 or float64.")
+        self._version = versions[dtype]
+
+    def encode(self, data: Any) -> bytes:
+        if not isinstance(data, dict):
+            raise ValueError("The packed format only supports a dictionary of float arrays.")
+        if len(data) > self.MAX_SENSORS:
+            raise ValueError(
+                f"The packed format supports at most {self.MAX_SENSORS} sensors, got {len(data)}."
+            )
+
+        dtype = self.DTYPES[self._version]
+        sensors = []
+        for name, values in data.items():
+            encoded_name = name.encode("utf-8")
+            if len(encoded_name) > self.MAX_NAME_BYTES:
+                raise ValueError(
+                    f"The packed sensor names have at most {self.MAX_NAME_BYTES} bytes, "
+                    f"{name!r} has {len(encoded_name)}."
+                )
+            # np.array turns the missing samples (None) into NaN.
+            sensors.append((encoded_name, np.array(values, dtype=dtype)))
+
+        version = self._version
+        if any(len(samples) > self.MAX_SAMPLES for _, samples in sensors):
+            version = self.WIDE_VERSIONS[version]
+        count_format = self._count_format(version)
+
+        parts = [struct.pack("<BB", version, len(sensors))]
+        for encoded_name, samples in sensors:
+            parts.append(struct.pack("<B", len(encoded_name)))
+            parts.append(encoded_name)
+            parts.append(struct.pack(count_format, len(samples)))
+            parts.append(samples.tobytes())
+        return b"".join(parts)
+
+    def decode(self, payload: bytes) -> dict[str, list[float]]:
+        version, sensor_count = struct.unpack_from("<BB", payload)
+        dtype = self.DTYPES[version]
+        count_format = self._count_format(version)
+        offset = 2
+        data = {}
+        for _ in range(sensor_count):
+            (name_length,) = struct.unpack_from("<B", payload, offset)
+            name = payload[offset + 1 : offset + 1 + name_length].decode("utf-8")
+            offset += 1 + name_length
+            (sample_count,) = struct.unpack_from(count_format, payload, offset)
+            offset += struct.calcsize(count_format)
+            data[name] = np.frombuffer(payload, dtype, sample_count, offset).tolist()
+            offset += sample_count * dtype.itemsize
+        return data
+
+    @staticmethod
+    def _count_format(version: int) -> str:
+        """Return the struct format of the sample counts of a version."""
+        return "<I" if version in PackedEncoder.WIDE_VERSIONS.values() else "<H"
+
+
+# The payload encoders by name, used by PayloadEncoder.create.
+ENCODERS: dict[str, type] = {
+    "json": JsonEncoder,
+    "cbor": CborEncoder,
+    "packed": PackedEncoder,
+}
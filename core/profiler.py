@@ -0,0 +1,207 @@
+"""
+This module is responsible for profiling the simulator loop.
+"""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from .metrics import Histogram, Metrics
+
+# Create a logger interface.
+logger = logging.getLogger(__name__)
+
+
+class Profiler:
+    """This class profiles the thread that starts it, and writes its
+    results when stopped:
+        - [OUTPUT].collapsed: the sampled stacks in the collapsed format,
+          one "root;...;leaf count" line per stack, for flamegraph.pl or
+          speedscope
+        - [OUTPUT].txt: the timing of the stages and the top functions
+        - [OUTPUT].pstats: the cProfile statistics, in the "cprofile" mode
+
+    The stacks are sampled by a background thread every `interval`. In
+    the "cprofile" mode, every call is also traced by cProfile, which
+    gives exact call counts but slows the loop down; the "sampling" mode
+    only samples the stacks. The stages of the loop are timed with
+    `span`, and the encode and round-trip times of the telemetry are read
+    from the metrics of the connector.
+    """
+
+    MODES = ("cprofile", "sampling")
+
+    # The stages of the connector reported from its metrics.
+    CONNECTOR_STAGES = {
+        "encode": "encode_seconds",
+        "round_trip": "round_trip_seconds",
+    }
+
+    def __init__(
+        self,
+        output: str = "profile",
+        mode: str = "cprofile",
+        interval: float = 0.005,
+        top: int = 20,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        """Initialize the class.
+
+        Parameters
+        ----------
+        output : str, optional
+            The path prefix of the result files, by default "profile".
+        mode : str, optional
+            "cprofile" or "sampling", see the class description, by default "cprofile".
+        interval : float, optional
+            The time between two stack samples in seconds, by default 0.005.
+        top : int, optional
+            The number of functions in the summary, by default 20.
+        metrics : Optional[Metrics], optional
+            The metrics of the connector, by default the registry of the process.
+        """
+        if mode not in self.MODES:
+            raise ValueError(
+                f"Profiling mode {mode} is not supported. Supported modes are {list(self.MODES)}"
+            )
+
+        self.output = output
+        self.mode = mode
+        self._interval = interval
+        self._top = top
+        self._metrics = metrics or Metrics.default()
+
+        self.spans: dict[str, Histogram] = {}
+        self.samples: Counter[str] = Counter()
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._thread_id = 0
+        self._started = 0.0
+        self.elapsed = 0.0
+
+    def __enter__(self) -> "Profiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """It starts profiling the current thread."""
+        self._thread_id = threading.get_ident()
+        self._stopped.clear()
+        self._sampler = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self._sampler.start()
+        if self.mode == "cprofile":
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self._started = time.perf_counter()
+
+    def stop(self) -> str:
+        """It stops profiling, writes the result files and returns the summary."""
+        self.elapsed += time.perf_counter() - self._started
+        if self._profile is not None:
+            self._profile.disable()
+        self._stopped.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+
+        with open(self.output + ".collapsed", "w", encoding="utf-8") as collapsed_file:
+            collapsed_file.writelines(f"{line}\n" for line in self.collapsed())
+        if self._profile is not None:
+            self._profile.dump_stats(self.output + ".pstats")
+        summary = self.summary()
+        with open(self.output + ".txt", "w", encoding="utf-8") as summary_file:
+            summary_file.write(summary)
+
+        logger.info("Profile written to %s.*\n%s", self.output, summary)
+        return summary
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """It times a stage of the loop, e.g. `with profiler.span("generate"):`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram = self.spans.get(stage)
+            if histogram is None:
+                histogram = self.spans[stage] = Histogram(Metrics.BUCKETS)
+            histogram.observe(time.perf_counter() - started)
+
+    def collapsed(self) -> list[str]:
+        """It returns the sampled stacks in the collapsed format, the most frequent first."""
+        return [f"{stack} {count}" for stack, count in self.samples.most_common()]
+
+    def summary(self) -> str:
+        """It returns the timing of the stages and the top functions as text."""
+        lines = [
+            f"Profiled {self.elapsed:.2f} s in the {self.mode} mode, "
+            f"{sum(self.samples.values())} stack samples.",
+            "",
+            f"{'stage':<24}{'count':>10}{'total s':>12}{'mean ms':>12}{'share':>8}",
+        ]
+        stages = dict(self.spans)
+        for stage, name in self.CONNECTOR_STAGES.items():
+            histogram = self._metrics.histogram(name, type="telemetry")
+            if histogram is not None:
+                stages[f"{stage} (connector)"] = histogram
+        for stage, histogram in stages.items():
+            lines.append(
+                f"{stage:<24}{histogram.count:>10}{histogram.sum:>12.3f}"
+                f"{histogram.sum / max(histogram.count, 1) * 1e3:>12.3f}"
+                f"{histogram.sum / self.elapsed if self.elapsed else 0.0:>8.1%}"
+            )
+
+        lines.append("")
+        if self._profile is not None:
+            stream = io.StringIO()
+            stats = pstats.Stats(self._profile, stream=stream)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self._top)
+            lines.append(stream.getvalue().strip())
+        else:
+            lines.append(f"{'function':<72}{'self':>8}{'total':>8}")
+            for function, own, total in self._sampled_functions()[: self._top]:
+                lines.append(f"{function[-72:]:<72}{own:>8.1%}{total:>8.1%}")
+        return "\n".join(lines) + "\n"
+
+    def _sample(self) -> None:
+        """It samples the stack of the profiled thread until stopped."""
+        while not self._stopped.wait(self._interval):
+            # pylint: disable-next=protected-access
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def _sampled_functions(self) -> list[tuple[str, float, float]]:
+        """It returns the share of the samples of every function, at the
+        top of the stack (self) and anywhere in it (total), by self share."""
+        count = sum(self.samples.values())
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, samples in self.samples.items():
+            frames = stack.split(";")
+            own[frames[-1]] += samples
+            for function in set(frames):
+                total[function] += samples
+        return sorted(
+            ((function, own[function] / count, total[function] / count) for function in total),
+            key=lambda item: (item[1], item[2]),
+            reverse=True,
+        )
@@ -0,0 +1,252 @@
+"""
+This module is responsible for pacing the fleet at a target aggregate rate.
+"""
+import asyncio
+import logging
+from typing import Any, Optional
+
+# Create a logger interface.
+logger = logging.getLogger(__name__)
+
+
+class RateProfile:
+    """This class describes the target rate over time as consecutive stages.
+
+    The stages are dictionaries:
+        - {"stage": "constant", "rate": 100, "duration": 60}
+            A fixed rate. "soak" is the same stage, for long runs.
+        - {"stage": "ramp", "from": 0, "to": 1000, "duration": 120}
+            A rate changing linearly.
+        - {"stage": "step", "rates": [100, 200, 400], "duration": 30}
+            Every rate held for the duration, one after the other.
+
+    The last stage may omit its duration to hold its final rate forever,
+    unless it is a step stage with several rates.
+    """
+
+    STAGES = ("constant", "soak", "ramp", "step")
+
+    def __init__(self, stages: list[dict[str, Any]]) -> None:
+        """Initialize the class.
+
+        Parameters
+        ----------
+        stages : list[dict[str, Any]]
+            The stages of the profile, see the class description.
+        """
+        if not stages:
+            raise ValueError("A rate profile needs at least one stage.")
+
+        # Every segment is (start, duration, rate at start, rate at end).
+        self._segments: list[tuple[float, Optional[float], float, float]] = []
+        start = 0.0
+        for position, stage in enumerate(stages):
+            kind = stage.get("stage", "constant")
+            if kind not in self.STAGES:
+                raise ValueError(
+                    f"Rate stage {kind} is not supported. Supported stages are {list(self.STAGES)}"
+                )
+            duration = stage.get("duration")
+            if duration is None and position != len(stages) - 1:
+                raise ValueError("Only the last stage of a rate profile may omit the duration.")
+            if duration is not None and duration <= 0:
+                raise ValueError("The durations of a rate profile must be positive.")
+
+            if kind == "ramp":
+                rates = [(float(stage["from"]), float(stage["to"]))]
+            elif kind == "step":
+                rates = [(float(rate), float(rate)) for rate in stage["rates"]]
+                if duration is None and len(rates) > 1:
+                    raise ValueError("A step stage with several rates needs a duration.")
+            else:
+                rates = [(float(stage["rate"]), float(stage["rate"]))]
+
+            for first, last in rates:
+                if min(first, last) < 0:
+                    raise ValueError("The rates of a rate profile must not be negative.")
+                self._segments.append((start, duration, first, last))
+                if duration is not None:
+                    start += duration
+
+    @staticmethod
+    def constant(rate: float) -> "RateProfile":
+        """It returns a profile holding a single rate forever."""
+        return RateProfile([{"stage": "constant", "rate": rate}])
+
+    @property
+    def duration(self) -> Optional[float]:
+        """The total duration of the stages in seconds, None if the last one is endless."""
+        start, duration, _, _ = self._segments[-1]
+        return None if duration is None else start + duration
+
+    def rate_at(self, elapsed: float) -> float:
+        """It returns the target rate at a time since the start, 0 after the last stage."""
+        for start, duration, first, last in self._segments:
+            if duration is None:
+                return first
+            if elapsed < start + duration:
+                return first + (last - first) * max(0.0, elapsed - start) / duration
+        return 0.0
+
+    def integral(self, elapsed: float) -> float:
+        """It returns the target count between the start and a time since the start."""
+        total = 0.0
+        for start, duration, first, last in self._segments:
+            if elapsed <= start:
+                break
+            if duration is None:
+                total += first * (elapsed - start)
+                break
+            span = min(elapsed - start, duration)
+            # The area under the linear segment up to the span.
+            total += span * (first + (first + (last - first) * span / duration)) / 2
+        return total
+
+
+class RateController:
+    """This class is a token bucket filled at the rate of a profile. Every
+    send takes its cost from the bucket, and waits until enough tokens
+    have accumulated. The bucket holds at most `burst` seconds of tokens,
+    so the sends are spread evenly and a late scheduler can catch up a
+    little without bursting.
+    """
+
+    UNITS = ("messages", "samples")
+
+    def __init__(
+        self,
+        profile: RateProfile,
+        unit: str = "messages",
+        share: float = 1.0,
+        burst: float = 0.05,
+    ) -> None:
+        """Initialize the class.
+
+        Parameters
+        ----------
+        profile : RateProfile
+            The target aggregate rate over time.
+        unit : str, optional
+            "messages" or "samples", the unit of the rates, by default "messages".
+        share : float, optional
+            The part of the profile paced by this controller, e.g. the share
+            of the devices of a worker, by default 1.0.
+        burst : float, optional
+            The capacity of the bucket in seconds of the current rate, by default 0.05.
+        """
+        if unit not in self.UNITS:
+            raise ValueError(
+                f"Rate unit {unit} is not supported. Supported units are {list(self.UNITS)}"
+            )
+
+        self.profile = profile
+        self.unit = unit
+        self._share = share
+        self._burst = burst
+
+        self._start: Optional[float] = None
+        self._last = 0.0
+        self._tokens = 0.0
+        self.acquired = 0.0
+
+    @staticmethod
+    def create(spec: dict[str, Any]) -> "RateController":
+        """It creates a rate controller from the "rate" of a fleet spec.
+
+        Parameters
+        ----------
+        spec : dict[str, Any]
+            The "profile" stages, or a constant "target", and optionally
+            the "unit", "share" and "burst".
+
+        Returns
+        -------
+        RateController
+            The rate controller.
+        """
+        if "profile" in spec:
+            profile = RateProfile(spec["profile"])
+        else:
+            profile = RateProfile.constant(spec["target"])
+        return RateController(
+            profile, spec.get("unit", "messages"), spec.get("share", 1.0), spec.get("burst", 0.05)
+        )
+
+    @property
+    def elapsed(self) -> float:
+        """The time since the first acquire in seconds."""
+        if self._start is None:
+            return 0.0
+        return asyncio.get_running_loop().time() - self._start
+
+    @property
+    def finished(self) -> bool:
+        """Whether the last stage of the profile is over."""
+        duration = self.profile.duration
+        return duration is not None and self.elapsed >= duration
+
+    def target(self, elapsed: Optional[float] = None) -> float:
+        """It returns the target count of this controller up to a time, by default now."""
+        return self._share * self.profile.integral(self.elapsed if elapsed is None else elapsed)
+
+    async def acquire(self, cost: float = 1.0) -> bool:
+        """It waits until the bucket holds the cost and takes it.
+
+        Parameters
+        ----------
+        cost : float, optional
+            The cost of the send in the unit of the controller, by default 1.0.
+
+        Returns
+        -------
+        bool
+            False if the profile finished before the cost was available.
+        """
+        loop = asyncio.get_running_loop()
+        if self._start is None:
+            self._start = self._last = loop.time()
+
+        while True:
+            now = loop.time()
+            elapsed = now - self._start
+            rate = self._share * self.profile.rate_at(elapsed)
+            capacity = max(cost, rate * self._burst)
+            self._tokens = min(
+                capacity,
+                self._tokens + self.target(elapsed) - self.target(self._last - self._start),
+            )
+            self._last = now
+
+            if self._tokens >= cost:
+                self._tokens -= cost
+                self.acquired += cost
+                return True
+
+            duration = self.profile.duration
+            if duration is not None and elapsed >= duration:
+                return False
+            # Wait for the missing tokens, or recheck soon while the rate is 0.
+            await asyncio.sleep((cost - self._tokens) / rate if rate > 0 else 0.1)
+
+    def report(self, achieved: float) -> dict[str, float]:
+        """It compares an achieved count with the target of the run so far.
+
+        Parameters
+        ----------
+        achieved : float
+            The count actually sent in the unit of the controller.
+
+        Returns
+        -------
+        dict[str, float]
+            The elapsed time, and the target and achieved counts and rates.
+        """
+        elapsed = self.elapsed
+        target = self.target(elapsed)
+        return {
+            "elapsed": elapsed,
+            "target": target,
+            "achieved": achieved,
+            "target_per_sec": target / elapsed if elapsed > 0 else 0.0,
+            "achieved_per_sec": achieved / elapsed if elapsed > 0 else 0.0,
+        }
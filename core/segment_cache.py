@@ -0,0 +1,97 @@
+"""
+This module is responsible for sharing the evaluated function segments between generators.
+"""
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+import numpy as np
+
+# Create a logger interface.
+logger = logging.getLogger(__name__)
+
+
+class SegmentCache:
+    """This class keeps the clean values of recently evaluated segments,
+    so generators with the same function, parameters and step size share
+    one array instead of each calculating it.
+
+    The least recently used segments are evicted once the total size of
+    the arrays exceeds the memory cap. The cached arrays are read-only,
+    and a segment larger than the cap is never cached.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024) -> None:
+        """Initialize the class.
+
+        Parameters
+        ----------
+        max_bytes : int, optional
+            The memory cap of the cached arrays in bytes, by default 64 MiB.
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._segments: OrderedDict[Hashable, np.ndarray] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._segments
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        """It returns the cached segment of a key, calculating it on a miss.
+
+        Parameters
+        ----------
+        key : Hashable
+            The key of the segment, see `DataGenerator`.
+        compute : Callable[[], np.ndarray]
+            The function calculating the segment.
+
+        Returns
+        -------
+        np.ndarray
+            The read-only segment.
+        """
+        segment = self._segments.get(key)
+        if segment is not None:
+            self._segments.move_to_end(key)
+            self.hits += 1
+            return segment
+
+        self.misses += 1
+        segment = compute()
+        segment.setflags(write=False)
+        if segment.nbytes <= self.max_bytes:
+            self._segments[key] = segment
+            self.nbytes += segment.nbytes
+            self._evict()
+        return segment
+
+    def clear(self) -> None:
+        """It removes all the cached segments."""
+        self._segments.clear()
+        self.nbytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        """It returns the counters of the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "segments": len(self._segments),
+            "bytes": self.nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _evict(self) -> None:
+        """It removes the least recently used segments above the memory cap."""
+        while self.nbytes > self.max_bytes:
+            _, segment = self._segments.popitem(last=False)
+            self.nbytes -= segment.nbytes
+            self.evictions += 1
@@ -0,0 +1,190 @@
+"""
+This module is responsible for bounding the telemetry waiting to be sent.
+"""
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Optional
+
+import numpy as np
+
+from .metrics import Metrics
+from .thingsboard_connector import ThingsboardConnector
+
+# Create a logger interface.
+logger = logging.getLogger(__name__)
+
+
+class SendQueue:
+    """This class queues the telemetry in front of a connector, and sends
+    it with a fixed number of worker tasks. It has the same
+    `send_telemetry_data_async` method as the connector, so it can be
+    used in place of it, e.g. by a `TelemetryBatcher`.
+
+    The queue holds at most `max_size` messages, so the memory stays flat
+    when the server slows down. When it is full, the "block" policy makes
+    the caller wait for room, and the "drop_oldest" policy drops the oldest
+    message to keep the newest data. The messages that fail to send are
+    counted and dropped, the connector handles the retries. The depth of
+    the queue and the dropped messages are recorded in `metrics`.
+
+    The messages are counted in `sent`, `failed` and `dropped` once their
+    fate is known. The telemetry packets they carry, several for a batch
+    of `TelemetryBatcher`, are counted the same way in `sent_packets`,
+    `failed_packets` and `dropped_packets`, and the values of the sent
+    packets in `sent_values`.
+    """
+
+    POLICIES = ("block", "drop_oldest")
+
+    def __init__(
+        self,
+        connector: ThingsboardConnector,
+        max_size: int = 1000,
+        policy: str = "block",
+        workers: Optional[int] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        """Initialize the class.
+
+        Parameters
+        ----------
+        connector : ThingsboardConnector
+            The connector used to send the messages.
+        max_size : int, optional
+            The maximum number of queued messages, by default 1000.
+        policy : str, optional
+            "block" or "drop_oldest", what to do when the queue is full, by default "block".
+        workers : Optional[int], optional
+            The number of messages sent at the same time, by default the
+            in-flight window of the connector, or 100.
+        metrics : Optional[Metrics], optional
+            The metrics of the queue, by default the registry of the process.
+        """
+        if max_size < 1:
+            raise ValueError("The queue size must be at least 1.")
+        if policy not in self.POLICIES:
+            raise ValueError(
+                f"Queue policy {policy} is not supported. "
+                f"Supported policies are {list(self.POLICIES)}"
+            )
+
+        self._connector = connector
+        self.max_size = max_size
+        self.policy = policy
+        self._worker_count = workers or getattr(connector, "max_in_flight", None) or 100
+        self._metrics = metrics or Metrics.default()
+
+        self._messages: deque[tuple[str, Any]] = deque()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._workers: list[asyncio.Task] = []
+        self._closing = False
+
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.sent_packets = 0
+        self.sent_values = 0
+        self.failed_packets = 0
+        self.dropped_packets = 0
+
+    async def __aenter__(self) -> "SendQueue":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    @staticmethod
+    def telemetry_size(data: Any) -> tuple[int, int]:
+        """It returns the number of packets and values of a telemetry
+        message, a packet of sensor buffers or a batch of timestamped
+        packets. A value that is not a buffer counts as one."""
+        packets = data if isinstance(data, list) else [{"values": data}]
+        return len(packets), sum(
+            len(values) if isinstance(values, (list, tuple, np.ndarray)) else 1
+            for packet in packets
+            for values in packet["values"].values()
+        )
+
+    @property
+    def depth(self) -> int:
+        """The number of messages waiting in the queue."""
+        return len(self._messages)
+
+    async def send_telemetry_data_async(self, device_token: str, data: Any) -> None:
+        """It queues the telemetry of a device. It returns as soon as the
+        message is queued, or waits for room with the "block" policy.
+
+        Parameters
+        ----------
+        device_token : str
+            The device token.
+        data : Any
+            The data to be sent.
+        """
+        if self._closing:
+            raise RuntimeError("The send queue is closed.")
+        if not self._workers:
+            self._workers = [
+                asyncio.get_running_loop().create_task(self._work())
+                for _ in range(self._worker_count)
+            ]
+
+        while len(self._messages) >= self.max_size:
+            if self.policy == "drop_oldest":
+                _, dropped = self._messages.popleft()
+                self.dropped += 1
+                self.dropped_packets += self.telemetry_size(dropped)[0]
+                self._metrics.increment("queue_dropped_total")
+                break
+            self._not_full.clear()
+            await self._not_full.wait()
+
+        self._messages.append((device_token, data))
+        self.max_depth = max(self.max_depth, len(self._messages))
+        self._metrics.set_gauge("queue_depth", len(self._messages))
+        self._not_empty.set()
+
+    async def close(self) -> None:
+        """It sends the queued messages and stops the workers."""
+        self._closing = True
+        self._not_empty.set()
+        if self._workers:
+            await asyncio.gather(*self._workers)
+            self._workers = []
+        logger.info("Send queue closed: %s", self.stats())
+
+    def stats(self) -> dict[str, int]:
+        """It returns the counters of the queue."""
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+    async def _work(self) -> None:
+        """It sends the queued messages until the queue is closed and empty."""
+        while True:
+            while not self._messages:
+                if self._closing:
+                    return
+                self._not_empty.clear()
+                await self._not_empty.wait()
+
+            device_token, data = self._messages.popleft()
+            self._metrics.set_gauge("queue_depth", len(self._messages))
+            self._not_full.set()
+            packets, values = self.telemetry_size(data)
+            try:
+                await self._connector.send_telemetry_data_async(device_token, data)
+                self.sent += 1
+                self.sent_packets += packets
+                self.sent_values += values
+            except Exception as error:  # pylint: disable=broad-except
+                self.failed += 1
+                self.failed_packets += packets
+                logger.debug("Failed to send queued telemetry: %s", error)
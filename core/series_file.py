@@ -0,0 +1,210 @@
+"""
+This module is responsible for the memory-mapped binary format of generated sensor series.
+"""
+import json
+import logging
+import struct
+import time
+from typing import Any, Optional
+
+import numpy as np
+
+from .data_generator import DataGenerator
+
+# Create a logger interface.
+logger = logging.getLogger(__name__)
+
+
+class SeriesFile:
+    """This class reads a memory-mapped series file.
+
+    The layout of a series file is:
+        - 8 bytes magic, b"PTAISER1"
+        - 4 bytes little endian length of the JSON header
+        - the JSON header with the function type, parameters and data
+          index of every sensor, and the byte offset of its samples
+        - for every sensor, its samples as a contiguous float32 or float64
+          array, starting at an offset aligned to 64 bytes
+
+    Sample `j` of a sensor was generated at the x value
+        start_index + (j // buffer_size) * buffer_size + (j % buffer_size) * step_size
+    following the bookkeeping of `DataGenerator`.
+    """
+
+    MAGIC = b"PTAISER1"
+    ALIGNMENT = 64
+
+    def __init__(self, path: str) -> None:
+        """Open a series file.
+
+        Parameters
+        ----------
+        path : str
+            The path of the series file.
+        """
+        self.path = path
+        with open(path, "rb") as series_file:
+            if series_file.read(len(self.MAGIC)) != self.MAGIC:
+                raise ValueError(f"{path} is not a series file.")
+            (header_length,) = struct.unpack("<I", series_file.read(4))
+            self.header: dict[str, Any] = json.loads(series_file.read(header_length))
+
+        self.samples: int = self.header["samples"]
+        self.dtype = np.dtype(self.header["dtype"])
+        self.sensors: dict[str, dict[str, Any]] = {
+            sensor["name"]: sensor for sensor in self.header["sensors"]
+        }
+        self._arrays: dict[str, np.memmap] = {}
+
+    def array(self, sensor: str) -> np.memmap:
+        """It returns the read-only memory map of all the samples of a sensor."""
+        if sensor not in self._arrays:
+            if sensor not in self.sensors:
+                raise KeyError(
+                    f"Sensor {sensor} is not in {self.path}. "
+                    f"Available sensors are {list(self.sensors)}"
+                )
+            self._arrays[sensor] = np.memmap(
+                self.path,
+                dtype=self.dtype,
+                mode="r",
+                offset=self.sensors[sensor]["offset"],
+                shape=(self.samples,),
+            )
+        return self._arrays[sensor]
+
+    def read(self, sensor: str, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """It returns the samples of a sensor in a range without copying them.
+
+        Parameters
+        ----------
+        sensor : str
+            The name of the sensor.
+        start : int, optional
+            The index of the first sample, by default 0.
+        stop : Optional[int], optional
+            The index after the last sample, by default the end of the file.
+
+        Returns
+        -------
+        np.ndarray
+            A read-only view of the samples.
+        """
+        return self.array(sensor)[start:stop]
+
+    def x_values(self, sensor: str, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """It returns the x values of the samples of a sensor in a range."""
+        stop = self.samples if stop is None else min(stop, self.samples)
+        indices = np.arange(start, stop)
+        buffer_size = self.header["buffer_size"]
+        return (
+            self.sensors[sensor]["start_index"]
+            + (indices // buffer_size) * buffer_size
+            + (indices % buffer_size) * self.header["step_size"]
+        )
+
+    @staticmethod
+    def write(
+        path: str,
+        generators: dict[str, DataGenerator],
+        total_samples: int,
+        step_size: float = 0.01,
+        error_percentage: int = 0,
+        dtype: Any = np.float32,
+        chunk_size: int = 1_000_000,
+    ) -> dict[str, float]:
+        """It generates the samples of every sensor into a new series file.
+
+        Parameters
+        ----------
+        path : str
+            The path of the series file.
+        generators : dict[str, DataGenerator]
+            The generators of the sensors by name. They must share the buffer size.
+        total_samples : int
+            The number of samples of every sensor.
+        step_size : float, optional
+            The step size of the generators, by default 0.01.
+        error_percentage : int, optional
+            The error percentage of the generators, by default 0.
+        dtype : Any, optional
+            np.float32 or np.float64, by default np.float32.
+        chunk_size : int, optional
+            The approximate number of samples generated at once, by default 1_000_000.
+
+        Returns
+        -------
+        dict[str, float]
+            The number of samples, the elapsed seconds and the samples per second.
+        """
+        dtype = np.dtype(dtype)
+        if dtype not in (np.dtype(np.float32), np.dtype(np.float64)):
+            raise ValueError("The series dtype must be float32 or float64.")
+
+        buffer_sizes = {generator.buffer_size for generator in generators.values()}
+        if len(buffer_sizes) != 1:
+            raise ValueError("The generators of a series file must share the buffer size.")
+        buffer_size = buffer_sizes.pop()
+
+        header: dict[str, Any] = {
+            "version": 1,
+            "dtype": dtype.name,
+            "samples": total_samples,
+            "buffer_size": buffer_size,
+            "step_size": step_size,
+            "error_percentage": error_percentage,
+            "sensors": [
+                {
+                    "name": name,
+                    "function_type": generator.function_type,
+                    "parameters": generator.function_parameters,
+                    "start_index": generator.data_index,
+                    "offset": 0,
+                }
+                for name, generator in generators.items()
+            ],
+        }
+
+        # The offsets change the header length, so reserve room for them.
+        array_bytes = total_samples * dtype.itemsize
+        reserved = len(json.dumps(header)) + 24 * len(generators)
+        offset = SeriesFile._align(len(SeriesFile.MAGIC) + 4 + reserved)
+        for sensor in header["sensors"]:
+            sensor["offset"] = offset
+            offset = SeriesFile._align(offset + array_bytes)
+
+        encoded_header = json.dumps(header).encode("utf-8")
+        with open(path, "wb") as series_file:
+            series_file.write(SeriesFile.MAGIC)
+            series_file.write(struct.pack("<I", len(encoded_header)))
+            series_file.write(encoded_header)
+            series_file.truncate(offset)
+
+        buffers_per_chunk = max(1, chunk_size // buffer_size)
+        start = time.perf_counter()
+        for sensor, generator in zip(header["sensors"], generators.values()):
+            array = np.memmap(
+                path, dtype=dtype, mode="r+", offset=sensor["offset"], shape=(total_samples,)
+            )
+            written = 0
+            while written < total_samples:
+                chunk = generator.generate_buffers(
+                    buffers_per_chunk, step_size, error_percentage
+                ).ravel()[: total_samples - written]
+                array[written : written + len(chunk)] = chunk
+                written += len(chunk)
+            array.flush()
+            del array
+        elapsed = time.perf_counter() - start
+
+        samples = total_samples * len(generators)
+        return {
+            "samples": samples,
+            "seconds": elapsed,
+            "samples_per_sec": samples / elapsed if elapsed > 0 else float("inf"),
+        }
+
+    @staticmethod
+    def _align(offset: int) -> int:
+        """It rounds an offset up to the alignment of the arrays."""
+        return -(-offset // SeriesFile.ALIGNMENT) * SeriesFile.ALIGNMENT
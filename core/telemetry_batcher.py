@@ -0,0 +1,142 @@
+"""
+This module is responsible for coalescing telemetry samples into batched requests.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Optional
+
+from .thingsboard_connector import ThingsboardConnector
+
+# Create a logger interface.
+logger = logging.getLogger(__name__)
+
+
+class TelemetryBatcher:
+    """This class buffers the telemetry of every device and sends it to
+    Thingsboard as a single request of timestamped samples:
+
+        [{"ts": 1692000000000, "values": {"e1": [...]}}, ...]
+
+    The buffer of a device is flushed when it holds `max_samples` samples,
+    or `max_delay` seconds after its first sample, whichever comes first.
+    Use it as an async context manager so the remaining samples are
+    flushed on exit.
+
+    The samples of the batches the connector accepted are counted in
+    `sent`, with their telemetry values in `values`, and the samples of
+    the batches it failed in `failed`. A failed flush is logged, except
+    an explicit `flush` call which raises.
+    """
+
+    def __init__(
+        self, connector: ThingsboardConnector, max_samples: int = 10, max_delay: float = 5.0
+    ) -> None:
+        """Initialize the class.
+
+        Parameters
+        ----------
+        connector : ThingsboardConnector
+            The connector used to send the batches.
+        max_samples : int, optional
+            The number of samples that triggers a flush, by default 10.
+        max_delay : float, optional
+            The maximum time a sample waits in the buffer in seconds, by default 5.0.
+        """
+        if max_samples < 1:
+            raise ValueError("The batch size must be at least 1.")
+
+        self._connector = connector
+        self._max_samples = max_samples
+        self._max_delay = max_delay
+
+        self._buffers: dict[str, list[dict[str, Any]]] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._flush_tasks: set[asyncio.Task] = set()
+
+        self.sent = 0
+        self.failed = 0
+        self.values = 0
+
+    async def __aenter__(self) -> "TelemetryBatcher":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def add(self, device_token: str, data: dict, timestamp: Optional[float] = None) -> None:
+        """It adds a telemetry sample to the buffer of a device.
+
+        Parameters
+        ----------
+        device_token : str
+            The device token.
+        data : dict
+            The telemetry values.
+        timestamp : Optional[float], optional
+            The time of the sample in seconds since epoch, by default now.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        buffer = self._buffers.setdefault(device_token, [])
+        buffer.append({"ts": int(timestamp * 1000), "values": data})
+
+        if len(buffer) >= self._max_samples:
+            try:
+                await self.flush(device_token)
+            except Exception as error:  # pylint: disable=broad-except
+                logger.warning("Failed to flush telemetry batch: %s", error)
+        elif len(buffer) == 1:
+            self._timers[device_token] = asyncio.get_running_loop().call_later(
+                self._max_delay, self._flush_later, device_token
+            )
+
+    async def flush(self, device_token: str) -> None:
+        """It sends the buffered samples of a device as a single request."""
+        timer = self._timers.pop(device_token, None)
+        if timer is not None:
+            timer.cancel()
+
+        batch = self._buffers.pop(device_token, None)
+        if batch:
+            try:
+                await self._connector.send_telemetry_data_async(device_token, batch)
+            except Exception:
+                self.failed += len(batch)
+                raise
+            self.sent += len(batch)
+            self.values += sum(
+                len(values) for sample in batch for values in sample["values"].values()
+            )
+
+    async def close(self) -> None:
+        """It flushes the buffers of all the devices."""
+        if self._flush_tasks:
+            await asyncio.wait(self._flush_tasks)
+
+        results = await asyncio.gather(
+            *(self.flush(device_token) for device_token in list(self._buffers)),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning("Failed to flush telemetry batch: %s", result)
+
+    @property
+    def pending_samples(self) -> int:
+        """The number of samples waiting in the buffers."""
+        return sum(len(buffer) for buffer in self._buffers.values())
+
+    def _flush_later(self, device_token: str) -> None:
+        """It starts the flush of a device whose delay elapsed."""
+        self._timers.pop(device_token, None)
+        task = asyncio.get_running_loop().create_task(self.flush(device_token))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._on_flushed)
+
+    def _on_flushed(self, task: asyncio.Task) -> None:
+        """It logs the failure of a timed flush."""
+        self._flush_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Failed to flush telemetry batch: %s", task.exception())
@@ -4,22 +4,124 @@ This module is responsible for communication with Thingsboard IoT platform.
 import asyncio
 import json
 import logging
+import random
+import time
 
-from typing import Any
+from typing import Any, Coroutine, Optional
 from aiocoap import Context, Message, Code
 from .abstractions import Device
+from .metrics import Metrics
+from .payload_encoder import JsonEncoder, PayloadEncoder
+from .token_store import TokenStore
+from .trace import TraceWriter
 
 # Create a logger interface.
 logger = logging.getLogger(__name__)
 
 
 class ThingsboardConnector:
-    """This class is responsible for communication with Thingsboard IoT platform."""
-    # @TODO: Clean up this class for its async methods.
-    # They must follow the best practices for Python.
+    """This class is responsible for communication with Thingsboard IoT platform.
+
+    The connector owns a single aiocoap client context for its whole lifetime,
+    so consecutive requests reuse the same socket instead of creating a new one
+    for every message. In async code, use it as an async context manager:
+
+        async with ThingsboardConnector(host, port) as connector:
+            await connector.send_telemetry_data_async(token, data)
+
+    The synchronous methods are thin wrappers that run the async methods on an
+    event loop owned by the connector. Call `shutdown` when done with them.
+    Do not mix both styles on the same instance, since the client context is
+    bound to the event loop it was created on.
+
+    With `max_in_flight`, at most that many requests wait for a response at
+    the same time, and the others wait for a free slot, so a slow server
+    slows the callers down instead of piling up requests. A request that
+    times out is retried up to `retries` times, after an exponential backoff
+    with jitter during which it does not hold a slot.
+
+    The telemetry is encoded by the given `PayloadEncoder`, as JSON by
+    default. The provision requests and the attributes are always JSON.
+    The URI of every resource is parsed once, and the options of the next
+    requests to it are copied from the parsed URI.
+
+    The requests, their round-trip and encode times, the payload bytes,
+    the timeouts, retries and failures are recorded in `metrics` by
+    message type: "provision", "telemetry" or "attribute". The responses
+    are only logged at the DEBUG level. With a `recorder`, every request
+    is also appended to its trace, see `TraceReplayer`.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        timeout: float = 60.0,
+        max_in_flight: Optional[int] = None,
+        retries: int = 0,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        encoder: Optional[PayloadEncoder] = None,
+        metrics: Optional[Metrics] = None,
+        recorder: Optional[TraceWriter] = None,
+    ):
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError("The in-flight window must be at least 1.")
 
-    def __init__(self, hostname: str, port: int):
         self._server_address: str = "coap://" + hostname + ":" + str(port)
+        self._timeout = timeout
+        self._retries = retries
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+
+        self._client_context: Optional[Context] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # The in-flight window and its counters.
+        self.max_in_flight = max_in_flight
+        self._window = None if max_in_flight is None else asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.timeouts = 0
+        self.retried = 0
+
+        # The encoder of the telemetry and the size of the encoded payloads.
+        self.encoder = encoder or JsonEncoder()
+        self.telemetry_messages = 0
+        self.telemetry_bytes = 0
+
+        self.metrics = metrics or Metrics.default()
+        self.recorder = recorder
+
+        # The remote and the URI options of the requested paths.
+        self._request_templates: dict[str, tuple[Any, dict[str, Any]]] = {}
+
+    async def __aenter__(self) -> "ThingsboardConnector":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def connect(self) -> None:
+        """It creates the client context if it does not exist yet."""
+        if self._client_context is None:
+            self._client_context = await Context.create_client_context()
+
+    async def close(self) -> None:
+        """It shuts down the client context."""
+        if self._client_context is not None:
+            await self._client_context.shutdown()
+            self._client_context = None
+
+    def shutdown(self) -> None:
+        """It shuts down the client context and the event loop used by
+        the synchronous methods."""
+        if self._loop is None:
+            return
+
+        self._loop.run_until_complete(self.close())
+        self._loop.close()
+        self._loop = None
 
     def request_provision(
         self, device_name: str, provision_key: str, provision_secret: str
@@ -40,8 +142,8 @@ class ThingsboardConnector:
         str
             The device token.
         """
-        return asyncio.run(
-            self._request_provision_async(device_name, provision_key, provision_secret)
+        return self._run(
+            self.request_provision_async(device_name, provision_key, provision_secret)
         )
 
     def send_telemetry_data(self, device_token: str, data: Any) -> None:
@@ -54,7 +156,7 @@ class ThingsboardConnector:
         data : Any
             The data to be sent.
         """
-        asyncio.run(self._send_telemetry_data_async(device_token, data))
+        self._run(self.send_telemetry_data_async(device_token, data))
 
     def send_attribute_data(self, device_token: str, data: Any) -> None:
         """It sends attribute data to Thingsboard.
@@ -66,11 +168,45 @@ class ThingsboardConnector:
         data : Any
             The data to be sent.
         """
-        asyncio.run(self._send_attribute_data_async(device_token, data))
+        self._run(self.send_attribute_data_async(device_token, data))
 
     def register_device(self, device: Device) -> None:
         """It registers a device on Thingsboard.
 
+        Parameters
+        ----------
+        device : Device
+            The device to be registered.
+        """
+        self._run(self.register_device_async(device))
+
+    def provision_devices(
+        self,
+        devices: list[Device],
+        concurrency: int = 100,
+        token_store: Optional[TokenStore] = None,
+    ) -> int:
+        """It registers many devices on Thingsboard concurrently.
+
+        Parameters
+        ----------
+        devices : list[Device]
+            The devices to be registered.
+        concurrency : int, optional
+            The maximum number of devices registered at the same time, by default 100.
+        token_store : Optional[TokenStore], optional
+            The store to read known tokens from and save new tokens to, by default None.
+
+        Returns
+        -------
+        int
+            The number of devices newly registered on Thingsboard.
+        """
+        return self._run(self.provision_devices_async(devices, concurrency, token_store))
+
+    async def register_device_async(self, device: Device) -> None:
+        """It registers a device on Thingsboard.
+
         Parameters
         ----------
         device : Device
@@ -78,102 +214,310 @@ class ThingsboardConnector:
         """
         # Request a token from Thingsboard.
         provision_info = device.get_provision_info()
-        token = self.request_provision(device.mac_address, provision_info[0], provision_info[1])
+        token = await self.request_provision_async(
+            device.mac_address, provision_info[0], provision_info[1]
+        )
+        if token is None:
+            raise Exception(
+                "[THINGSBOARD CLIENT] Cannot provision device %s!" % device.mac_address
+            )
         device.set_token(token)
 
         # Send the device attributes to Thingsboard.
-        self.send_attribute_data(token, device.to_dict())
+        await self.send_attribute_data_async(token, device.to_dict())
 
+    async def provision_devices_async(
+        self,
+        devices: list[Device],
+        concurrency: int = 100,
+        token_store: Optional[TokenStore] = None,
+    ) -> int:
+        """It registers many devices on Thingsboard concurrently.
 
-    async def _request_provision_async(
-        self, device_name, device_provision_key, device_provision_secret
-    ):
-        received_token = None
+        The devices that already have a token, or whose token is found in
+        the token store, are skipped without any request. The tokens of
+        the newly registered devices are saved to the token store.
 
-        client_context = await Context.create_client_context()
-        await asyncio.sleep(2)
-        try:
-            provision_request = {
-                "provisionDeviceKey": device_provision_key,
-                "provisionDeviceSecret": device_provision_secret,
-                "deviceName": device_name,
-            }
+        Parameters
+        ----------
+        devices : list[Device]
+            The devices to be registered.
+        concurrency : int, optional
+            The maximum number of devices registered at the same time, by default 100.
+        token_store : Optional[TokenStore], optional
+            The store to read known tokens from and save new tokens to, by default None.
 
-            msg = Message(
-                code=Code.POST,
-                payload=str.encode(json.dumps(provision_request)),
-                uri=self._server_address + "/api/v1/provision",
-            )
-            request = client_context.request(msg)
-            try:
-                response = await asyncio.wait_for(request.response, 60000)
-            except asyncio.TimeoutError:
-                raise Exception("Request timed out!")
-
-            if response is None:
-                raise Exception("Response is empty!")
-
-            decoded_response = json.loads(response.payload)
-            logging.info("Received response: %s", decoded_response)
-            received_token = decoded_response.get("credentialsValue")
-            if received_token is None:
-                logging.error("Failed to get access token from response.")
-                logging.error(decoded_response.get("errorMsg"))
-        except Exception as error:
-            logging.error(error)
-            raise error
-        finally:
-            await client_context.shutdown()
-            return received_token
-
-    async def _send_telemetry_data_async(self, device_token, data):
-        msg = Message(
-            code=Code.POST,
-            payload=str.encode(json.dumps(data)),
-            uri=self._server_address + ("/api/v1/%s/telemetry" % device_token),
+        Returns
+        -------
+        int
+            The number of devices newly registered on Thingsboard.
+        """
+        if concurrency < 1:
+            raise ValueError("The concurrency must be at least 1.")
+
+        pending: list[Device] = []
+        for device in devices:
+            if device.is_registered:
+                continue
+            if token_store is not None and device.mac_address in token_store:
+                device.set_token(token_store.get(device.mac_address))
+            else:
+                pending.append(device)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def provision(device: Device) -> bool:
+            async with semaphore:
+                try:
+                    await self.register_device_async(device)
+                except Exception as error:  # pylint: disable=broad-except
+                    if not device.is_registered:
+                        logger.warning("Failed to register %s: %s", device.mac_address, error)
+                        return False
+                    # The token is issued, keep it even if the attributes failed,
+                    # the platform rejects provisioning the same name again.
+                    logger.warning(
+                        "Registered %s but failed to send its attributes: %s",
+                        device.mac_address,
+                        error,
+                    )
+
+            if token_store is not None:
+                token_store.put(device.mac_address, device.get_token())
+            return True
+
+        results = await asyncio.gather(*(provision(device) for device in pending))
+        logger.info(
+            "Registered %d of %d devices, %d already had a token.",
+            sum(results),
+            len(pending),
+            len(devices) - len(pending),
         )
+        return sum(results)
 
-        client_context = await Context.create_client_context()
-        await asyncio.sleep(2)
+    async def request_provision_async(
+        self, device_name: str, provision_key: str, provision_secret: str
+    ) -> Optional[str]:
+        """It requests a device token from Thingsboard.
 
-        request = client_context.request(msg)
-        try:
-            response = await asyncio.wait_for(request.response, 60000)
-        except asyncio.TimeoutError:
-            raise Exception("Request timed out!")
-        finally:
-            await client_context.shutdown()
+        Parameters
+        ----------
+        device_name : str
+            The name of the device.
+        provision_key : str
+            Device provision key.
+        provision_secret : str
+            Device provision secret.
+
+        Returns
+        -------
+        Optional[str]
+            The device token, None if the platform did not return one.
+        """
+        provision_request = {
+            "provisionDeviceKey": provision_key,
+            "provisionDeviceSecret": provision_secret,
+            "deviceName": device_name,
+        }
+        response = await self._post("/api/v1/provision", provision_request, kind="provision")
 
-        if response:
-            logging.info("[THINGSBOARD CLIENT] Response from Thingsboard.")
-            logging.info(response)
+        if response is None:
+            raise Exception("Response is empty!")
+        if not response.code.is_successful():
+            raise Exception("Provision request failed with %s!" % response.code)
+
+        decoded_response = json.loads(response.payload)
+        logger.debug("Received response: %s", decoded_response)
+        received_token = decoded_response.get("credentialsValue")
+        if received_token is None:
+            logger.error("Failed to get access token from response.")
+            logger.error(decoded_response.get("errorMsg"))
+
+        return received_token
+
+    async def send_telemetry_data_async(self, device_token: str, data: Any) -> None:
+        """It sends telemetry data to Thingsboard.
+
+        Parameters
+        ----------
+        device_token : str
+            The device token.
+        data : Any
+            The data to be sent.
+        """
+        response = await self._post(
+            "/api/v1/%s/telemetry" % device_token, data, self.encoder, kind="telemetry"
+        )
+
+        if response is not None and response.code.is_successful():
+            logger.debug("[THINGSBOARD CLIENT] Response from Thingsboard: %s", response)
         else:
             raise Exception(
                 "[THINGSBOARD CLIENT] Cannot save telemetry with received credentials!"
             )
 
-    async def _send_attribute_data_async(self, device_token, data):
-        msg = Message(
-            code=Code.POST,
-            payload=str.encode(json.dumps(data)),
-            uri=self._server_address + ("/api/v1/%s/attributes" % device_token),
-        )
-
-        client_context = await Context.create_client_context()
-        await asyncio.sleep(2)
+    async def send_attribute_data_async(self, device_token: str, data: Any) -> None:
+        """It sends attribute data to Thingsboard.
 
-        request = client_context.request(msg)
-        try:
-            response = await asyncio.wait_for(request.response, 60000)
-        except asyncio.TimeoutError:
-            raise Exception("Request timed out!")
-        finally:
-            await client_context.shutdown()
+        Parameters
+        ----------
+        device_token : str
+            The device token.
+        data : Any
+            The data to be sent.
+        """
+        response = await self._post(
+            "/api/v1/%s/attributes" % device_token, data, kind="attribute"
+        )
 
-        if response:
-            logging.info("[THINGSBOARD CLIENT] Response from Thingsboard.")
-            logging.info(response)
+        if response is not None and response.code.is_successful():
+            logger.debug("[THINGSBOARD CLIENT] Response from Thingsboard: %s", response)
         else:
             raise Exception(
                 "[THINGSBOARD CLIENT] Cannot save attribute with received credentials!"
             )
+
+    async def _post(
+        self,
+        path: str,
+        data: Any,
+        encoder: Optional[PayloadEncoder] = None,
+        kind: str = "telemetry",
+    ) -> Message:
+        """It sends a POST request over the shared client context and
+        waits for the response.
+
+        Parameters
+        ----------
+        path : str
+            The path of the resource on the server.
+        data : Any
+            The data to be sent.
+        encoder : Optional[PayloadEncoder], optional
+            The encoder of the payload, by default JSON.
+        kind : str, optional
+            The message type of the metrics, by default "telemetry".
+
+        Returns
+        -------
+        Message
+            The response of the server.
+        """
+        await self.connect()
+
+        started = time.perf_counter()
+        if encoder is None:
+            payload, content_format = str.encode(json.dumps(data)), None
+        else:
+            payload, content_format = encoder.encode(data), encoder.CONTENT_FORMAT
+        self.metrics.observe("encode_seconds", time.perf_counter() - started, type=kind)
+        return await self.post_payload_async(path, payload, content_format, kind)
+
+    async def post_payload_async(
+        self,
+        path: str,
+        payload: bytes,
+        content_format: Optional[int] = None,
+        kind: str = "telemetry",
+    ) -> Message:
+        """It sends an encoded payload within the in-flight window, with
+        the retries, and waits for the response.
+
+        Parameters
+        ----------
+        path : str
+            The path of the resource on the server.
+        payload : bytes
+            The encoded payload.
+        content_format : Optional[int], optional
+            The CoAP content format of the payload, by default None.
+        kind : str, optional
+            The message type of the metrics, by default "telemetry".
+
+        Returns
+        -------
+        Message
+            The response of the server.
+        """
+        await self.connect()
+
+        if self.recorder is not None:
+            self.recorder.write(kind, path, payload, content_format)
+        self.metrics.increment("requests_total", type=kind)
+        self.metrics.increment("bytes_sent_total", len(payload), type=kind)
+        if kind == "telemetry":
+            self.telemetry_messages += 1
+            self.telemetry_bytes += len(payload)
+
+        for attempt in range(self._retries + 1):
+            if attempt > 0:
+                # Back off exponentially, with jitter so the retries of many
+                # requests that timed out together are spread out.
+                delay = min(self._max_backoff, self._backoff * 2 ** (attempt - 1))
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+                self.retried += 1
+                self.metrics.increment("retries_total", type=kind)
+
+            try:
+                response = await self._request(path, payload, content_format, kind)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                self.metrics.increment("timeouts_total", type=kind)
+                logger.debug("Request to %s timed out, attempt %d.", path, attempt + 1)
+                continue
+
+            if not response.code.is_successful():
+                self.metrics.increment("failures_total", type=kind)
+            return response
+
+        self.metrics.increment("failures_total", type=kind)
+        raise Exception("Request timed out!")
+
+    async def _request(
+        self,
+        path: str,
+        payload: bytes,
+        content_format: Optional[int] = None,
+        kind: str = "telemetry",
+    ) -> Message:
+        """It sends a single request within the in-flight window."""
+        if self._window is not None:
+            await self._window.acquire()
+        self.in_flight += 1
+        self.metrics.set_gauge("in_flight", self.in_flight)
+        started = time.perf_counter()
+        try:
+            remote, options = self._request_template(path)
+            msg = Message(code=Code.POST, payload=payload, **options)
+            msg.remote = remote
+            if content_format is not None:
+                msg.opt.content_format = content_format
+            request = self._client_context.request(msg)
+            response = await asyncio.wait_for(request.response, self._timeout)
+            self.metrics.observe("round_trip_seconds", time.perf_counter() - started, type=kind)
+            return response
+        finally:
+            self.in_flight -= 1
+            self.metrics.set_gauge("in_flight", self.in_flight)
+            if self._window is not None:
+                self._window.release()
+
+    def _request_template(self, path: str) -> tuple[Any, dict[str, Any]]:
+        """It returns the remote and the URI options of a path, parsing
+        the URI only the first time the path is requested."""
+        template = self._request_templates.get(path)
+        if template is None:
+            parsed = Message(uri=self._server_address + path)
+            options = {
+                name: getattr(parsed.opt, name)
+                for name in ("uri_host", "uri_port", "uri_path", "uri_query")
+                if getattr(parsed.opt, name)
+            }
+            template = self._request_templates[path] = (parsed.remote, options)
+        return template
+
+    def _run(self, coroutine: Coroutine) -> Any:
+        """It runs a coroutine on the event loop owned by the connector."""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coroutine)
@@ -0,0 +1,62 @@
+"""
+This module is responsible for keeping the device tokens on disk.
+"""
+import json
+import logging
+import os
+from typing import Optional
+
+# Create a logger interface.
+logger = logging.getLogger(__name__)
+
+
+class TokenStore:
+    """This class keeps the device tokens in an append-only JSONL file
+    keyed by MAC address, so registered devices do not have to be
+    provisioned again on the next run.
+
+    Every line of the file is a JSON object with the keys "mac_address"
+    and "token". When a MAC address appears more than once, the last
+    line wins.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._tokens: dict[str, str] = {}
+        self.load()
+
+    def load(self) -> None:
+        """It reads the tokens from the file, if the file exists."""
+        self._tokens.clear()
+        if not os.path.exists(self._path):
+            return
+
+        with open(self._path, "r", encoding="utf-8") as store_file:
+            for line_number, line in enumerate(store_file, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                    self._tokens[entry["mac_address"]] = entry["token"]
+                except (ValueError, KeyError):
+                    # A crash may leave a partially written last line.
+                    logger.warning("Skipping invalid line %d of %s.", line_number, self._path)
+
+        logger.debug("Loaded %d tokens from %s.", len(self._tokens), self._path)
+
+    def get(self, mac_address: str) -> Optional[str]:
+        """It returns the token of a device, None if it is not stored."""
+        return self._tokens.get(mac_address)
+
+    def put(self, mac_address: str, token: str) -> None:
+        """It stores the token of a device and appends it to the file."""
+        self._tokens[mac_address] = token
+        with open(self._path, "a", encoding="utf-8") as store_file:
+            store_file.write(json.dumps({"mac_address": mac_address, "token": token}) + "\n")
+
+    def __contains__(self, mac_address: str) -> bool:
+        return mac_address in self._tokens
+
+    def __len__(self) -> int:
+        return len(self._tokens)
@@ -0,0 +1,347 @@
+"""
+This module is responsible for recording the outgoing requests and replaying them.
+"""
+import asyncio
+import base64
+import gzip
+import heapq
+import json
+import logging
+import threading
+import time
+import zlib
+from typing import Any, Iterator, Optional
+
+from aiocoap import Code, Context, Message
+
+# Create a logger interface.
+logger = logging.getLogger(__name__)
+
+
+class TraceWriter:
+    """This class appends the outgoing requests of a connector to a gzip
+    compressed JSON lines trace. Every line is a request:
+
+        {"time": 1700000000.5, "kind": "telemetry", "token": "...",
+         "path": "/api/v1/.../telemetry", "format": 50, "payload": "<base64>"}
+
+    The payload is recorded as sent, after encoding, so a replay sends
+    the same bytes. Opening an existing trace appends to it.
+
+    The requests are buffered and written as a complete gzip member every
+    `flush_records` requests, and by a background thread every
+    `flush_interval` seconds, also when no request comes, and on close. A
+    crash loses at most the requests since the last flush, and leaves at
+    worst a partial member at the end of the trace, which the replay skips.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        compresslevel: int = 6,
+        flush_records: int = 1000,
+        flush_interval: float = 5.0,
+    ) -> None:
+        """Initialize the class.
+
+        Parameters
+        ----------
+        path : str
+            The path of the trace file.
+        compresslevel : int, optional
+            The gzip compression level, by default 6.
+        flush_records : int, optional
+            The number of requests between two flushes, by default 1000.
+        flush_interval : float, optional
+            The maximum time between two flushes in seconds, by default 5.0.
+        """
+        self.path = path
+        self.records = 0
+        self._compresslevel = compresslevel
+        self._flush_records = flush_records
+        self._flush_interval = flush_interval
+        self._lines: list[bytes] = []
+        self._lock = threading.Lock()
+        self._file = open(path, "ab")
+
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._flush_periodically, name="trace-flusher", daemon=True
+        )
+        self._flusher.start()
+
+    def __enter__(self) -> "TraceWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write(
+        self, kind: str, path: str, payload: bytes, content_format: Optional[int] = None
+    ) -> None:
+        """It appends a request to the trace.
+
+        Parameters
+        ----------
+        kind : str
+            The message type: "provision", "telemetry" or "attribute".
+        path : str
+            The path of the resource on the server.
+        payload : bytes
+            The encoded payload.
+        content_format : Optional[int], optional
+            The CoAP content format of the payload, by default None.
+        """
+        # The token is the third part of the device API paths.
+        parts = path.split("/")
+        record = {
+            "time": time.time(),
+            "kind": kind,
+            "token": parts[3] if kind != "provision" and len(parts) > 4 else None,
+            "path": path,
+            "format": content_format,
+            "payload": base64.b64encode(payload).decode("ascii"),
+        }
+        line = json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+        with self._lock:
+            self._lines.append(line)
+            self.records += 1
+            full = len(self._lines) >= self._flush_records
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        """It writes the buffered requests to the file as a gzip member."""
+        with self._lock:
+            if self._lines and not self._file.closed:
+                self._file.write(gzip.compress(b"".join(self._lines), self._compresslevel))
+                self._file.flush()
+                self._lines.clear()
+
+    def close(self) -> None:
+        """It stops the background flushes, writes the buffered requests
+        and closes the trace file."""
+        self._closed.set()
+        self._flusher.join()
+        self.flush()
+        self._file.close()
+
+    def _flush_periodically(self) -> None:
+        """It flushes the buffered requests every interval until closed."""
+        while not self._closed.wait(self._flush_interval):
+            self.flush()
+
+
+class CoapSender:
+    """This class posts the recorded payloads directly over CoAP, without
+    the window, retries and metrics of `ThingsboardConnector`. It has the
+    same `post_payload_async` method, so `TraceReplayer` can use either.
+    """
+
+    def __init__(self, hostname: str, port: int, timeout: float = 60.0) -> None:
+        self._server_address = "coap://" + hostname + ":" + str(port)
+        self._timeout = timeout
+        self._client_context: Optional[Context] = None
+
+    async def __aenter__(self) -> "CoapSender":
+        self._client_context = await Context.create_client_context()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._client_context.shutdown()
+        self._client_context = None
+
+    async def post_payload_async(
+        self,
+        path: str,
+        payload: bytes,
+        content_format: Optional[int] = None,
+        kind: str = "telemetry",
+    ) -> Message:
+        """It sends an encoded payload and waits for the response, see
+        `ThingsboardConnector.post_payload_async`."""
+        msg = Message(code=Code.POST, payload=payload, uri=self._server_address + path)
+        if content_format is not None:
+            msg.opt.content_format = content_format
+        request = self._client_context.request(msg)
+        return await asyncio.wait_for(request.response, self._timeout)
+
+
+class TraceReplayer:
+    """This class replays one or more traces at a speed relative to the
+    recording: 1 for real time, 10 for ten times faster, or 0 for as fast
+    as the sender allows.
+
+    The traces are streamed line by line and merged by time, and at most
+    `concurrency` requests are in flight, so the memory use does not
+    depend on the size of the traces. The requests keep their recorded
+    path, so the tokens must still be valid on the replayed server.
+    """
+
+    # The bytes read from a trace at once.
+    CHUNK_SIZE = 1 << 16
+
+    # The first bytes of a gzip member with deflate compression.
+    GZIP_MAGIC = b"\x1f\x8b\x08"
+
+    def __init__(self, paths: str | list[str], speed: float = 1.0, concurrency: int = 100) -> None:
+        """Initialize the class.
+
+        Parameters
+        ----------
+        paths : str | list[str]
+            The trace files, e.g. the traces of the workers of a fleet.
+        speed : float, optional
+            The replay speed relative to the recording, 0 for the maximum
+            speed, by default 1.0.
+        concurrency : int, optional
+            The maximum number of requests in flight, by default 100.
+        """
+        if speed < 0:
+            raise ValueError("The replay speed must not be negative.")
+        if concurrency < 1:
+            raise ValueError("The concurrency must be at least 1.")
+
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        self.speed = speed
+        self._concurrency = concurrency
+        self.sent = 0
+        self.failed = 0
+        self.elapsed = 0.0
+
+    def records(self) -> Iterator[dict[str, Any]]:
+        """It returns the requests of all the traces ordered by time."""
+        return heapq.merge(
+            *(self._read(path) for path in self.paths), key=lambda record: record["time"]
+        )
+
+    async def replay(self, sender: Any, kinds: Optional[list[str]] = None) -> dict[str, Any]:
+        """It sends the requests of the traces at the replay speed.
+
+        Parameters
+        ----------
+        sender : Any
+            A `ThingsboardConnector`, or a `CoapSender` to bypass the connector.
+        kinds : Optional[list[str]], optional
+            The message types to replay, by default all of them.
+
+        Returns
+        -------
+        dict[str, Any]
+            The counters of the replay, see `stats`.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self._concurrency)
+        pending: set[asyncio.Task] = set()
+        start = loop.time()
+        first = None
+
+        try:
+            for record in self.records():
+                if kinds is not None and record["kind"] not in kinds:
+                    continue
+                if first is None:
+                    first = record["time"]
+                if self.speed > 0:
+                    delay = start + (record["time"] - first) / self.speed - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+                await semaphore.acquire()
+                task = loop.create_task(self._send(sender, record, semaphore))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        finally:
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            self.elapsed = loop.time() - start
+
+        logger.info("Replay finished: %s", self.stats())
+        return self.stats()
+
+    def stats(self) -> dict[str, Any]:
+        """It returns the counters of the replay."""
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "elapsed": self.elapsed,
+            "requests_per_sec": self.sent / self.elapsed if self.elapsed > 0 else 0.0,
+        }
+
+    async def _send(
+        self, sender: Any, record: dict[str, Any], semaphore: asyncio.Semaphore
+    ) -> None:
+        """It sends a recorded request and releases the slot."""
+        try:
+            response = await sender.post_payload_async(
+                record["path"],
+                base64.b64decode(record["payload"]),
+                record["format"],
+                record["kind"],
+            )
+            if not response.code.is_successful():
+                raise Exception("Replayed request failed with %s!" % response.code)
+            self.sent += 1
+        except Exception as error:  # pylint: disable=broad-except
+            self.failed += 1
+            logger.debug("Failed to replay a request to %s: %s", record["path"], error)
+        finally:
+            semaphore.release()
+
+    @staticmethod
+    def _read(path: str) -> Iterator[dict[str, Any]]:
+        """It streams the requests of a trace, one gzip member at a time.
+        The requests of a member are only read once its checksum is
+        verified, and a damaged member, e.g. cut off by a crash, is skipped
+        up to the next member, e.g. the one appended by the next recording."""
+        with open(path, "rb") as trace_file:
+            # The file offset of the current member and of the next chunk.
+            member_start = offset = 0
+            decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+            member = []
+            while member_start >= 0:
+                data = trace_file.read(TraceReplayer.CHUNK_SIZE)
+                try:
+                    if not data:
+                        if offset == member_start:
+                            break
+                        raise EOFError("the member is truncated")
+                    while data:
+                        member.append(decompressor.decompress(data))
+                        if not decompressor.eof:
+                            offset += len(data)
+                            break
+                        # The member ended, the next one starts in the unused data.
+                        offset += len(data) - len(decompressor.unused_data)
+                        member_start = offset
+                        data = decompressor.unused_data
+                        decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+                        for line in b"".join(member).splitlines():
+                            if line.strip():
+                                yield json.loads(line)
+                        member = []
+                except (EOFError, zlib.error) as error:
+                    logger.warning(
+                        "Skipping the damaged trace %s at byte %d: %s", path, member_start, error
+                    )
+                    member_start = offset = TraceReplayer._next_member(trace_file, member_start)
+                    trace_file.seek(max(member_start, 0))
+                    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+                    member = []
+
+    @staticmethod
+    def _next_member(trace_file: Any, member_start: int) -> int:
+        """It returns the offset of the next gzip header after the start of
+        a member, -1 if there is none."""
+        trace_file.seek(member_start + 1)
+        position = member_start + 1
+        tail = b""
+        while True:
+            data = trace_file.read(TraceReplayer.CHUNK_SIZE)
+            if not data:
+                return -1
+            found = (tail + data).find(TraceReplayer.GZIP_MAGIC)
+            if found >= 0:
+                return position - len(tail) + found
+            position += len(data)
+            tail = data[-(len(TraceReplayer.GZIP_MAGIC) - 1) :]
@@ -0,0 +1,39 @@
+"""
+This module is responsible for plotting the generated data. It imports
+matplotlib only when a plot is requested, so the simulator does not pay
+for it at startup.
+"""
+
+
+class Visualizer:
+    """This class plots the functions of the data generator."""
+
+    @staticmethod
+    def plot(x_values: list, y_values: list, plot_type="linear") -> None:
+        """This function is used to plot the function.
+
+        Parameters
+        ----------
+        x_values : list
+            The inputs to the function.
+        y_values : list
+            The outputs of the function.
+        plot_type : str, optional
+            "linear", "exponantial", "dbscale", by default "linear"
+        """
+        try:
+            from matplotlib import pyplot as plt  # pylint: disable=import-outside-toplevel
+        except ImportError as error:
+            raise ImportError(
+                "Plotting requires matplotlib, install it with 'pip install matplotlib'."
+            ) from error
+
+        if plot_type == "linear":
+            # Plot the function in linear scale.
+            plt.plot(x_values, y_values)
+            plt.xlabel("x_values")
+            plt.ylabel("y_values")
+            plt.title("Linear Scale Plot of The Function")
+            plt.show()
+        else:
+            raise NotImplementedError
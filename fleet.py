@@ -0,0 +1,51 @@
+"""
+The entry point of the fleet simulator. It is responsible for:
+    - Reading the device count and the fleet spec file from the command line
+    - Sharding the simulated devices across worker processes
+    - Registering the devices without a stored token on the IoT platform
+    - Sending telemetry data of all the devices, one connector per worker
+"""
+import logging
+
+# Import all the core modules.
+from core import ConfigHandler, FleetPool, FleetSimulator
+
+# Create a custom logger interface.
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+logger = logging.getLogger(__name__)
+
+
+if __name__ == "__main__":
+    # Read the configurations.
+    config = ConfigHandler.read(fleet=True)
+
+    # Read the fleet spec, falling back to the provision key and
+    # secret of the configuration.
+    spec = FleetSimulator.load_spec(config["fleet_spec"])
+    spec.setdefault("provision_key", config["provision_key"])
+    spec.setdefault("provision_secret", config["provision_secret"])
+    if config["rate"] is not None:
+        # A constant target rate in the unit of the spec, messages by default.
+        unit = spec.get("rate", {}).get("unit", "messages")
+        spec["rate"] = {"target": config["rate"], "unit": unit}
+
+    # Run the fleet on the worker processes.
+    pool = FleetPool(
+        config["host"],
+        config["port"],
+        spec,
+        config["devices"],
+        config["workers"],
+        config["concurrency"],
+        config["seed"],
+        config["token_store"],
+        config["checkpoint"],
+        config["checkpoint_interval"],
+        config["metrics_port"],
+        config["metrics_interval"],
+        config["record"],
+    )
+    stats = pool.run(config["duration"])
+
+    logger.info("Fleet simulation finished: %s", stats.to_dict())
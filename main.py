@@ -4,14 +4,16 @@ The main file of the simulated device. It is responsible for:
     - Creating a simulated device
     - Registering the device on the IoT platform
     - Sending telemetry data to the IoT platform
+    - Profiling the loop for a bounded duration with --profile
 """
 import logging
 import random
 import time
+from contextlib import nullcontext
 
 # Import all the core modules.
 from core import ConfigHandler, DataGenerator
-from core import Device, ThingsboardConnector
+from core import Device, Profiler, ThingsboardConnector
 
 # Create a custom logger interface.
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -45,13 +47,33 @@ if __name__ == "__main__":
     sensor_1 = DataGenerator(5, "exponantial", {"base": 2.67, "offset": 25})
     sensor_2 = DataGenerator(3, "exponantial", {"base": 3.38, "shift": 0.12})
 
+    # When profiling, send back to back for the profile duration, and time
+    # the stages of the loop.
+    profiler = None
+    if config["profile"]:
+        profiler = Profiler(config["profile_output"], config["profile"])
+        deadline = time.monotonic() + config["profile_duration"]
+        profiler.start()
+    span = profiler.span if profiler is not None else lambda stage: nullcontext()
+
     # Send telemetry data to the IoT platform.
-    while True:
-        # Create formatted data to be sent to the ThingSpeak.
-        data_packet = device.get_formatted_data(
-        "e1", sensor_1.generate(1, 25),
-        "e2", sensor_2.generate(error_percentage=10),
-        )
-
-        connector.send_telemetry_data(device.get_token(), data_packet)
-        time.sleep(random.randint(10, 60))
+    try:
+        while True:
+            # Create formatted data to be sent to the ThingSpeak.
+            with span("generate"):
+                e1_values = sensor_1.generate(1, 25)
+                e2_values = sensor_2.generate(error_percentage=10)
+            with span("format"):
+                data_packet = device.get_formatted_data("e1", e1_values, "e2", e2_values)
+
+            with span("send"):
+                connector.send_telemetry_data(device.get_token(), data_packet)
+            if profiler is None:
+                time.sleep(random.randint(10, 60))
+            elif time.monotonic() >= deadline:
+                break
+    finally:
+        if profiler is not None:
+            profiler.stop()
+        # Release the connection of the connector.
+        connector.shutdown()
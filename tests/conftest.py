@@ -0,0 +1,53 @@
+"""
+Shared fixtures of the tests.
+"""
+import asyncio
+from typing import Callable, Optional
+
+import pytest
+
+from core.mock_server import MockThingsboardServer
+
+
+@pytest.fixture
+def free_port() -> Callable[..., int]:
+    """Return a function that finds a free port on localhost, see
+    `MockThingsboardServer.free_port`."""
+    return MockThingsboardServer.free_port
+
+
+class FakeConnector:
+    """A connector stand-in that records the telemetry it receives as
+    (token, data) pairs after an optional delay, or fails every request."""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False) -> None:
+        self.delay = delay
+        self.fail = fail
+        self.packets: list = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def send_telemetry_data_async(self, device_token, data) -> None:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.delay > 0:
+                await asyncio.sleep(self.delay)
+            if self.fail:
+                raise ConnectionError("unreachable")
+            self.packets.append((device_token, data))
+        finally:
+            self.in_flight -= 1
+
+    def by_token(self, token: Optional[str] = None) -> dict[str, list] | list:
+        """Return the received data grouped by token, or the data of one token."""
+        packets: dict[str, list] = {}
+        for device_token, data in self.packets:
+            packets.setdefault(device_token, []).append(data)
+        return packets if token is None else packets.get(token, [])
+
+
+@pytest.fixture
+def fake_connector() -> type[FakeConnector]:
+    """Return the class of the connector stand-in, see `FakeConnector`."""
+    return FakeConnector
@@ -0,0 +1,28 @@
+"""
+Tests for the throughput benchmark.
+"""
+from core.benchmark import Benchmark
+from core.functions import FunctionRegistry
+
+
+def test_functions_without_parameters_are_skipped(monkeypatch):
+    parameters = dict(Benchmark.FUNCTION_PARAMETERS)
+    del parameters["linear"]
+    monkeypatch.setattr(Benchmark, "FUNCTION_PARAMETERS", parameters)
+
+    results = Benchmark(min_time=0.001).run_generation([10])
+
+    functions = {result["function"] for result in results}
+    assert "linear" not in functions and "sinusoidal" in functions
+
+
+def test_benchmark_covers_every_function_and_encoding():
+    benchmark = Benchmark(min_time=0.001)
+
+    generation = benchmark.run_generation([10])
+    serialization = benchmark.run_serialization([10])
+    tick = benchmark.run_fleet_tick(100)
+
+    assert {result["function"] for result in generation} == set(FunctionRegistry.names())
+    assert {"json", "packed"} <= {result["encoding"] for result in serialization}
+    assert tick["generate_samples_per_sec"] > 0
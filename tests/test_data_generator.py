@@ -0,0 +1,68 @@
+"""
+Tests for the data generator.
+"""
+import json
+
+import numpy as np
+
+from core import DataGenerator
+
+
+def test_generate_matches_scalar_calculation():
+    generator = DataGenerator(50, "exponantial", {"base": 2.67, "shift": 0.12, "offset": 25})
+    expected = [round(generator.function.calculate(0.1 * i), 3) for i in range(50)]
+
+    assert np.allclose(generator.generate(0.1), expected, rtol=0, atol=1e-3)
+
+
+def test_generate_returns_list_or_array():
+    generator = DataGenerator(10, "exponantial", {"base": 2.0})
+
+    assert isinstance(generator.generate(), list)
+    assert isinstance(generator.generate(as_array=True), np.ndarray)
+
+
+def test_error_is_bounded_and_seeded():
+    parameters = {"base": 3.38, "offset": 10}
+    clean = DataGenerator(1000, "exponantial", parameters).generate(as_array=True)
+    first = DataGenerator(1000, "exponantial", parameters, seed=7).generate(
+        error_percentage=10, as_array=True
+    )
+    second = DataGenerator(1000, "exponantial", parameters, seed=7).generate(
+        error_percentage=10, as_array=True
+    )
+
+    assert np.array_equal(first, second)
+    assert np.all(np.abs(first - clean) <= np.abs(clean) * 0.1 + 1e-9)
+
+
+def test_restored_generator_continues_the_same_series():
+    parameters = {
+        "expression": {
+            "sum": [
+                {"function": "random_walk", "parameters": {"step": 0.5}},
+                {"function": "linear", "parameters": {"slope": 0.1}},
+            ]
+        }
+    }
+    faults = [
+        {"model": "stuck_at", "rate": 0.05, "duration": 20},
+        {"model": "bias_drift", "rate": 0.01},
+    ]
+    generator = DataGenerator(100, "composite", parameters, seed=3, faults=faults)
+    generator.generate(error_percentage=5)
+    state = json.loads(json.dumps(generator.checkpoint()))
+    expected = generator.generate_buffers(3, error_percentage=5)
+
+    resumed = DataGenerator(100, "composite", parameters, faults=faults)
+    resumed.restore(state)
+
+    assert np.array_equal(resumed.generate_buffers(3, error_percentage=5), expected, equal_nan=True)
+
+
+def test_derived_seeds_are_stable_and_distinct():
+    seed = DataGenerator.derive_seed(42, "02:00:00:00:00:01", "e1")
+
+    assert seed == DataGenerator.derive_seed(42, "02:00:00:00:00:01", "e1")
+    assert seed != DataGenerator.derive_seed(42, "02:00:00:00:00:02", "e1")
+    assert seed != DataGenerator.derive_seed(42, "02:00:00:00:00:01", "e2")
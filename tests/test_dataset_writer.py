@@ -0,0 +1,75 @@
+"""
+Tests for the chunked dataset writers.
+"""
+import numpy as np
+
+from core import DataGenerator
+from core.dataset_writer import DatasetWriter
+from core.series_file import SeriesFile
+
+PARAMETERS = {"base": 1.001, "offset": 2.0}
+
+
+def test_generate_buffers_matches_consecutive_buffers():
+    sequential = DataGenerator(7, "exponantial", PARAMETERS)
+    batched = DataGenerator(7, "exponantial", PARAMETERS)
+
+    expected = np.concatenate([sequential.generate(0.5, as_array=True) for _ in range(4)])
+
+    assert np.array_equal(batched.generate_buffers(4, 0.5).ravel(), expected)
+    assert batched.data_index == sequential.data_index
+
+
+def test_npy_stream_writes_exact_sample_count(tmp_path):
+    path = str(tmp_path / "data.npy")
+    with DatasetWriter.create("npy", path, 1003) as writer:
+        report = writer.stream(DataGenerator(10, "exponantial", PARAMETERS), 1003, chunk_size=100)
+
+    data = np.load(path)
+    expected = DataGenerator(10, "exponantial", PARAMETERS).generate_buffers(101).ravel()[:1003]
+
+    assert report["samples"] == 1003
+    assert np.array_equal(data, expected)
+
+
+def test_csv_stream_writes_header_and_rows(tmp_path):
+    path = tmp_path / "data.csv"
+    with DatasetWriter.create("csv", str(path), 25) as writer:
+        writer.stream(DataGenerator(4, "exponantial", PARAMETERS), 25, chunk_size=8)
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+
+    assert lines[0] == "sensor_data"
+    assert len(lines) == 26
+
+
+def test_csv_values_match_the_npy_values(tmp_path):
+    for dtype in (np.float64, np.float32):
+        csv_path = str(tmp_path / "data.csv")
+        npy_path = str(tmp_path / "data.npy")
+        for file_format, path in (("csv", csv_path), ("npy", npy_path)):
+            with DatasetWriter.create(file_format, path, 200, dtype=dtype) as writer:
+                writer.stream(DataGenerator(10, "exponantial", PARAMETERS), 200, chunk_size=50)
+
+        expected = np.load(npy_path)
+        data = np.loadtxt(csv_path, dtype=dtype, skiprows=1)
+
+        assert expected.dtype == dtype
+        assert np.array_equal(data, expected)
+
+
+def test_series_file_round_trip(tmp_path):
+    path = str(tmp_path / "data.series")
+    generators = {
+        "e1": DataGenerator(6, "exponantial", PARAMETERS),
+        "e2": DataGenerator(6, "exponantial", {"base": 1.01}, data_index=60),
+    }
+    SeriesFile.write(path, generators, 100, step_size=0.5, dtype=np.float64, chunk_size=12)
+
+    series = SeriesFile(path)
+    expected = DataGenerator(6, "exponantial", {"base": 1.01}, data_index=60).generate_buffers(17, 0.5)
+
+    assert series.sensors["e2"]["offset"] % SeriesFile.ALIGNMENT == 0
+    assert np.array_equal(series.read("e2", 10, 20), expected.ravel()[10:20])
+    assert np.array_equal(series.x_values("e2", 5, 8), [62.5, 66.0, 66.5])
+    assert isinstance(series.read("e1", 0, 5), np.memmap)
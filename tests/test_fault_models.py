@@ -0,0 +1,68 @@
+"""
+Tests for the fault models.
+"""
+import json
+
+import numpy as np
+import pytest
+
+from core import DataGenerator
+from core.fault_models import (
+    BiasDrift, Dropout, FaultChain, FaultModel, GaussianNoise, PercentageError, Spikes, StuckAt,
+)
+
+
+def test_spikes_change_only_masked_samples():
+    y_values = np.zeros(10_000)
+    faulty, mask = Spikes(rate=0.05, magnitude=3.0).apply(y_values, np.random.default_rng(0))
+
+    assert 300 < mask.sum() < 700
+    assert np.all(np.abs(faulty[mask]) == 3.0)
+    assert np.all(faulty[~mask] == 0.0)
+
+
+def test_stuck_at_holds_value_across_arrays():
+    model = StuckAt(rate=0.0, duration=5)
+    model._remaining, model._stuck_value = 3, 7.0
+    faulty, mask = model.apply(np.arange(4.0), np.random.default_rng(0))
+
+    assert faulty.tolist() == [7.0, 7.0, 7.0, 3.0]
+    assert mask.tolist() == [True, True, True, False]
+
+
+def test_bias_drift_grows_across_arrays():
+    model = BiasDrift(rate=0.5, start=2)
+    first, _ = model.apply(np.zeros(3), np.random.default_rng(0))
+    second, mask = model.apply(np.zeros(2), np.random.default_rng(0))
+
+    assert first.tolist() == [0.0, 0.0, 0.5]
+    assert second.tolist() == [1.0, 1.5]
+    assert mask.all()
+
+
+def test_chain_flags_every_model():
+    chain = FaultChain.create([
+        {"model": "gaussian", "std": 0.1},
+        {"model": "dropout", "rate": 0.5},
+    ])
+    faulty, mask = chain.apply(np.ones(1000), np.random.default_rng(0))
+
+    assert np.all(mask & GaussianNoise.FLAG)
+    assert np.array_equal((mask & Dropout.FLAG) > 0, np.isnan(faulty))
+
+
+def test_generator_returns_mask_and_json_ready_dropouts():
+    generator = DataGenerator(
+        200, "linear", {"offset": 10.0}, seed=3, faults=[{"model": "dropout", "rate": 0.2}]
+    )
+    values, mask = generator.generate(error_percentage=5, with_mask=True)
+
+    assert None in values
+    json.dumps(values, allow_nan=False)
+    assert [value is None for value in values] == ((mask & Dropout.FLAG) > 0).tolist()
+    assert np.any(mask & PercentageError.FLAG)
+
+
+def test_unknown_fault_model_is_rejected():
+    with pytest.raises(ValueError, match="not supported"):
+        FaultModel.create({"model": "gremlins"})
@@ -0,0 +1,81 @@
+"""
+Tests for the vectorized fleet engine.
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from core import FleetEngine, FleetPool, FleetSimulator, FleetStore, SendQueue, TelemetryBatcher
+
+SPEC = {
+    "interval": 0.1,
+    "sensors": [
+        {"name": "e1", "function_type": "linear", "parameters": {"slope": 1.0}},
+        {"name": "e2", "function_type": "sinusoidal", "parameters": {"amplitude": 2.0}},
+    ],
+}
+
+
+def test_tick_generates_only_the_due_devices(fake_connector):
+    store = FleetStore(SPEC, 100, seed=0)
+    engine = FleetEngine(fake_connector(), store)
+    due = np.flatnonzero(store.next_send <= 0.05)
+
+    rows, buffers = engine.tick(0.05)
+
+    assert np.array_equal(rows, due)
+    assert buffers["e1"].shape == (len(rows), 5)
+    assert np.all(store.next_send[rows] > 0.1)
+
+
+def test_engine_sends_every_registered_device_at_its_interval(fake_connector):
+    count = 50
+    spec = dict(SPEC)
+    spec["tokens"] = {
+        FleetSimulator.mac_address("02:00:00", index): f"token-{index}"
+        for index in range(count - 1)
+    }
+    store = FleetStore(spec, count, seed=0)
+    connector = fake_connector()
+
+    stats = asyncio.run(FleetEngine(connector, store).run(0.35))
+
+    assert len(connector.by_token()) == count - 1
+    assert all(3 <= len(packets) <= 4 for packets in connector.by_token().values())
+    assert stats.sent == len(connector.packets)
+    assert stats.samples == stats.sent * 10
+    first, second = connector.by_token("token-0")[:2]
+    assert first["e1"].tolist() == [0.0, 0.01, 0.02, 0.03, 0.04]
+    assert second["e1"][0] == pytest.approx(5.0)
+
+
+def test_batched_packets_are_counted_when_their_batch_fails(fake_connector):
+    spec = dict(SPEC)
+    spec["tokens"] = {FleetSimulator.mac_address("02:00:00", index): "token" for index in range(10)}
+    store = FleetStore(spec, 10, seed=0)
+    batcher = TelemetryBatcher(fake_connector(fail=True), max_samples=2, max_delay=0.1)
+
+    stats = asyncio.run(FleetEngine(fake_connector(fail=True), store, batcher=batcher).run(0.35))
+
+    assert stats.sent == 0 and stats.samples == 0
+    assert stats.failed == batcher.failed > 0
+
+
+def test_queued_packets_are_counted_once_delivered(fake_connector):
+    spec = dict(SPEC)
+    spec["tokens"] = {FleetSimulator.mac_address("02:00:00", index): "token" for index in range(10)}
+    store = FleetStore(spec, 10, seed=0)
+    queue = SendQueue(fake_connector(fail=True), workers=1)
+
+    stats = asyncio.run(FleetEngine(fake_connector(fail=True), store, queue=queue).run(0.35))
+
+    assert stats.sent == 0 and stats.samples == 0
+    assert stats.failed == queue.failed > 0
+
+
+def test_store_engine_rejects_rate_pacing():
+    spec = dict(SPEC, engine="store", rate={"target": 10})
+
+    with pytest.raises(ValueError):
+        FleetPool("127.0.0.1", 5683, spec, 10)
@@ -0,0 +1,102 @@
+"""
+Tests for the fleet simulator.
+"""
+import asyncio
+
+from core import FleetPool, FleetSimulator, SendQueue, TelemetryBatcher
+
+SPEC = {
+    "interval": 0.2,
+    "jitter": 0.05,
+    "sensors": [{"name": "e1", "function_type": "exponantial", "parameters": {"base": 2.0}}],
+}
+
+
+def test_fleet_sends_for_every_device_within_concurrency_cap(fake_connector):
+    members = FleetSimulator.build_members(SPEC, 50)
+    for member in members:
+        member.device.set_token("token-" + member.device.mac_address)
+
+    connector = fake_connector(delay=0.01)
+    simulator = FleetSimulator(connector, members, concurrency=8, seed=1)
+    stats = asyncio.run(simulator.run(duration=0.5))
+
+    assert stats.sent == len(connector.packets) > 0
+    assert stats.failed == 0
+    assert connector.max_in_flight <= 8
+    assert {token for token, _ in connector.packets} == {
+        "token-" + member.device.mac_address for member in members
+    }
+
+
+def test_batched_packets_are_counted_when_their_batch_fails(fake_connector):
+    members = FleetSimulator.build_members(SPEC, 10)
+    for member in members:
+        member.device.set_token("token-" + member.device.mac_address)
+
+    batcher = TelemetryBatcher(fake_connector(fail=True), max_samples=2, max_delay=0.1)
+    simulator = FleetSimulator(fake_connector(fail=True), members, batcher=batcher, seed=1)
+    stats = asyncio.run(simulator.run(duration=0.5))
+
+    assert stats.sent == 0 and stats.samples == 0
+    assert stats.failed == batcher.failed > 0
+
+
+def test_queued_packets_are_counted_once_delivered_or_dropped(fake_connector):
+    members = FleetSimulator.build_members(dict(SPEC, interval=0.02, jitter=0.0), 20)
+    for member in members:
+        member.device.set_token("token-" + member.device.mac_address)
+
+    connector = fake_connector(delay=0.01)
+    queue = SendQueue(connector, max_size=2, policy="drop_oldest", workers=1)
+    simulator = FleetSimulator(connector, members, queue=queue, seed=1)
+    stats = asyncio.run(simulator.run(duration=0.3))
+
+    assert stats.sent == len(connector.packets) == queue.sent
+    assert stats.dropped == queue.dropped > 0
+    assert stats.failed == 0
+
+
+def test_batches_behind_a_queue_are_counted_once_delivered(fake_connector):
+    members = FleetSimulator.build_members(SPEC, 10)
+    for member in members:
+        member.device.set_token("token-" + member.device.mac_address)
+
+    queue = SendQueue(fake_connector(fail=True), workers=1)
+    batcher = TelemetryBatcher(queue, max_samples=2, max_delay=0.1)
+    simulator = FleetSimulator(queue, members, batcher=batcher, queue=queue, seed=1)
+    stats = asyncio.run(simulator.run(duration=0.5))
+
+    assert batcher.sent > 0
+    assert stats.sent == 0 and stats.samples == 0
+    assert stats.failed == batcher.sent == queue.failed_packets
+
+
+def test_mac_addresses_are_unique():
+    members = FleetSimulator.build_members(SPEC, 300, first_index=1000)
+
+    assert len({member.device.mac_address for member in members}) == 300
+
+
+def test_shards_cover_the_fleet_once():
+    shards = FleetPool.shard(10, 3)
+
+    assert shards == [(0, 4), (4, 3), (7, 3)]
+
+
+def test_fleet_resumes_from_checkpoint(tmp_path, fake_connector):
+    spec = {
+        "interval": 0.2,
+        "sensors": [{"name": "w", "function_type": "random_walk", "parameters": {"step": 1.0}}],
+    }
+    path = str(tmp_path / "fleet.ckpt")
+    simulator = FleetSimulator(fake_connector(), FleetSimulator.build_members(spec, 5, seed=9))
+    for member in simulator.members:
+        member.next_packet()
+    simulator.save_checkpoint(path)
+    expected = [member.next_packet() for member in simulator.members]
+
+    resumed = FleetSimulator(fake_connector(), FleetSimulator.build_members(spec, 5, seed=9))
+
+    assert resumed.load_checkpoint(path) == 5
+    assert [member.next_packet() for member in resumed.members] == expected
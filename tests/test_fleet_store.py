@@ -0,0 +1,69 @@
+"""
+Tests for the structure-of-arrays fleet store.
+"""
+import numpy as np
+import pytest
+
+from core import DataGenerator, Device, FleetSimulator, FleetStore
+
+SPEC = {
+    "sensors": [
+        {"name": "e1", "function_type": "exponantial", "parameters": {"base": 1.01}},
+        {
+            "name": "e2",
+            "function_type": "sinusoidal",
+            "parameters": {"amplitude": 2.0, "frequency": 0.1},
+            "parameter_spread": {"amplitude": 0.5},
+        },
+    ]
+}
+
+
+def test_devices_have_no_instance_dictionary():
+    assert not hasattr(Device("02:00:00:00:00:01"), "__dict__")
+
+
+def test_store_takes_less_than_128_bytes_per_device():
+    count = 10_000
+    spec = dict(SPEC)
+    spec["tokens"] = {
+        FleetSimulator.mac_address("02:00:00", index): "%020d" % index for index in range(count)
+    }
+    store = FleetStore(spec, count, seed=0)
+
+    assert len(store.registered) == count
+    assert store.bytes_per_device() < 128
+
+
+def test_generate_advances_only_the_given_devices():
+    store = FleetStore(SPEC, 10, seed=0)
+    expected = DataGenerator(5, "exponantial", {"base": 1.01}).generate(as_array=True)
+
+    first = store.generate(np.array([2, 7]))
+    second = store.generate(np.array([2]))
+
+    assert np.allclose(first["e1"], expected)
+    assert first["e2"].shape == (2, 5)
+    assert not np.allclose(second["e1"][0], expected)
+    assert store.sensors[0].data_index.tolist() == [0, 0, 10, 0, 0, 0, 0, 5, 0, 0]
+    assert len(set(store.sensors[1].parameters["amplitude"].tolist())) == 10
+
+
+def test_devices_do_not_depend_on_the_shard():
+    spec = dict(SPEC, interval=1.0)
+    whole = FleetStore(spec, 10, seed=3)
+    shard = FleetStore(spec, 4, first_index=6, seed=3)
+
+    assert np.array_equal(shard.next_send, whole.next_send[6:])
+    assert np.array_equal(
+        shard.sensors[1].parameters["amplitude"], whole.sensors[1].parameters["amplitude"][6:]
+    )
+    assert np.all((whole.next_send >= 0) & (whole.next_send < 1.0))
+    assert np.all(np.abs(whole.sensors[1].parameters["amplitude"] - 2.0) <= 1.0)
+
+
+def test_random_functions_are_rejected():
+    spec = {"sensors": [{"name": "w", "function_type": "random_walk", "parameters": {}}]}
+
+    with pytest.raises(ValueError):
+        FleetStore(spec, 10)
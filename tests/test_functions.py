@@ -0,0 +1,112 @@
+"""
+Tests for the function implementations and their registry.
+"""
+import numpy as np
+import pytest
+
+from core import DataGenerator
+from core.functions import FunctionRegistry
+
+PARAMETERS = {
+    "exponantial": {"base": 1.5, "shift": 0.2, "offset": 3.0},
+    "linear": {"slope": -2.0, "offset": 1.0},
+    "sinusoidal": {"amplitude": 2.0, "frequency": 0.1, "phase": 0.3, "offset": 1.0},
+    "polynomial": {"coefficients": [1.0, 2.0, 0.0, 0.5]},
+    "logistic": {"maximum": 10.0, "rate": 0.5, "midpoint": 2.0, "offset": 1.0},
+    "sawtooth": {"amplitude": 4.0, "period": 2.5, "phase": 0.1, "offset": -1.0},
+}
+
+
+@pytest.mark.parametrize("name", sorted(PARAMETERS))
+def test_array_matches_scalar_and_inverse(name):
+    function = FunctionRegistry.create(name, PARAMETERS[name])
+    x_values = np.linspace(0.0, 0.9, 10)
+
+    y_values = function.calculate_array(x_values)
+
+    assert np.allclose(y_values, [function.calculate(x) for x in x_values])
+    assert np.allclose([function.inverse(y) for y in y_values], x_values)
+
+
+def test_every_function_type_is_registered():
+    assert set(PARAMETERS) | {"random_walk"} <= set(FunctionRegistry.names())
+
+
+def test_random_walk_continues_across_buffers():
+    generator = DataGenerator(100, "random_walk", {"step": 0.5, "offset": 10.0, "seed": 1})
+    first, second = generator.generate(as_array=True), generator.generate(as_array=True)
+
+    assert abs(second[0] - first[-1]) < 5.0
+    assert not np.array_equal(first, second)
+
+
+def test_random_walk_is_not_invertible():
+    function = FunctionRegistry.create("random_walk", {"step": 0.5, "seed": 1})
+
+    with pytest.raises(ValueError, match="not invertible"):
+        function.inverse(1.0)
+
+
+def test_composite_is_not_invertible():
+    expression = {"sum": [{"function": "linear", "parameters": {}}, {"constant": 1.0}]}
+    function = FunctionRegistry.create("composite", {"expression": expression})
+
+    with pytest.raises(ValueError, match="not invertible"):
+        function.inverse(1.0)
+
+
+def test_parameters_are_validated():
+    with pytest.raises(ValueError, match="not supported"):
+        DataGenerator(5, "unknown", {})
+    with pytest.raises(ValueError, match="Parameter slope"):
+        DataGenerator(5, "exponantial", {"base": 2.0, "slope": 1.0})
+    with pytest.raises(ValueError, match="required"):
+        DataGenerator(5, "exponantial", {"offset": 1.0})
+
+
+def test_register_rejects_classes_not_following_the_interface():
+    with pytest.raises(TypeError):
+        FunctionRegistry.register("broken")(object)
+
+
+def test_composite_matches_nested_evaluation():
+    expression = {
+        "sum": [
+            {"function": "linear", "parameters": {"slope": 0.1, "offset": 20.0}},
+            {"constant": 1.0},
+            {
+                "product": [
+                    {"constant": 2.0},
+                    {"shift": 3.0, "expression": {"function": "sinusoidal", "parameters": {"frequency": 0.2}}},
+                    {"sum": [{"constant": 1.0}, {"constant": 0.5}]},
+                ]
+            },
+        ]
+    }
+    function = FunctionRegistry.create("composite", {"expression": expression})
+    linear = FunctionRegistry.create("linear", {"slope": 0.1, "offset": 20.0})
+    sinusoidal = FunctionRegistry.create("sinusoidal", {"frequency": 0.2})
+    x_values = np.linspace(0.0, 20.0, 50)
+
+    expected = linear.calculate_array(x_values) + 1.0 + 3.0 * sinusoidal.calculate_array(x_values - 3.0)
+
+    assert np.allclose(function.calculate_array(x_values), expected)
+    assert np.isclose(
+        function.calculate(7.0), linear.calculate(7.0) + 1.0 + 3.0 * sinusoidal.calculate(4.0)
+    )
+
+
+def test_piecewise_switches_regime_by_x_range():
+    expression = {
+        "shift": 1.0,
+        "expression": {
+            "piecewise": [
+                {"until": 2.0, "expression": {"constant": -1.0}},
+                {"until": 4.0, "expression": {"function": "linear", "parameters": {}}},
+                {"expression": {"constant": 9.0}},
+            ]
+        },
+    }
+    generator = DataGenerator(8, "composite", {"expression": expression})
+
+    assert generator.generate(1.0) == [-1.0, -1.0, -1.0, 2.0, 3.0, 9.0, 9.0, 9.0]
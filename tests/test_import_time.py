@@ -0,0 +1,36 @@
+"""
+Tests for the startup cost of the core package.
+"""
+import os
+import subprocess
+import sys
+
+# The maximum time `import core` may take in a fresh interpreter.
+IMPORT_BUDGET_SECONDS = 1.0
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import core
+print(time.perf_counter() - start, "matplotlib" in sys.modules)
+"""
+
+
+def import_core() -> tuple[float, bool]:
+    """Import core in a fresh interpreter and return the import time and
+    whether matplotlib was loaded."""
+    elapsed, matplotlib_loaded = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout.split()
+    return float(elapsed), matplotlib_loaded == "True"
+
+
+def test_import_core_does_not_load_matplotlib():
+    assert not import_core()[1]
+
+
+def test_import_core_is_within_budget():
+    # Take the best of a few runs to tolerate a cold file cache.
+    assert min(import_core()[0] for _ in range(3)) < IMPORT_BUDGET_SECONDS
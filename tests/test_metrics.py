@@ -0,0 +1,77 @@
+"""
+Tests for the metrics of the simulator.
+"""
+import asyncio
+import socket
+
+from core import Device, Metrics, ThingsboardConnector
+from core.mock_server import MockThingsboardServer
+
+
+def test_render_uses_the_prometheus_text_format():
+    metrics = Metrics()
+    metrics.increment("requests_total", type="telemetry")
+    metrics.increment("requests_total", 2, type="telemetry")
+    metrics.set_gauge("queue_depth", 7)
+    for value in (0.0002, 0.003, 0.003, 20.0):
+        metrics.observe("round_trip_seconds", value, type="telemetry")
+
+    text = metrics.render()
+
+    assert "# TYPE simulator_requests_total counter" in text
+    assert 'simulator_requests_total{type="telemetry"} 3' in text
+    assert "simulator_queue_depth 7" in text
+    assert 'simulator_round_trip_seconds_bucket{type="telemetry",le="0.005"} 3' in text
+    assert 'simulator_round_trip_seconds_bucket{type="telemetry",le="+Inf"} 4' in text
+    assert 'simulator_round_trip_seconds_count{type="telemetry"} 4' in text
+    assert metrics.histogram("round_trip_seconds", type="telemetry").quantile(0.5) == 0.005
+    assert 'round_trip_seconds{type="telemetry"}=n:4,p50:5ms' in metrics.summary()
+
+
+def test_connector_records_the_requests_by_message_type(free_port):
+    port = free_port()
+    metrics = Metrics()
+
+    async def scenario():
+        async with MockThingsboardServer(port=port):
+            async with ThingsboardConnector("127.0.0.1", port, metrics=metrics) as connector:
+                device = Device("02:00:00:00:00:01")
+                device.set_provision_key("key")
+                device.set_provision_secret("secret")
+                await connector.register_device_async(device)
+                for _ in range(3):
+                    await connector.send_telemetry_data_async(device.get_token(), {"e1": [1.5]})
+
+    asyncio.run(scenario())
+
+    assert metrics.counter("requests_total", type="provision") == 1
+    assert metrics.counter("requests_total", type="attribute") == 1
+    assert metrics.counter("requests_total", type="telemetry") == 3
+    assert metrics.counter("bytes_sent_total", type="telemetry") == 3 * len(b'{"e1":[1.5]}')
+    assert metrics.histogram("round_trip_seconds", type="telemetry").count == 3
+    assert metrics.histogram("encode_seconds", type="telemetry").count == 3
+    assert metrics.gauge("in_flight") == 0
+
+
+def test_metrics_are_served_over_http(free_port):
+    port = free_port(socket.SOCK_STREAM)
+    metrics = Metrics()
+    metrics.increment("timeouts_total", type="telemetry")
+
+    async def scrape(path: str) -> bytes:
+        server = await metrics.serve(port=port)
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+            response = await reader.read()
+            writer.close()
+            return response
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    response = asyncio.run(scrape("/metrics"))
+
+    assert response.startswith(b"HTTP/1.1 200 OK")
+    assert b'simulator_timeouts_total{type="telemetry"} 1' in response
+    assert asyncio.run(scrape("/")).startswith(b"HTTP/1.1 404")
@@ -0,0 +1,69 @@
+"""
+Tests for the payload encoders.
+"""
+import math
+
+import pytest
+
+from core import FleetPool, PayloadEncoder
+
+DATA = {"e1": [25.125, 26.5, None], "e2": [1.0, 2.0]}
+
+
+def test_packed_round_trip_keeps_missing_samples():
+    encoder = PayloadEncoder.create("packed")
+    payload = encoder.encode(DATA)
+    decoded = encoder.decode(payload)
+
+    assert len(payload) == 2 + (1 + 2 + 2 + 3 * 4) + (1 + 2 + 2 + 2 * 4)
+    assert decoded["e1"][:2] == [25.125, 26.5]
+    assert math.isnan(decoded["e1"][2])
+    assert decoded["e2"] == [1.0, 2.0]
+
+
+def test_packed_limits_are_checked():
+    encoder = PayloadEncoder.create({"format": "packed", "dtype": "float64"})
+    long_buffer = {"e1": [float(index) for index in range(100_000)], "e2": [1.0]}
+
+    payload = encoder.encode(long_buffer)
+
+    assert payload[0] == 4
+    assert len(payload) == 2 + (1 + 2 + 4 + 100_000 * 8) + (1 + 2 + 4 + 8)
+    assert encoder.decode(payload) == long_buffer
+    with pytest.raises(ValueError):
+        encoder.encode({f"e{index}": [1.0] for index in range(256)})
+    with pytest.raises(ValueError):
+        encoder.encode({"e" * 256: [1.0]})
+
+
+def test_packed_encoding_cannot_be_batched():
+    for encoding in ("packed", {"format": "packed", "dtype": "float64"}):
+        spec = {"interval": 1.0, "sensors": [], "encoding": encoding, "batch_size": 10}
+        with pytest.raises(ValueError):
+            FleetPool("127.0.0.1", 5683, spec, 10)
+
+
+def test_json_precision_shortens_the_payload():
+    data = {"e1": [1.23456789, 9.87654321]}
+    exact = PayloadEncoder.create("json")
+    rounded = PayloadEncoder.create({"format": "json", "precision": 2})
+
+    assert rounded.decode(rounded.encode(data)) == {"e1": [1.23, 9.88]}
+    assert len(rounded.encode(data)) < len(exact.encode(data))
+
+
+def test_cbor_is_smaller_than_json():
+    pytest.importorskip("cbor2")
+    encoder = PayloadEncoder.create("cbor")
+
+    assert encoder.decode(encoder.encode(DATA)) == DATA
+    assert len(encoder.encode(DATA)) < len(PayloadEncoder.create("json").encode(DATA))
+
+
+def test_content_formats_select_the_decoder():
+    assert isinstance(PayloadEncoder.for_content_format(None), type(PayloadEncoder.create("json")))
+    assert isinstance(
+        PayloadEncoder.for_content_format(42), type(PayloadEncoder.create("packed"))
+    )
+    with pytest.raises(ValueError):
+        PayloadEncoder.create("xml")
@@ -0,0 +1,39 @@
+"""
+Tests for the profiling mode.
+"""
+import time
+
+import pytest
+
+from core import DataGenerator, Metrics, Profiler
+
+
+def busy_loop(profiler: Profiler, duration: float) -> None:
+    generator = DataGenerator(1000, "sinusoidal", {"amplitude": 2.0})
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        with profiler.span("generate"):
+            generator.generate(as_array=True)
+
+
+@pytest.mark.parametrize("mode", Profiler.MODES)
+def test_profiler_writes_the_collapsed_stacks_and_summary(tmp_path, mode):
+    output = str(tmp_path / "profile")
+    metrics = Metrics()
+    metrics.observe("round_trip_seconds", 0.002, type="telemetry")
+
+    with Profiler(output, mode, interval=0.001, metrics=metrics) as profiler:
+        busy_loop(profiler, 0.2)
+
+    with open(output + ".collapsed", encoding="utf-8") as collapsed_file:
+        lines = collapsed_file.read().splitlines()
+    with open(output + ".txt", encoding="utf-8") as summary_file:
+        summary = summary_file.read()
+
+    assert lines
+    _, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any("busy_loop (test_profiler.py" in line for line in lines)
+    assert "generate" in summary and "round_trip (connector)" in summary
+    assert profiler.spans["generate"].count > 0
+    assert (tmp_path / "profile.pstats").exists() == (mode == "cprofile")
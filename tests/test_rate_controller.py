@@ -0,0 +1,77 @@
+"""
+Tests for the rate controller.
+"""
+import asyncio
+
+import pytest
+
+from core import FleetSimulator, RateController, RateProfile
+
+SPEC = {"sensors": [{"name": "e1", "function_type": "linear", "parameters": {"slope": 1.0}}]}
+
+
+def test_profile_stages_follow_each_other():
+    profile = RateProfile(
+        [
+            {"stage": "ramp", "from": 0, "to": 100, "duration": 10},
+            {"stage": "step", "rates": [50, 20], "duration": 5},
+            {"stage": "soak", "rate": 10},
+        ]
+    )
+
+    assert profile.duration is None
+    assert profile.rate_at(5) == pytest.approx(50)
+    assert profile.rate_at(12) == 50
+    assert profile.rate_at(17) == 20
+    assert profile.rate_at(1000) == 10
+    assert profile.integral(10) == pytest.approx(500)
+    assert profile.integral(22) == pytest.approx(500 + 250 + 100 + 20)
+
+
+def test_only_the_last_stage_may_be_endless():
+    with pytest.raises(ValueError):
+        RateProfile([{"stage": "constant", "rate": 1}, {"stage": "constant", "rate": 2}])
+
+
+@pytest.mark.parametrize("duration", [0, -5])
+def test_stage_durations_must_be_positive(duration):
+    with pytest.raises(ValueError, match="positive"):
+        RateProfile([{"rate": 10, "duration": duration}, {"rate": 5}])
+
+
+def test_endless_step_stage_needs_a_duration():
+    with pytest.raises(ValueError):
+        RateProfile([{"stage": "step", "rates": [10, 100]}])
+
+    profile = RateProfile([{"stage": "step", "rates": [10]}])
+    assert profile.duration is None
+    assert profile.rate_at(1e6) == 10
+
+
+def test_controller_paces_sends_at_the_target_rate():
+    async def acquire_all() -> tuple[int, float]:
+        controller = RateController(RateProfile.constant(200))
+        count = 0
+        while controller.elapsed < 0.5:
+            await controller.acquire()
+            count += 1
+        return count, controller.elapsed
+
+    count, elapsed = asyncio.run(acquire_all())
+
+    assert count / elapsed == pytest.approx(200, rel=0.1)
+
+
+def test_paced_fleet_reports_achieved_and_target_rates(fake_connector):
+    members = FleetSimulator.build_members(SPEC, 20)
+    for member in members:
+        member.device.set_token("token-" + member.device.mac_address)
+
+    rate = RateController(RateProfile([{"stage": "constant", "rate": 100, "duration": 0.5}]))
+    connector = fake_connector(delay=0.001)
+    simulator = FleetSimulator(connector, members, concurrency=10, seed=1, rate=rate)
+    stats = asyncio.run(simulator.run())
+
+    assert stats.target == pytest.approx(50)
+    assert stats.sent == pytest.approx(50, abs=3)
+    assert stats.rates()["achieved_per_sec"] == pytest.approx(100, rel=0.15)
@@ -0,0 +1,56 @@
+"""
+Tests for the segment cache.
+"""
+import numpy as np
+
+from core import DataGenerator, SegmentCache
+
+
+def test_identical_generators_share_segments():
+    cache = SegmentCache()
+    parameters = {"base": 1.001, "offset": 25}
+    first = DataGenerator(100, "exponantial", parameters, cache=cache)
+    second = DataGenerator(100, "exponantial", parameters, cache=cache)
+    uncached = DataGenerator(100, "exponantial", parameters)
+
+    expected = uncached.generate(as_array=True)
+    assert np.array_equal(first.generate(as_array=True), expected)
+    shared = second.generate(as_array=True)
+    assert np.array_equal(shared, expected)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cached_values_are_returned_as_writable_copies():
+    cache = SegmentCache()
+    parameters = {"base": 1.001, "offset": 25}
+    first = DataGenerator(100, "exponantial", parameters, cache=cache)
+    second = DataGenerator(100, "exponantial", parameters, cache=cache)
+
+    values = first.generate(as_array=True)
+    values[0] = 1
+    buffers = first.generate_buffers(2)
+    buffers[:] = 0
+
+    assert second.generate(as_array=True)[0] != 1
+    assert np.any(second.generate_buffers(2) != 0)
+    assert cache.stats()["hits"] == 2
+
+
+def test_cache_evicts_least_recently_used_segments():
+    cache = SegmentCache(max_bytes=3 * 100 * 8)
+    generator = DataGenerator(100, "linear", {"slope": 1.0}, cache=cache)
+    for _ in range(5):
+        generator.generate()
+
+    assert len(cache) == 3
+    assert cache.nbytes <= cache.max_bytes
+    assert cache.evictions == 2
+
+
+def test_random_functions_are_not_cached():
+    cache = SegmentCache()
+    first = DataGenerator(10, "random_walk", {"seed": 1}, cache=cache)
+    first.generate()
+
+    assert len(cache) == 0
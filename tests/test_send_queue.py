@@ -0,0 +1,56 @@
+"""
+Tests for the send queue.
+"""
+import asyncio
+
+from core import SendQueue
+
+
+def test_block_policy_bounds_the_queue_and_sends_everything(fake_connector):
+    connector = fake_connector(delay=0.01)
+
+    async def scenario() -> SendQueue:
+        async with SendQueue(connector, max_size=5, workers=2) as queue:
+            for index in range(40):
+                await queue.send_telemetry_data_async("token", {"index": index})
+                assert queue.depth <= 5
+        return queue
+
+    queue = asyncio.run(scenario())
+
+    assert queue.max_depth <= 5
+    assert queue.sent == 40
+    assert sorted(data["index"] for _, data in connector.packets) == list(range(40))
+
+
+def test_drop_oldest_policy_keeps_the_newest_messages(fake_connector):
+    connector = fake_connector(delay=0.05)
+
+    async def scenario() -> SendQueue:
+        async with SendQueue(connector, max_size=3, policy="drop_oldest", workers=1) as queue:
+            for index in range(20):
+                await queue.send_telemetry_data_async("token", {"index": index})
+        return queue
+
+    queue = asyncio.run(scenario())
+
+    assert queue.dropped > 0
+    assert queue.sent + queue.dropped == 20
+    assert (queue.sent_packets, queue.dropped_packets) == (queue.sent, queue.dropped)
+    assert queue.sent_values == queue.sent
+    assert connector.packets[-1][1]["index"] == 19
+
+
+def test_batches_are_counted_by_packets_and_values(fake_connector):
+    connector = fake_connector(delay=0)
+    batch = [{"ts": 0, "values": {"e1": [1.0, 2.0]}}, {"ts": 1, "values": {"e1": [3.0]}}]
+
+    async def scenario() -> SendQueue:
+        async with SendQueue(connector, workers=1) as queue:
+            await queue.send_telemetry_data_async("token", batch)
+            await queue.send_telemetry_data_async("token", {"e1": [1.0], "e2": [2.0]})
+        return queue
+
+    queue = asyncio.run(scenario())
+
+    assert (queue.sent, queue.sent_packets, queue.sent_values) == (2, 3, 5)
@@ -0,0 +1,54 @@
+"""
+Tests for the telemetry batcher.
+"""
+import asyncio
+
+from core import TelemetryBatcher
+
+
+def test_batch_is_flushed_when_full(fake_connector):
+    connector = fake_connector()
+
+    async def scenario():
+        batcher = TelemetryBatcher(connector, max_samples=3, max_delay=60)
+        for value in range(7):
+            await batcher.add("token", {"e1": [value]}, timestamp=value)
+        assert batcher.pending_samples == 1
+        await batcher.close()
+
+    asyncio.run(scenario())
+
+    assert [len(batch) for _, batch in connector.packets] == [3, 3, 1]
+    assert connector.packets[0][1][1] == {"ts": 1000, "values": {"e1": [1]}}
+
+
+def test_batch_is_flushed_after_delay(fake_connector):
+    connector = fake_connector()
+
+    async def scenario():
+        batcher = TelemetryBatcher(connector, max_samples=100, max_delay=0.05)
+        await batcher.add("first", {"e1": [1]})
+        await batcher.add("second", {"e1": [2]})
+        await asyncio.sleep(0.1)
+        assert batcher.pending_samples == 0
+
+    asyncio.run(scenario())
+
+    assert sorted(token for token, _ in connector.packets) == ["first", "second"]
+
+
+def test_batcher_counts_the_delivered_and_failed_samples(fake_connector):
+    async def scenario(connector):
+        batcher = TelemetryBatcher(connector, max_samples=3, max_delay=0.01)
+        for value in range(7):
+            await batcher.add("token", {"e1": [value, value]}, timestamp=value)
+        await asyncio.sleep(0.05)
+        await batcher.add("other", {"e1": [0]})
+        await batcher.close()
+        return batcher
+
+    delivered = asyncio.run(scenario(fake_connector()))
+    failed = asyncio.run(scenario(fake_connector(fail=True)))
+
+    assert (delivered.sent, delivered.failed, delivered.values) == (8, 0, 15)
+    assert (failed.sent, failed.failed, failed.values) == (0, 8, 0)
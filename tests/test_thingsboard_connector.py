@@ -0,0 +1,152 @@
+"""
+Tests for the Thingsboard connector against the mock server.
+"""
+import asyncio
+
+import pytest
+from aiocoap import Code, Message
+
+from core import Device, PayloadEncoder, ThingsboardConnector, TokenStore
+from core.mock_server import MockThingsboardServer
+
+
+def make_device(mac_address: str, provision_key: str = "key") -> Device:
+    device = Device(mac_address)
+    device.set_provision_key(provision_key)
+    device.set_provision_secret("secret")
+    return device
+
+
+def test_register_and_send_telemetry(free_port):
+    port = free_port()
+
+    async def scenario():
+        async with MockThingsboardServer(port=port) as server:
+            async with ThingsboardConnector("127.0.0.1", port) as connector:
+                device = make_device("02:00:00:00:00:01")
+                await connector.register_device_async(device)
+                await connector.send_telemetry_data_async(device.get_token(), {"e1": [1.5]})
+        return server, device
+
+    server, device = asyncio.run(scenario())
+
+    assert device.get_token() == server.devices["02:00:00:00:00:01"]
+    assert server.messages == {"provision": 1, "telemetry": 1, "attributes": 1}
+    assert server.bytes["telemetry"] == len(b'{"e1":[1.5]}')
+
+
+def test_rejected_provision_raises(free_port):
+    port = free_port()
+
+    async def scenario():
+        async with MockThingsboardServer(port=port, provision_key="key"):
+            async with ThingsboardConnector("127.0.0.1", port) as connector:
+                await connector.register_device_async(make_device("aa", "wrong"))
+
+    with pytest.raises(Exception, match="Cannot provision"):
+        asyncio.run(scenario())
+
+
+def test_injected_errors_raise(free_port):
+    port = free_port()
+
+    async def scenario():
+        async with MockThingsboardServer(port=port, error_rate=1.0):
+            async with ThingsboardConnector("127.0.0.1", port) as connector:
+                await connector.send_telemetry_data_async("token", {"e1": [1]})
+
+    with pytest.raises(Exception, match="Cannot save telemetry"):
+        asyncio.run(scenario())
+
+
+def test_bulk_provisioning_uses_token_store(tmp_path, free_port):
+    port = free_port()
+    token_store = TokenStore(str(tmp_path / "tokens.jsonl"))
+
+    async def scenario(devices):
+        async with MockThingsboardServer(port=port) as server:
+            async with ThingsboardConnector("127.0.0.1", port) as connector:
+                registered = await connector.provision_devices_async(
+                    devices, concurrency=4, token_store=token_store
+                )
+        return server, registered
+
+    devices = [make_device("02:00:00:00:00:%02X" % index) for index in range(10)]
+    server, registered = asyncio.run(scenario(devices))
+    assert registered == 10
+    assert server.messages["provision"] == 10
+
+    restarted = [make_device(device.mac_address) for device in devices]
+    server, registered = asyncio.run(scenario(restarted))
+    assert registered == 0
+    assert server.messages["provision"] == 0
+    assert [device.get_token() for device in restarted] == [
+        device.get_token() for device in devices
+    ]
+
+
+class AttributeFailingServer(MockThingsboardServer):
+    """A mock server that issues tokens but fails every attribute request."""
+
+    async def handle(self, path, payload, content_format=None):
+        if path[-1:] == ("attributes",):
+            self.errors += 1
+            return Message(code=Code.INTERNAL_SERVER_ERROR)
+        return await super().handle(path, payload, content_format)
+
+
+def test_issued_tokens_are_stored_when_the_attributes_fail(tmp_path, free_port):
+    port = free_port()
+    token_store = TokenStore(str(tmp_path / "tokens.jsonl"))
+    devices = [make_device("02:00:00:00:00:%02X" % index) for index in range(3)]
+
+    async def scenario():
+        async with AttributeFailingServer(port=port) as server:
+            async with ThingsboardConnector("127.0.0.1", port) as connector:
+                registered = await connector.provision_devices_async(
+                    devices, token_store=token_store
+                )
+        return server, registered
+
+    server, registered = asyncio.run(scenario())
+
+    assert registered == 3
+    assert server.errors == 3
+    for device in devices:
+        assert token_store.get(device.mac_address) == server.devices[device.mac_address]
+
+
+def test_timed_out_requests_are_retried_within_the_window(free_port):
+    port = free_port()
+
+    async def scenario():
+        async with MockThingsboardServer(port=port, drop_rate=0.3, seed=4) as server:
+            async with ThingsboardConnector(
+                "127.0.0.1", port, timeout=0.2, max_in_flight=4, retries=8, backoff=0.01
+            ) as connector:
+                await asyncio.gather(
+                    *(connector.send_telemetry_data_async("token", {"e1": [i]}) for i in range(20))
+                )
+        return server, connector
+
+    server, connector = asyncio.run(scenario())
+
+    assert server.dropped > 0
+    assert connector.retried == connector.timeouts >= server.dropped
+    assert connector.in_flight == 0
+
+
+def test_packed_telemetry_is_accepted_and_counted(free_port):
+    port = free_port()
+    encoder = PayloadEncoder.create("packed")
+
+    async def scenario():
+        async with MockThingsboardServer(port=port) as server:
+            async with ThingsboardConnector("127.0.0.1", port, encoder=encoder) as connector:
+                await connector.send_telemetry_data_async("token", {"e1": [1.5, 2.5]})
+        return server, connector
+
+    server, connector = asyncio.run(scenario())
+
+    assert connector.telemetry_messages == 1
+    assert connector.telemetry_bytes == server.bytes["telemetry"] == 2 + 1 + 2 + 2 + 2 * 4
@@ -0,0 +1,25 @@
+"""
+Tests for the token store.
+"""
+from core import TokenStore
+
+
+def test_tokens_persist_across_instances(tmp_path):
+    path = str(tmp_path / "tokens.jsonl")
+    store = TokenStore(path)
+    store.put("02:00:00:00:00:01", "first")
+    store.put("02:00:00:00:00:02", "second")
+    store.put("02:00:00:00:00:01", "renewed")
+
+    reloaded = TokenStore(path)
+
+    assert len(reloaded) == 2
+    assert reloaded.get("02:00:00:00:00:01") == "renewed"
+    assert "02:00:00:00:00:03" not in reloaded
+
+
+def test_truncated_line_is_skipped(tmp_path):
+    path = tmp_path / "tokens.jsonl"
+    path.write_text('{"mac_address": "a", "token": "t"}\n{"mac_addr', encoding="utf-8")
+
+    assert TokenStore(str(path)).get("a") == "t"
@@ -0,0 +1,121 @@
+"""
+Tests for recording and replaying request traces.
+"""
+import asyncio
+import time
+
+from aiocoap import Code, Message
+
+from core import Device, ThingsboardConnector, TraceReplayer, TraceWriter
+from core.mock_server import MockThingsboardServer
+from core.trace import CoapSender
+
+
+class NullSender:
+    """A sender stand-in that accepts all the requests."""
+
+    async def post_payload_async(self, path, payload, content_format=None, kind="telemetry"):
+        return Message(code=Code.CHANGED)
+
+
+def record(path: str, telemetry_count: int, port: int) -> None:
+    """Register a device and send telemetry while recording the requests."""
+
+    async def scenario():
+        async with MockThingsboardServer(port=port):
+            with TraceWriter(path) as recorder:
+                async with ThingsboardConnector(
+                    "127.0.0.1", port, recorder=recorder
+                ) as connector:
+                    device = Device("02:00:00:00:00:01")
+                    device.set_provision_key("key")
+                    device.set_provision_secret("secret")
+                    await connector.register_device_async(device)
+                    for index in range(telemetry_count):
+                        await connector.send_telemetry_data_async(
+                            device.get_token(), {"e1": [float(index)]}
+                        )
+
+    asyncio.run(scenario())
+
+
+def test_requests_are_appended_to_the_trace(tmp_path, free_port):
+    path = str(tmp_path / "trace.jsonl.gz")
+
+    record(path, 3, free_port())
+    record(path, 2, free_port())
+
+    records = list(TraceReplayer(path).records())
+    kinds = [item["kind"] for item in records]
+    assert kinds == ["provision", "attribute"] + ["telemetry"] * 3 + [
+        "provision",
+        "attribute",
+    ] + ["telemetry"] * 2
+    assert records[0]["token"] is None
+    assert records[2]["token"] == records[2]["path"].split("/")[3]
+    assert [item["time"] for item in records] == sorted(item["time"] for item in records)
+
+
+def test_replay_sends_the_recorded_payloads(tmp_path, free_port):
+    path = str(tmp_path / "trace.jsonl.gz")
+    record(path, 5, free_port())
+    port = free_port()
+
+    async def scenario(direct: bool):
+        async with MockThingsboardServer(port=port) as server:
+            if direct:
+                sender = CoapSender("127.0.0.1", port)
+            else:
+                sender = ThingsboardConnector("127.0.0.1", port)
+            async with sender:
+                stats = await TraceReplayer(path, speed=0).replay(sender, ["telemetry"])
+        return server, stats
+
+    for direct in (False, True):
+        server, stats = asyncio.run(scenario(direct))
+
+        assert stats["sent"] == 5 and stats["failed"] == 0
+        assert server.messages["telemetry"] == 5
+        assert server.bytes["telemetry"] == 5 * len(b'{"e1":[0.0]}')
+
+
+def test_replay_follows_the_recorded_timing_at_the_speed(tmp_path, monkeypatch):
+    path = str(tmp_path / "trace.jsonl.gz")
+    with TraceWriter(path) as recorder:
+        for second in range(3):
+            monkeypatch.setattr("core.trace.time.time", lambda second=second: 1000.0 + second)
+            recorder.write("telemetry", "/api/v1/token/telemetry", b"{}", None)
+
+    stats = asyncio.run(TraceReplayer(path, speed=10).replay(NullSender()))
+
+    assert stats["sent"] == 3
+    assert 0.19 <= stats["elapsed"] < 0.4
+
+
+def test_replay_stops_at_a_truncated_member_and_reads_the_next_ones(tmp_path):
+    path = tmp_path / "trace.jsonl.gz"
+    with TraceWriter(str(path), flush_records=2) as recorder:
+        for index in range(5):
+            recorder.write("telemetry", f"/api/v1/token/telemetry/{index}", b"{}", None)
+    # A crash while the last member was written cut it off.
+    path.write_bytes(path.read_bytes()[:-5])
+    with TraceWriter(str(path)) as recorder:
+        recorder.write("telemetry", "/api/v1/token/telemetry/after", b"{}", None)
+
+    records = list(TraceReplayer(str(path)).records())
+    stats = asyncio.run(TraceReplayer(str(path), speed=0).replay(NullSender()))
+
+    assert [item["path"].rsplit("/", 1)[1] for item in records] == ["0", "1", "2", "3", "after"]
+    assert stats["sent"] == 5
+
+
+def test_idle_recorder_flushes_after_the_interval(tmp_path):
+    path = str(tmp_path / "trace.jsonl.gz")
+
+    with TraceWriter(path, flush_interval=0.05) as recorder:
+        recorder.write("telemetry", "/api/v1/token/telemetry", b"{}", None)
+        time.sleep(0.3)
+        records = list(TraceReplayer(path).records())
+
+    assert len(records) == 1
+    assert len(list(TraceReplayer(path).records())) == 1
@@ -0,0 +1,36 @@
+# To overcome the parent package problems, do not change the lines 2 and 3.
+import sys
+sys.path.append(sys.path[0] + "/..")
+
+# Import argparse to read the command line arguments.
+import argparse
+parser = argparse.ArgumentParser(description="Throughput benchmarks of the simulator.")
+parser.add_argument("--output", type=str, help="The JSON file to write the results to.", default="benchmark.json")
+parser.add_argument("--buffers", type=str, help="Comma separated buffer sizes.", default="10,1000,100000")
+parser.add_argument("--messages", type=int, help="The number of messages of the transport benchmark.", default=1000)
+parser.add_argument("--concurrency", type=int, help="The messages in flight of the transport benchmark.", default=50)
+parser.add_argument("--devices", type=int, help="The number of devices of the fleet tick benchmark.", default=100000)
+parser.add_argument("--host", type=str, help="The host of a CoAP endpoint, a mock server is used if not passed.")
+parser.add_argument("--port", type=int, help="The port of the CoAP endpoint.", default=5683)
+parser.add_argument("--min_time", type=float, help="The minimum duration of every measurement.", default=0.2)
+parser.add_argument("--skip_transport", action="store_true", help="Do not run the transport benchmark.")
+args = parser.parse_args()
+
+# Get the arguments.
+BUFFER_SIZES = [int(value) for value in args.buffers.split(",")]
+
+import json
+
+# Import the benchmark.
+from core.benchmark import Benchmark
+
+benchmark = Benchmark(args.min_time)
+benchmark.run_generation(BUFFER_SIZES)
+benchmark.run_serialization(BUFFER_SIZES)
+benchmark.run_requests()
+benchmark.run_fleet_tick(args.devices)
+if not args.skip_transport:
+    benchmark.run_transport(args.messages, args.concurrency, hostname=args.host, port=args.port)
+
+benchmark.save(args.output)
+print(json.dumps(benchmark.results, indent=4))
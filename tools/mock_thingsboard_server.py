@@ -0,0 +1,41 @@
+# To overcome the parent package problems, do not change the lines 2 and 3.
+import sys
+sys.path.append(sys.path[0] + "/..")
+
+# Import argparse to read the command line arguments.
+import argparse
+parser = argparse.ArgumentParser(description="Local CoAP stand-in for the Thingsboard device API.")
+parser.add_argument("--host", type=str, help="The address to listen on.", default="127.0.0.1")
+parser.add_argument("--port", type=int, help="The UDP port to listen on.", default=5683)
+parser.add_argument("--latency", type=float, help="The delay before every response in seconds.", default=0.0)
+parser.add_argument("--error_rate", type=float, help="The ratio of requests answered with an error.", default=0.0)
+parser.add_argument("--drop_rate", type=float, help="The ratio of requests never answered.", default=0.0)
+parser.add_argument("--report", type=float, help="The period of the counter reports in seconds.", default=10.0)
+args = parser.parse_args()
+
+import asyncio
+import logging
+
+# Import the mock server.
+from core.mock_server import MockThingsboardServer
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+
+async def serve() -> None:
+    """Run the server and report its counters periodically."""
+    server = MockThingsboardServer(
+        args.host, args.port, args.latency, args.error_rate, args.drop_rate
+    )
+    async with server:
+        while True:
+            await asyncio.sleep(args.report)
+            logging.info(
+                "messages=%s bytes=%s errors=%d dropped=%d",
+                server.messages, server.bytes, server.errors, server.dropped,
+            )
+
+try:
+    asyncio.run(serve())
+except KeyboardInterrupt:
+    pass
@@ -5,37 +5,71 @@ sys.path.append(sys.path[0] + "/..")
 # Import argparse to read the command line arguments.
 import argparse
 parser = argparse.ArgumentParser(description="Offline data generator for the simulated device.")
-parser.add_argument("--sensor", type=str, help="The sensor type, possible values are: 'exponantial'.", required=True)
+parser.add_argument("--sensor", type=str, help="The sensor type, e.g. 'exponantial', 'linear', 'sinusoidal', 'polynomial', 'logistic', 'sawtooth' or 'random_walk'.", required=True)
 parser.add_argument("--buffer", type=int, help="The buffer size of the data generator.", required=True)
-parser.add_argument("--fsettings", type=str, help="The settings of the data generator.", required=True)
+parser.add_argument("--fsettings", type=str, help="The settings of the data generator as a JSON object, or 'base,offset,shift' for 'exponantial'.", required=True)
+parser.add_argument("--step", type=float, help="The step size of the data generator.", default=1)
+parser.add_argument("--error", type=int, help="The error percentage of the data generator.", default=25)
+parser.add_argument("--output", type=str, help="The file to stream the dataset to. Prints one buffer if not passed.")
+parser.add_argument("--format", type=str, help="The format of the output file: 'csv', 'npy', 'parquet' or 'series'.", default="csv")
+parser.add_argument("--dtype", type=str, help="The sample type of the 'series' format: 'float32' or 'float64'.", default="float32")
+parser.add_argument("--samples", type=int, help="The number of samples to write to the output file.")
+parser.add_argument("--duration", type=float, help="The duration of the dataset in seconds, used with --rate.")
+parser.add_argument("--rate", type=float, help="The sample rate of the sensor in Hz, used with --duration.", default=1.0)
+parser.add_argument("--chunk", type=int, help="The number of samples generated and written at once.", default=1_000_000)
 args = parser.parse_args()
 
 # Get the arguments.
 SENSOR_TYPE = args.sensor
 BUFFER_SIZE = args.buffer
 
-if SENSOR_TYPE == "exponantial":
+if args.fsettings.lstrip().startswith("{"):
+    # Read the settings as the parameters of the function.
+    import json
+    PARAMETERS = json.loads(args.fsettings)
+elif SENSOR_TYPE == "exponantial":
     # Spilt the settings with comma.
-    args.fsettings = args.fsettings.split(",")
-    for index, value in enumerate(args.fsettings):
-        if index == 0:
-            BASE = float(value)
-        elif index == 1:
-            OFFSET = float(value)
-        elif index == 2:
-            SHIFT = float(value)
+    PARAMETERS = {}
+    for name, value in zip(["base", "offset", "shift"], args.fsettings.split(",")):
+        PARAMETERS[name] = float(value)
 else:
-    raise NotImplementedError(f"Sensor type {SENSOR_TYPE} is not supported.")
+    raise NotImplementedError(f"The settings of sensor type {SENSOR_TYPE} must be a JSON object.")
 
 # Import all the core modules.
 from core import DataGenerator, Device
+from core.dataset_writer import DatasetWriter
+from core.series_file import SeriesFile
 
 # Create a data generator function.
-sensor = DataGenerator(BUFFER_SIZE, SENSOR_TYPE, {"base": BASE, "offset": OFFSET, "shift": SHIFT})
+sensor = DataGenerator(BUFFER_SIZE, SENSOR_TYPE, PARAMETERS)
 
+if args.output is None:
     # Create formatted data to be sent to the ThingSpeak.
-data_packet = Device.get_formatted_data(
-    "sensor_data", sensor.generate(1, 25),
-)
+    data_packet = Device.get_formatted_data(
+        "sensor_data", sensor.generate(args.step, args.error),
+    )
 
-print(data_packet)
\ No newline at end of file
+    print(data_packet)
+else:
+    # Find the number of samples of the dataset.
+    if args.samples is not None:
+        TOTAL_SAMPLES = args.samples
+    elif args.duration is not None:
+        TOTAL_SAMPLES = int(args.duration * args.rate)
+    else:
+        parser.error("--samples or --duration is required with --output.")
+
+    # Stream the dataset to the output file.
+    if args.format == "series":
+        report = SeriesFile.write(
+            args.output, {"sensor_data": sensor}, TOTAL_SAMPLES,
+            args.step, args.error, args.dtype, args.chunk,
+        )
+    else:
+        with DatasetWriter.create(args.format, args.output, TOTAL_SAMPLES) as writer:
+            report = writer.stream(sensor, TOTAL_SAMPLES, args.chunk, args.step, args.error)
+
+    print(
+        f"Written {report['samples']} samples to {args.output} in {report['seconds']:.2f} s "
+        f"({report['samples_per_sec']:,.0f} samples/s)."
+    )
@@ -0,0 +1,43 @@
+# To overcome the parent package problems, do not change the lines 2 and 3.
+import sys
+sys.path.append(sys.path[0] + "/..")
+
+# Import argparse to read the command line arguments.
+import argparse
+parser = argparse.ArgumentParser(description="Replays the request traces recorded by fleet.py --record.")
+parser.add_argument("traces", type=str, nargs="+", help="The trace files, merged by time.")
+parser.add_argument("--host", type=str, help="The host of the CoAP platform.", default="127.0.0.1")
+parser.add_argument("--port", type=int, help="The port of the CoAP platform.", default=5683)
+parser.add_argument("--speed", type=float, help="The speed relative to the recording, 0 for the maximum speed.", default=1.0)
+parser.add_argument("--concurrency", type=int, help="The maximum number of requests in flight.", default=100)
+parser.add_argument("--kinds", type=str, help="Comma separated message types to replay, e.g. telemetry.", default=None)
+parser.add_argument("--direct", action="store_true", help="Send over CoAP directly, without the connector retries and metrics.")
+parser.add_argument("--retries", type=int, help="The retries of a request that timed out, through the connector.", default=0)
+args = parser.parse_args()
+
+import asyncio
+import json
+import logging
+
+# Import the replayer.
+from core.thingsboard_connector import ThingsboardConnector
+from core.trace import CoapSender, TraceReplayer
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+
+async def replay() -> dict:
+    """Replay the traces through the connector, or directly over CoAP."""
+    replayer = TraceReplayer(args.traces, args.speed, args.concurrency)
+    kinds = args.kinds.split(",") if args.kinds else None
+    if args.direct:
+        sender = CoapSender(args.host, args.port)
+    else:
+        sender = ThingsboardConnector(
+            args.host, args.port, max_in_flight=args.concurrency, retries=args.retries
+        )
+    async with sender:
+        return await replayer.replay(sender, kinds)
+
+
+print(json.dumps(asyncio.run(replay()), indent=4))